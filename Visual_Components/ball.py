@@ -1,14 +1,27 @@
 import pygame
-import random
+
+from simulation import physics
+
 
 class Ball:
     """
     A class representing a ball.
     The ball moves with physics-like properties including velocity, friction,
     and collision logic with walls and players.
+
+    The ball is a view of a physics state row; the physics itself is run by
+    the functions in simulation.physics.
     """
 
-    def __init__(self, x, y, radius=10, color=(255, 255, 255)):
+    def __init__(
+        self,
+        x,
+        y,
+        radius=physics.BALL_RADIUS,
+        color=(255, 255, 255),
+        state=None,
+        rng=None,
+    ):
         """
         Initialize a new ball with position, appearance, and physics properties.
         
@@ -17,15 +30,64 @@ class Ball:
             y (float): Initial y-coordinate on the field
             radius (int): Size of the ball (default: 10)
             color (tuple): RGB color tuple for the ball (default: white)
+            state (np.ndarray): Physics state row holding the ball
+                (default: a private row)
+            rng (np.random.Generator): Source of the random nudges given to
+                a crawling or stuck ball (default: the global np.random)
         """
+        self._state = physics.new_states(1)[0] if state is None else state
         self.x = x  # x-coordinate position
         self.y = y  # y-coordinate position
         self.radius = radius  # Size of the ball
         self.color = color  # Color of the ball (RGB tuple)
         self.velocity = [0, 0]  # Current movement vector [x_velocity, y_velocity]
-        self.friction = 0.98  # Friction coefficient to slow the ball over time
-        self.min_velocity = 0.1  # Minimum velocity threshold before stopping
+        self.friction = physics.BALL_FRICTION  # Friction coefficient
+        self.min_velocity = physics.BALL_MIN_VELOCITY  # Stopping threshold
         self.last_touched_by = None  # Tracks which team last touched the ball
+        self.rng = rng  # Random source of the physics, None for np.random
+
+    @property
+    def x(self):
+        return float(self._state[physics.BALL_X])
+
+    @x.setter
+    def x(self, value):
+        self._state[physics.BALL_X] = value
+
+    @property
+    def y(self):
+        return float(self._state[physics.BALL_Y])
+
+    @y.setter
+    def y(self, value):
+        self._state[physics.BALL_Y] = value
+
+    @property
+    def velocity(self):
+        """
+        Copy of the current movement vector [x_velocity, y_velocity].
+        Assign a new pair to change it.
+        """
+        return [
+            float(self._state[physics.BALL_VX]),
+            float(self._state[physics.BALL_VY]),
+        ]
+
+    @velocity.setter
+    def velocity(self, value):
+        self._state[physics.BALL_VX] = value[0]
+        self._state[physics.BALL_VY] = value[1]
+
+    @property
+    def last_touched_by(self):
+        """
+        Team ("blue", "red" or None) that last touched the ball.
+        """
+        return physics.TEAM_NAMES[int(self._state[physics.BALL_TOUCHED])]
+
+    @last_touched_by.setter
+    def last_touched_by(self, team):
+        self._state[physics.BALL_TOUCHED] = physics.TEAM_CODES[team]
 
     def draw(self, screen):
         """
@@ -41,19 +103,7 @@ class Ball:
         Update the ball's position based on its current velocity and apply friction.
         Called each frame to animate the ball's movement.
         """
-        # Update coordinates according to velocity
-        self.x += self.velocity[0]
-        self.y += self.velocity[1]
-
-        # Apply friction to slow the ball down gradually
-        self.velocity[0] *= self.friction
-        self.velocity[1] *= self.friction
-
-        # Stop the ball if its velocity is below the minimum threshold
-        if abs(self.velocity[0]) < self.min_velocity:
-            self.velocity[0] = 0
-        if abs(self.velocity[1]) < self.min_velocity:
-            self.velocity[1] = 0
+        physics.move_ball(self._state[None])
 
     def check_collision_with_walls(self, field_width, field_height):
         """
@@ -64,38 +114,7 @@ class Ball:
             field_width (int): Width of the playing field
             field_height (int): Height of the playing field
         """
-        # Left wall collision with goal exception
-        # If ball hits left wall outside of goal area, bounce it
-        if self.x - self.radius < 0:
-            if not (field_height // 2 - 50 <= self.y <= field_height // 2 + 50):
-                self.x = self.radius  # Prevent ball from going through wall
-                self.velocity[0] *= -1  # Reverse horizontal velocity (bounce)
-
-        # Right wall collision with goal exception
-        # If ball hits right wall outside of goal area, bounce it
-        if self.x + self.radius > field_width:
-            if not (field_height // 2 - 50 <= self.y <= field_height // 2 + 50):
-                self.x = field_width - self.radius  
-                self.velocity[0] *= -1 
-
-        # Top wall collision
-        if self.y - self.radius < 0:
-            self.y = self.radius  
-
-            self.velocity[1] *= -1 
-
-        # Bottom wall collision
-        if self.y + self.radius > field_height:
-            self.y = field_height - self.radius 
-            self.velocity[1] *= -1 
-
-        # Add small random movement if ball is moving very slowly but not stopped
-        if abs(self.velocity[0]) < 0.1 and abs(self.velocity[1]) < 0.1:
-            if not (self.velocity[0] == 0 and self.velocity[1] == 0):
-                import random
-                # Add small random velocity to unstick the ball
-                self.velocity[0] += random.uniform(-1, 1) * 0.5
-                self.velocity[1] += random.uniform(-1, 1) * 0.5
+        physics.bounce_ball(self._state[None], field_width, field_height, self.rng)
 
     def reset_position(self, x, y):
         """
@@ -116,60 +135,17 @@ class Ball:
         Calculates bounce direction and applies velocity when collisions occur.
         
         Parameters:
-            player: Player object to check collision with
+            player: Player object in the same state row to check collision with
         """
-        import math
+        physics.kick_ball(self._state[None], player.index)
 
-        # Calculate distance between ball center and player center
-        distance = math.sqrt((self.x - player.x) ** 2 + (self.y - player.y) ** 2)
-        
-        # If distance is less than sum of radii, collision has occurred
-        if distance < self.radius + player.radius:
-            # Calculate normalized direction vector from player to ball
-            dx = self.x - player.x
-            dy = self.y - player.y
-            magnitude = math.sqrt(dx**2 + dy**2)
-            
-            # Prevent division by zero
-            if magnitude != 0:
-                dx /= magnitude
-                dy /= magnitude
-
-            # Apply new velocity in the direction away from player
-            # Force of 5 units gives a consistent bounce speed regardless of incoming velocity
-            self.velocity[0] = dx * 5
-            self.velocity[1] = dy * 5
-
-            # Track which team last touched the ball (for goal attribution)
-            self.last_touched_by = player.team
-
-    def resolve_stuck_ball(self, players):
+    def resolve_stuck_ball(self, players=None):
         """
         Check if the ball is stuck inside any player and resolve the overlap.
         Adds small random velocity to prevent the ball from getting stuck again.
         
         Parameters:
-            players (list): List of all player objects to check against
-        """
-        for player in players:
-            import math
-
-            # Calculate distance between ball and player
-            distance = math.sqrt((self.x - player.x) ** 2 + (self.y - player.y) ** 2)
-            
-            # If ball is overlapping with player
-            if distance < self.radius + player.radius:
-                # Calculate overlap amount
-                overlap = self.radius + player.radius - distance
-                
-                # Calculate direction vector to push ball out
-                dx = (self.x - player.x) / distance
-                dy = (self.y - player.y) / distance
-                
-                # Move ball out of player by the overlap amount
-                self.x += dx * overlap
-                self.y += dy * overlap
-
-                # Add small random velocity to prevent immediate re-collision
-                self.velocity[0] += random.uniform(-1, 1)
-                self.velocity[1] += random.uniform(-1, 1)
\ No newline at end of file
+            players (list): Unused; every player in the shared state row is
+                checked
+        """
+        physics.unstick_ball(self._state[None], self.rng)
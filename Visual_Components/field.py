@@ -1,16 +1,38 @@
 import sys
 import pygame
 
+from simulation import physics
 from Visual_Components.ball import Ball
 from Visual_Components.player import Player
 
+# Console announcement for each goal event
+GOAL_ANNOUNCEMENTS = {
+    physics.BLUE_GOAL: "Goal for Blue Team!",
+    physics.BLUE_OWN_GOAL: "Own Goal: Point for Red Team",
+    physics.RED_GOAL: "Goal for Red Team",
+    physics.RED_OWN_GOAL: "Own Goal: Point for Blue Team",
+}
+
 
 class SoccerField:
     """
     Main class that represents the soccer field and manages the game.
     Handles initialization, drawing, gameplay logic, and scoring.
+
+    The game state is one row of a simulation.physics state array
+    (``self.states`` has shape (1, STATE_SIZE)); players, ball, scores and the
+    clock are views onto it.
     """
-    def __init__(self, width=600, height=400, game_duration=60):
+    def __init__(
+        self,
+        width=600,
+        height=400,
+        game_duration=60,
+        fps=60,
+        celebrate_goals=True,
+        headless=False,
+        rng=None,
+    ):
         """
         Initialize the soccer field and game components.
 
@@ -18,12 +40,17 @@ class SoccerField:
             width (int): Width of the game window in pixels
             height (int): Height of the game window in pixels
             game_duration (int): Game duration in seconds
+            fps (int): Simulated frames per second, one frame per physics tick
+            celebrate_goals (bool): Whether to pause play after a goal to show it
+            headless (bool): Skip creating a window; the screen and clock stay
+                None until init_display is called or a surface is assigned
+            rng (np.random.Generator): Source of all the random draws of the
+                physics (default: the global np.random)
         """
-        pygame.init()
         self.width = width
         self.height = height
-        self.screen = pygame.display.set_mode((width, height))
-        pygame.display.set_caption("Soccer Field")
+        self.screen = None
+        self.clock = None
 
         # Define color constants
         self.GREEN = (34, 139, 34)  # Field color
@@ -32,40 +59,151 @@ class SoccerField:
         self.RED = (255, 0, 0)
         self.BLACK = (0, 0, 0)
 
+        # Physics state shared by all game objects
+        self.states = physics.new_states(1, width, height)
+        self.state = self.states[0]
+
         # Create players (2 blue and 2 red)
         self.players = [
-            Player(150, 200, self.BLUE, "blue"),
-            Player(250, 150, self.BLUE, "blue"),
-            Player(450, 250, self.RED, "red"),
-            Player(550, 200, self.RED, "red"),
+            Player(150, 200, self.BLUE, "blue", state=self.state, index=0),
+            Player(250, 150, self.BLUE, "blue", state=self.state, index=1),
+            Player(450, 250, self.RED, "red", state=self.state, index=2),
+            Player(550, 200, self.RED, "red", state=self.state, index=3),
         ]
 
         # Game objects initialization
-        self.clock = pygame.time.Clock()
-        self.ball = Ball(width // 2, height // 2)
+        self.rng = rng
+        self.ball = Ball(width // 2, height // 2, state=self.state, rng=rng)
         self.red_score = 0
         self.blue_score = 0
         self.scoring_team = None
         self.kickoff_started = False
         self.game_duration = game_duration
-        self.start_time = pygame.time.get_ticks()
+
+        # Simulated game clock: advanced by one fixed dt per physics tick so
+        # that game time depends on the step count, not on host speed
+        self.fps = fps
+        self.dt = 1.0 / fps
+        self.frame_count = 0
+
+        # Goal celebration: play pauses for a number of simulated frames
+        # instead of blocking the process, and is skipped entirely if disabled
+        self.celebrate_goals = celebrate_goals
+        self.celebration_duration = 2
+        self.celebration_frames = 0
+
+        # Drawing caches, built for the current screen on the first frame:
+        # the static pitch, the fonts by size, and the last rendered text of
+        # each label with its surface
+        self._cache_screen = None
+        self._background = None
+        self._fonts = {}
+        self._texts = {}
+
+        if not headless:
+            self.init_display()
+
+    @property
+    def red_score(self):
+        return int(self.state[physics.RED_SCORE])
+
+    @red_score.setter
+    def red_score(self, value):
+        self.state[physics.RED_SCORE] = value
+
+    @property
+    def blue_score(self):
+        return int(self.state[physics.BLUE_SCORE])
+
+    @blue_score.setter
+    def blue_score(self, value):
+        self.state[physics.BLUE_SCORE] = value
+
+    @property
+    def kickoff_started(self):
+        return bool(self.state[physics.KICKOFF])
+
+    @kickoff_started.setter
+    def kickoff_started(self, value):
+        self.state[physics.KICKOFF] = value
+
+    @property
+    def scoring_team(self):
+        """
+        Team ("blue", "red" or None) frozen until the other team kicks off.
+        """
+        return physics.TEAM_NAMES[int(self.state[physics.SCORING_TEAM])]
+
+    @scoring_team.setter
+    def scoring_team(self, team):
+        self.state[physics.SCORING_TEAM] = physics.TEAM_CODES[team]
+
+    @property
+    def frame_count(self):
+        return int(self.state[physics.FRAME])
+
+    @frame_count.setter
+    def frame_count(self, value):
+        self.state[physics.FRAME] = value
+
+    def init_display(self):
+        """
+        Open the game window and create the frame clock.
+        """
+        pygame.init()
+        self.screen = pygame.display.set_mode((self.width, self.height))
+        pygame.display.set_caption("Soccer Field")
+        self.clock = pygame.time.Clock()
 
     def draw_field(self):
         """
         Draw the soccer field, goals, players, ball, scores, and timer.
+
+        The pitch, goal posts and nets never change, so they are painted once
+        into a background surface that is blitted at the start of each frame.
+        """
+        if self._cache_screen is not self.screen:
+            self._reset_draw_cache()
+        self.screen.blit(self._background, (0, 0))
+
+        # Draw players, ball and time
+        for idx, player in enumerate(self.players):
+            player.draw(self.screen)
+        self.ball.draw(self.screen)
+        self.draw_scores()
+        self.draw_timer()
+
+    def _reset_draw_cache(self):
+        """
+        Rebuild the drawing caches for the current screen. Fonts and surfaces
+        do not outlive pygame.quit, and a new screen may have another pixel
+        format, so everything is recreated whenever the screen changes.
+        """
+        self._cache_screen = self.screen
+        self._fonts = {}
+        self._texts = {}
+        self._background = pygame.Surface(self.screen.get_size(), 0, self.screen)
+        self._draw_background(self._background)
+
+    def _draw_background(self, surface):
+        """
+        Draw the static part of the field: pitch, lines, goal posts and nets.
+
+        Parameters:
+            surface: Pygame surface to draw on
         """
         # draw field
-        self.screen.fill(self.GREEN)
-        pygame.draw.rect(self.screen, self.BLACK, (0, 0, self.width, self.height), 10)
+        surface.fill(self.GREEN)
+        pygame.draw.rect(surface, self.BLACK, (0, 0, self.width, self.height), 10)
         pygame.draw.line(
-            self.screen,
+            surface,
             self.WHITE,
             (self.width // 2, 0),
             (self.width // 2, self.height),
             2,
         )
         pygame.draw.circle(
-            self.screen, self.WHITE, (self.width // 2, self.height // 2), 50, 2
+            surface, self.WHITE, (self.width // 2, self.height // 2), 50, 2
         )
 
         # Define goal dimensions
@@ -73,36 +211,91 @@ class SoccerField:
         goal_top = (self.height - goal_height) // 2
 
         # Draw goal posts
-        pygame.draw.rect(self.screen, self.BLACK, (0, 0, 20, goal_top))
-        pygame.draw.rect(
-            self.screen, self.BLACK, (0, goal_top + goal_height, 20, goal_top)
-        )
-        pygame.draw.rect(self.screen, self.BLACK, (self.width - 20, 0, 20, goal_top))
+        pygame.draw.rect(surface, self.BLACK, (0, 0, 20, goal_top))
+        pygame.draw.rect(surface, self.BLACK, (0, goal_top + goal_height, 20, goal_top))
+        pygame.draw.rect(surface, self.BLACK, (self.width - 20, 0, 20, goal_top))
         pygame.draw.rect(
-            self.screen,
+            surface,
             self.BLACK,
             (self.width - 20, goal_top + goal_height, 20, goal_top),
         )
 
-        # Draw goal nets, player and time
-        self._draw_goal_net()
-        for idx, player in enumerate(self.players):
-            player.draw(self.screen)
-        self.ball.draw(self.screen)
-        self.draw_scores()
-        self.draw_timer()
+        # Draw goal nets
+        self._draw_goal_net(surface)
+
+    def _font(self, size):
+        """
+        Default font of a given size, created once.
+
+        Parameters:
+            size (int): Font size
+
+        Returns:
+            pygame.font.Font: The font
+        """
+        font = self._fonts.get(size)
+        if font is None:
+            font = self._fonts[size] = pygame.font.Font(None, size)
+        return font
+
+    def _render_text(self, label, text, color, size=36):
+        """
+        Render a text label, reusing the previous surface of the label while
+        its text is unchanged.
+
+        Parameters:
+            label (str): Name of the label, e.g. "timer"
+            text (str): Text to show
+            color (tuple): RGB text color
+            size (int): Font size
+
+        Returns:
+            pygame.Surface: The rendered text
+        """
+        cached = self._texts.get(label)
+        if cached is not None and cached[0] == text:
+            return cached[1]
+        rendered = self._font(size).render(text, True, color)
+        self._texts[label] = (text, rendered)
+        return rendered
 
     def reset_game(self):
         """
         Reset the game by placing the ball at the center and resetting the timer.
         """
         self.ball.reset_position(self.width // 2, self.height // 2)
-        self.start_time = pygame.time.get_ticks()
+        self.frame_count = 0
+
+    def tick(self):
+        """
+        Advance the simulated game clock by one frame.
+        """
+        self.state[physics.FRAME] += 1
+
+    def elapsed_time(self):
+        """
+        Simulated time since the game started.
+
+        Returns:
+            float: Elapsed game time in seconds
+        """
+        return self.frame_count * self.dt
+
+    def remaining_time(self):
+        """
+        Simulated time left before the game ends.
+
+        Returns:
+            float: Remaining game time in seconds (negative once expired)
+        """
+        return self.game_duration - self.elapsed_time()
 
     def run(self):
         """
         Main game loop. Handles events, player movement, collisions, and game logic.
         """
+        if self.screen is None:
+            self.init_display()
         self.reset_game()
         game_over = False
         while not game_over:
@@ -112,6 +305,14 @@ class SoccerField:
                     pygame.quit()
                     sys.exit()
 
+            # Show the goal celebration before play resumes
+            if self.celebration_frames > 0:
+                self.celebration_frames -= 1
+                self.draw_field()
+                pygame.display.flip()
+                self.clock.tick(60)
+                continue
+
             keys = pygame.key.get_pressed()
 
             # Blue team player 1 controls (WASD)
@@ -160,6 +361,7 @@ class SoccerField:
 
             # Check for overlaps and handle ball movement
             self.check_player_ball_overlaps()
+            self.tick()
 
             # Check if a goal was scored
             if self.check_goal()[0]:
@@ -171,7 +373,7 @@ class SoccerField:
             self.clock.tick(60)
 
             # Check if game timer has expired
-            if (pygame.time.get_ticks() - self.start_time) / 1000 > self.game_duration:
+            if self.elapsed_time() > self.game_duration:
                 game_over = True
                 self.display_game_over()
 
@@ -179,22 +381,17 @@ class SoccerField:
         """
         Check and handle player-player and player-ball collisions.
         """
-        # Check and prevent collisionns
-        for i, player in enumerate(self.players):
-            for j, other_player in enumerate(self.players):
-                if i != j:
-                    player.prevent_overlap(other_player)
-
-        # Move the ball and check for collisions
-        self.ball.move()
-        self.ball.check_collision_with_walls(self.width, self.height)
+        physics.update(self.states, self.width, self.height, self.rng)
 
-        # Check ball collision with each player
-        for player in self.players:
-            self.ball.check_collision_with_player(player)
+    def set_rng(self, rng):
+        """
+        Draw the random physics events from another generator.
 
-        # Ensure ball doesn't get stuck between players
-        self.ball.resolve_stuck_ball(self.players)
+        Parameters:
+            rng (np.random.Generator): The new random source
+        """
+        self.rng = rng
+        self.ball.rng = rng
 
     def check_goal(self):
         """
@@ -203,75 +400,45 @@ class SoccerField:
         Returns:
             list: [bool, str] - Whether a goal was scored and a message about the goal
         """
-        # Goal dimensions
-        goal_height = 100
-        goal_top = (self.height - goal_height) // 2
-        goal_bottom = goal_top + goal_height
-
-        # Check for goal on left side (blue team's goal)
-        if self.ball.x - self.ball.radius <= 20:
-            if goal_top <= self.ball.y <= goal_bottom:
-                if self.ball.last_touched_by == "blue":
-                    # Own goal by blue team
-                    print("Own Goal: Point for Red Team")
-                    self.red_score += 1
-                    self.reset_positions()
-                    self.freeze_team("blue")
-                    self.unfreeze_team("red")
-                    return [True, "Blue: Own Goal"]
-                else:
-                    # Goal by red team
-                    print("Goal for Red Team")
-                    self.red_score += 1
-                    self.reset_positions()
-                    self.freeze_team("red")
-                    self.unfreeze_team("blue")
-                    return [True, "Red: Goal"]
-
-        # Check for goal on right side (red team's goal)
-        elif self.ball.x + self.ball.radius >= self.width - 20:
-            if goal_top <= self.ball.y <= goal_bottom:
-                if self.ball.last_touched_by == "red":
-                    # Own goal by red team
-                    print("Own Goal: Point for Blue Team")
-                    self.blue_score += 1
-                    self.reset_positions()
-                    self.freeze_team("red")
-                    self.unfreeze_team("blue")
-                    return [True, "Red: Own Goal"]
-                else:
-                    # Goal by blue team
-                    print("Goal for Blue Team!")
-                    self.blue_score += 1
-                    self.reset_positions()
-                    self.freeze_team("blue")
-                    self.unfreeze_team("red")
-                    return [True, "Blue: Goal"]
-        return [False, ""]  # No goal scored
-
-    def reset_positions(self):
+        code = physics.check_goals(self.states, self.width, self.height)[0]
+        if code == physics.NO_GOAL:
+            return [False, ""]  # No goal scored
+
+        print(GOAL_ANNOUNCEMENTS[code])
+        self.start_celebration()
+        return [True, physics.GOAL_MESSAGES[code]]
+
+    def reset_positions(self, celebrate=False):
         """
         Reset ball and player positions after a goal is scored.
-        """
-        # Bring ball to the center
-        self.ball.reset_position(self.width // 2, self.height // 2)
-        self.kickoff_started = False
 
-        # Return players to initial positions
-        for player in self.players:
-            player.x, player.y = player.initial_position
+        Parameters:
+            celebrate (bool): Whether to start a goal celebration pause
+        """
+        # Bring ball to the center and players to their initial positions
+        physics.reset_positions(self.states, self.width, self.height)
 
         # Pause briefly to show goal
-        pygame.time.delay(2000)
+        if celebrate:
+            self.start_celebration()
+
+    def start_celebration(self):
+        """
+        Start the goal celebration, counted in simulated frames rather than
+        wall-clock time. Does nothing when celebrations are disabled.
+        """
+        if self.celebrate_goals:
+            self.celebration_frames = int(self.celebration_duration * self.fps)
 
     def draw_scores(self):
         """
         Draw the current scores on the screen.
         """
-        font = pygame.font.Font(None, 36)
-        red_score_text = font.render(f"Red Team: {self.red_score}", True, (255, 0, 0))
-        blue_score_text = font.render(
-            f"Blue Team: {self.blue_score}", True, (0, 0, 255)
+        red_score_text = self._render_text(
+            "red_score", f"Red Team: {self.red_score}", (255, 0, 0)
+        )
+        blue_score_text = self._render_text(
+            "blue_score", f"Blue Team: {self.blue_score}", (0, 0, 255)
         )
 
         # Position of scores
@@ -300,10 +467,15 @@ class SoccerField:
             if player.team == team:
                 player.frozen = True
 
-    def _draw_goal_net(self):
+    def _draw_goal_net(self, surface=None):
         """
         Draw net patterns inside the goals for visuals.
+
+        Parameters:
+            surface: Pygame surface to draw on (default: the screen)
         """
+        if surface is None:
+            surface = self.screen
         goal_top = (self.height - 100) // 2
         goal_depth = 40
         net_spacing = 5
@@ -313,22 +485,22 @@ class SoccerField:
         for x in range(0, goal_depth, net_spacing):
             for y in range(goal_top, goal_top + 100, net_spacing):
                 pygame.draw.line(
-                    self.screen, net_color, (20 - x, y), (20 - x, y + net_spacing), 1
+                    surface, net_color, (20 - x, y), (20 - x, y + net_spacing), 1
                 )
-                pygame.draw.line(self.screen, net_color, (20 - x, y), (20, y), 1)
+                pygame.draw.line(surface, net_color, (20 - x, y), (20, y), 1)
 
         # Draw right goal net
         for x in range(0, goal_depth, net_spacing):
             for y in range(goal_top, goal_top + 100, net_spacing):
                 pygame.draw.line(
-                    self.screen,
+                    surface,
                     net_color,
                     (self.width - 20 + x, y),
                     (self.width - 20 + x, y + net_spacing),
                     1,
                 )
                 pygame.draw.line(
-                    self.screen,
+                    surface,
                     net_color,
                     (self.width - 20 + x, y),
                     (self.width - 20, y),
@@ -340,15 +512,13 @@ class SoccerField:
         Draw the game timer showing remaining time.
         """
         # Calculate remaining time
-        elapsed_time = (pygame.time.get_ticks() - self.start_time) / 1000
-        remaining_time = max(0, int(self.game_duration - elapsed_time))
+        remaining_time = max(0, int(self.remaining_time()))
         minutes = int(remaining_time // 60)
         seconds = int(remaining_time % 60)
         timer_text = f"{minutes:02}:{seconds:02}"
 
         # show timer
-        font = pygame.font.Font(None, 36)
-        timer_render = font.render(timer_text, True, self.WHITE)
+        timer_render = self._render_text("timer", timer_text, self.WHITE)
         timer_rect = timer_render.get_rect(center=(self.width // 2, 20))
         self.screen.blit(timer_render, timer_rect)
 
@@ -356,7 +526,7 @@ class SoccerField:
         """
         Show game over screen with final result.
         """
-        font = pygame.font.Font(None, 48)
+        font = self._font(48)
 
         # Determine winner
         if self.red_score > self.blue_score:
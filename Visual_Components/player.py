@@ -1,7 +1,21 @@
 import math
+
+import numpy as np
 import pygame
+
+from simulation import physics
+
+
 class Player:
-    def __init__(self, x, y, color, team):
+    """
+    A view of one player in a physics state array.
+
+    Position, facing angle and frozen flag live in the shared state row so the
+    physics core can step them; this class reads them for drawing and forwards
+    single-player updates to the physics functions.
+    """
+
+    def __init__(self, x, y, color, team, state=None, index=0):
         """
         Initialize a new player with position, appearance, and movement properties.
         
@@ -10,16 +24,56 @@ class Player:
             y (float): Initial y-coordinate on the field
             color (tuple): RGB color tuple for the player
             team (str): Identifier for the player's team
+            state (np.ndarray): Physics state row holding this player
+                (default: a private row)
+            index (int): Index of this player in the state row
         """
+        self._state = physics.new_states(1)[0] if state is None else state
+        self.index = index
         self.x = x
         self.y = y
         self.color = color
         self.team = team
         self.angle = 0  # Direction the player is facing in degrees
-        self.radius = 20  # Size of the player
-        self.speed = 7  # Movement speed multiplier
+        self.radius = physics.PLAYER_RADIUS  # Size of the player
+        self.speed = physics.PLAYER_SPEED  # Movement speed multiplier
         self.initial_position = (x, y)  # Store starting position for resets
         self.frozen = False  # Flag to prevent movement when True
+
+    def _column(self, field):
+        return physics.player_column(self.index, field)
+
+    @property
+    def x(self):
+        return float(self._state[self._column(physics.P_X)])
+
+    @x.setter
+    def x(self, value):
+        self._state[self._column(physics.P_X)] = value
+
+    @property
+    def y(self):
+        return float(self._state[self._column(physics.P_Y)])
+
+    @y.setter
+    def y(self, value):
+        self._state[self._column(physics.P_Y)] = value
+
+    @property
+    def angle(self):
+        return float(self._state[self._column(physics.P_ANGLE)])
+
+    @angle.setter
+    def angle(self, value):
+        self._state[self._column(physics.P_ANGLE)] = value
+
+    @property
+    def frozen(self):
+        return bool(self._state[self._column(physics.P_FROZEN)])
+
+    @frozen.setter
+    def frozen(self, value):
+        self._state[self._column(physics.P_FROZEN)] = value
     
     def draw(self, screen):
         """
@@ -43,7 +97,7 @@ class Player:
             screen, (255, 255, 255), (int(indicator_x), int(indicator_y)), 3
         )
     
-    def move(self, dx, dy, field_width, field_height, players):
+    def move(self, dx, dy, field_width, field_height, players=None):
         """
         Move the player  while handling collision detection.
         
@@ -52,42 +106,17 @@ class Player:
             dy (float): Vertical movement direction (-1, 0, or 1)
             field_width (int): Width of the playing field for boundary checking
             field_height (int): Height of the playing field for boundary checking
-            players (list): List of all players for collision detection
+            players (list): Unused; collisions are checked against every
+                player in the shared state row
         """
-        # Don't move if player is frozen
-        if self.frozen:
-            return
-            
-        # Calculate new position based on direction and speed
-        new_x = self.x + dx * self.speed
-        new_y = self.y + dy * self.speed
-        
-        # Check for field boundary collisions with a 10-pixel buffer on sides
-        # This prevents the player from getting stuck against field edges
-        if (
-            new_x - self.radius < 10
-            or new_x + self.radius > field_width - 10
-            or new_y - self.radius < 0
-            or new_y + self.radius > field_height
-        ):
-            return
-            
-        # Check for collisions with other players
-        for player in players:
-            if player != self:
-                distance = math.sqrt((new_x - player.x) ** 2 + (new_y - player.y) ** 2)
-                if distance < self.radius * 2:
-                    return  # Cancel movement if collision would occur
-        
-        # Apply the movement if no collisions detected
-        self.x = new_x
-        self.y = new_y
-        
-        # Update player's facing direction based on movement direction
-        if dx != 0 or dy != 0:
-            self.angle = math.degrees(math.atan2(-dy, dx)) % 360
+        physics.move_player(
+            self._state[None],
+            self.index,
+            np.array([[dx, dy]], dtype=np.float32),
+            field_width,
+            field_height,
+        )
 
-    
     def prevent_overlap(self, other_player):
         """
         Resolve collision by pushing both players apart when overlap is detected.
@@ -96,25 +125,6 @@ class Player:
         remain stuck together.
         
         Parameters:
-            other_player: Another Player object that is overlapping with this one
+            other_player: Another Player object in the same state row
         """
-        
-        # Calculate distance between players
-        distance = math.sqrt(
-            (self.x - other_player.x) ** 2 + (self.y - other_player.y) ** 2
-        )
-        
-        # If players are overlapping
-        if distance < self.radius + other_player.radius:
-            # Calculate how much they overlap
-            overlap = self.radius + other_player.radius - distance
-            
-            # Calculate normalized direction vec betwween players
-            dx = (self.x - other_player.x) / distance
-            dy = (self.y - other_player.y) / distance
-            
-            # Push both players apart equally along the direction vec
-            self.x += dx * overlap / 2
-            self.y += dy * overlap / 2
-            other_player.x -= dx * overlap / 2
-            other_player.y -= dy * overlap / 2
\ No newline at end of file
+        physics.separate_pair(self._state[None], self.index, other_player.index)
@@ -0,0 +1,395 @@
+"""
+benchmarks/run.py
+
+Step throughput benchmarks for the soccer environment. Every benchmark reports
+steps per second (or calls per second for the pieces of a step) and the
+results are written to a JSON file, so that two commits can be compared:
+
+    python -m benchmarks.run --output before.json
+    (change things)
+    python -m benchmarks.run --output after.json --compare before.json
+
+With --compare the exit status is 1 when any benchmark got slower than the
+tolerance allows.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+from stable_baselines3 import PPO
+from stable_baselines3.common.monitor import Monitor
+from stable_baselines3.common.vec_env import VecNormalize
+
+import rewards.heuristic
+from main import RewardTracker, SoccerFieldEnv, make_vec_env
+from rewards.vectorized import RewardEngine
+from simulation import physics, raster
+
+# Benchmarks by name, in the order they run
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """
+    Decorator registering a benchmark.
+
+    The decorated function receives the parsed arguments and returns a list of
+    (suffix, step, items) tuples: ``step`` is called repeatedly and each call
+    counts as ``items`` steps. The suffix is appended to the benchmark name
+    to tell variants apart.
+    """
+
+    def decorator(function):
+        BENCHMARKS[name] = function
+        return function
+
+    return decorator
+
+
+def measure(step, duration, items=1, warmup=0.2):
+    """
+    Call ``step`` repeatedly for about ``duration`` seconds.
+
+    Args:
+        step (callable): Function without arguments to time.
+        duration (float): Seconds to measure for, after the warmup.
+        items (int): Steps done by one call.
+        warmup (float): Seconds to run before measuring.
+
+    Returns:
+        dict: steps_per_sec, us_per_call and the number of calls measured.
+    """
+    end = time.perf_counter() + warmup
+    while time.perf_counter() < end:
+        step()
+
+    calls = 0
+    start = time.perf_counter()
+    end = start + duration
+    now = start
+    while now < end:
+        for _ in range(10):
+            step()
+        calls += 10
+        now = time.perf_counter()
+    elapsed = now - start
+    return {
+        "steps_per_sec": calls * items / elapsed,
+        "us_per_call": 1e6 * elapsed / calls,
+        "calls": calls,
+    }
+
+
+def _random_actions(rng, shape, count=4096):
+    """
+    Pre-sample actions so the benchmarks do not time the action sampling.
+    """
+    actions = rng.integers(0, 5, (count, *shape))
+    index = [0]
+
+    def next_action():
+        index[0] = (index[0] + 1) % count
+        return actions[index[0]]
+
+    return next_action
+
+
+def _stepper(env, rng):
+    """
+    Step a gymnasium env with random actions, resetting finished episodes.
+    """
+    next_action = _random_actions(rng, (4,))
+
+    def step():
+        _, _, terminated, truncated, _ = env.step(next_action())
+        if terminated or truncated:
+            env.reset()
+
+    return step
+
+
+@benchmark("env.step")
+def bench_env_step(args):
+    """
+    Raw SoccerFieldEnv.step, headless.
+    """
+    env = SoccerFieldEnv(render_mode=None)
+    env.reset(seed=args.seed)
+    return [("", _stepper(env, np.random.default_rng(args.seed)), 1)]
+
+
+@benchmark("env.step.wrapped")
+def bench_wrapped_env_step(args):
+    """
+    SoccerFieldEnv.step under the Monitor and RewardTracker wrappers.
+    """
+    env = RewardTracker(Monitor(SoccerFieldEnv(render_mode=None)))
+    env.reset(seed=args.seed)
+    return [("", _stepper(env, np.random.default_rng(args.seed)), 1)]
+
+
+@benchmark("field.check_player_ball_overlaps")
+def bench_overlaps(args):
+    """
+    SoccerField.check_player_ball_overlaps alone.
+    """
+    env = SoccerFieldEnv(render_mode=None)
+    env.reset(seed=args.seed)
+    return [("", env.soccer_field.check_player_ball_overlaps, 1)]
+
+
+@benchmark("reward")
+def bench_reward(args):
+    """
+    The heuristic reward against the vectorized engine at several batch sizes;
+    the engine is credited one step per match.
+    """
+    env = SoccerFieldEnv(render_mode=None)
+    env.reset(seed=args.seed)
+    step = _stepper(env, np.random.default_rng(args.seed))
+    for _ in range(100):
+        step()
+
+    variants = [("heuristic", lambda: rewards.heuristic.reward_function(env), 1)]
+    for n in args.num_envs:
+        states = np.repeat(env.soccer_field.states, n, axis=0)
+        goals = np.zeros(n, dtype=np.int8)
+        engine = RewardEngine(n, env.width, env.height)
+        variants.append(
+            (f"engine.n{n}", lambda e=engine, s=states, g=goals: e(s, g), n)
+        )
+    return variants
+
+
+@benchmark("physics.step")
+def bench_physics(args):
+    """
+    Array physics only (moves, collisions, goals) at several batch sizes.
+    """
+    variants = []
+    width, height = 600, 400
+    for n in args.num_envs:
+        states = physics.new_states(n, width, height)
+        rng = np.random.default_rng(args.seed)
+        physics.reset_matches(states, rng, width, height)
+        next_action = _random_actions(np.random.default_rng(args.seed), (n, 4))
+
+        def step(states=states, next_action=next_action, rng=rng):
+            physics.take_actions(states, next_action(), width, height)
+            physics.update(states, width, height, rng)
+            physics.check_goals(states, width, height)
+
+        variants.append((f"n{n}", step, n))
+    return variants
+
+
+@benchmark("raster.observe")
+def bench_raster(args):
+    """
+    Pixel observations alone: draw, push onto the frame stack and copy the
+    stacks out, at several batch sizes.
+    """
+    variants = []
+    width, height = 600, 400
+    for n in args.num_envs:
+        states = physics.new_states(n, width, height)
+        physics.reset_matches(states, np.random.default_rng(args.seed), width, height)
+        observer = raster.PixelObserver(n, width, height)
+        observer.reset(states)
+
+        def step(states=states, observer=observer):
+            observer.push(states)
+            observer.observe()
+
+        variants.append((f"n{n}", step, n))
+    return variants
+
+
+@benchmark("vec_env.step")
+def bench_vec_env(args):
+    """
+    VecNormalize-wrapped vectorized environments, one step per match.
+    """
+    variants = []
+    for backend in args.backends:
+        for n in args.num_envs:
+            env = VecNormalize(make_vec_env(backend, n, seed=args.seed))
+            env.reset()
+            next_action = _random_actions(np.random.default_rng(args.seed), (n, 4))
+            variants.append(
+                (
+                    f"{backend}.n{n}",
+                    lambda env=env, next_action=next_action: env.step(next_action()),
+                    n,
+                )
+            )
+    return variants
+
+
+@benchmark("ppo.predict")
+def bench_predict(args):
+    """
+    PPO predict with the training network, one step per observation.
+    """
+    env = VecNormalize(make_vec_env("dummy", 1, seed=args.seed))
+    model = PPO(
+        "MlpPolicy",
+        env,
+        seed=args.seed,
+        policy_kwargs=dict(net_arch=dict(pi=[64, 64], vf=[128, 128, 64])),
+    )
+    rng = np.random.default_rng(args.seed)
+    variants = []
+    for n in args.num_envs:
+        observations = rng.standard_normal((n, 15)).astype(np.float32)
+        variants.append(
+            (
+                f"n{n}",
+                lambda o=observations: model.predict(o, deterministic=True),
+                n,
+            )
+        )
+    return variants
+
+
+def _git_commit():
+    """
+    Current git commit of the repository, or None outside a git checkout.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    """
+    Run the selected benchmarks.
+
+    Args:
+        args (argparse.Namespace): Parsed arguments.
+
+    Returns:
+        dict: JSON-serializable report with metadata and results.
+    """
+    results = {}
+    for name, function in BENCHMARKS.items():
+        if args.only and not any(name.startswith(prefix) for prefix in args.only):
+            continue
+        for suffix, step, items in function(args):
+            full_name = f"{name}.{suffix}" if suffix else name
+            result = measure(step, args.duration, items)
+            results[full_name] = result
+            print(f"{full_name:45s} {result['steps_per_sec']:12.1f} steps/s")
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "duration": args.duration,
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline, tolerance):
+    """
+    Print the speedup of every benchmark over a baseline report.
+
+    Args:
+        report (dict): Report of this run.
+        baseline (dict): Earlier report.
+        tolerance (float): Allowed relative slowdown, e.g. 0.1 for 10%.
+
+    Returns:
+        list[str]: Names of the benchmarks that regressed.
+    """
+    regressions = []
+    print(f"\nCompared with {baseline['meta'].get('commit')}:")
+    for name, result in report["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        ratio = result["steps_per_sec"] / old["steps_per_sec"]
+        flag = ""
+        if ratio < 1 - tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:45s} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def parse_args(argv=None):
+    """
+    Parse the benchmark command line.
+
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Soccer environment benchmarks.")
+    parser.add_argument(
+        "--output", default="benchmark_results.json", help="JSON file to write."
+    )
+    parser.add_argument(
+        "--compare", default=None, help="Earlier JSON report to compare against."
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="Relative slowdown reported as a regression by --compare.",
+    )
+    parser.add_argument(
+        "--duration", type=float, default=2.0, help="Seconds measured per benchmark."
+    )
+    parser.add_argument(
+        "--num-envs",
+        type=int,
+        nargs="+",
+        default=[1, 8, 64],
+        help="Batch sizes for the vectorized benchmarks.",
+    )
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        choices=["dummy", "subproc", "batched"],
+        default=["dummy", "batched"],
+        help="Vectorized environment backends to benchmark.",
+    )
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        default=None,
+        help="Run only the benchmarks whose name starts with one of these.",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = run(args)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.tolerance):
+            sys.exit(1)
@@ -0,0 +1,205 @@
+"""
+evaluation.py
+
+Background evaluation of the policy during training.
+
+AsyncEvaluator owns a separate process holding its own pool of evaluation
+environments. Training hands it a snapshot of the policy weights and of the
+VecNormalize observation statistics and carries on; the process plays the
+evaluation episodes and the results are picked up at a later rollout.
+"""
+import atexit
+import multiprocessing as mp
+import time
+
+import numpy as np
+
+
+def _eval_worker(remote, env_fn, n_eval_episodes, normalize_kwargs):
+    """
+    Evaluation process: build the environments, then evaluate every policy
+    snapshot received until the None sentinel or a closed pipe.
+
+    Args:
+        remote (Connection): Pipe end to the training process.
+        env_fn (CloudpickleWrapper): Wrapped function returning a VecEnv.
+        n_eval_episodes (int): Episodes played per evaluation.
+        normalize_kwargs (dict): VecNormalize arguments matching the training
+            env, or None when training does not normalize observations.
+    """
+    # The snapshots are torch policies: only this process needs torch
+    import torch as th
+    from stable_baselines3.common.evaluation import evaluate_policy
+    from stable_baselines3.common.vec_env import VecNormalize
+
+    # The pool shares the box with training, keep torch to one core
+    th.set_num_threads(1)
+    env = env_fn.var()
+    if normalize_kwargs is not None:
+        env = VecNormalize(env, training=False, norm_reward=False, **normalize_kwargs)
+
+    policy = None
+    try:
+        while True:
+            message = remote.recv()
+            if message is None:
+                break
+            timesteps, policy_class, policy_data, state_dict, obs_rms = message
+            if policy is None:
+                policy = policy_class(**policy_data)
+                policy.set_training_mode(False)
+            policy.load_state_dict(state_dict)
+            if obs_rms is not None:
+                env.obs_rms = obs_rms
+
+            start = time.perf_counter()
+            rewards, lengths = evaluate_policy(
+                policy,
+                env,
+                n_eval_episodes=n_eval_episodes,
+                deterministic=True,
+                return_episode_rewards=True,
+            )
+            std = float(np.std(rewards))
+            remote.send(
+                {
+                    "eval_timesteps": timesteps,
+                    "eval_mean_reward": float(np.mean(rewards)),
+                    "eval_std_reward": std,
+                    "eval_ci95_reward": 1.96 * std / np.sqrt(len(rewards)),
+                    "eval_mean_length": float(np.mean(lengths)),
+                    "eval_episodes": len(rewards),
+                    "eval_seconds": time.perf_counter() - start,
+                }
+            )
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        env.close()
+
+
+class AsyncEvaluator:
+    """
+    Evaluates policy snapshots in a background process.
+
+    The process is started on the first submit. At most one evaluation is
+    in flight: ``busy`` tells whether the last one is still running, and
+    ``poll`` returns the finished results without waiting.
+    """
+
+    def __init__(
+        self, env_fn, n_eval_episodes=20, normalize_kwargs=None, start_method=None
+    ):
+        """
+        Args:
+            env_fn (callable): Picklable function returning the evaluation
+                VecEnv, e.g. a functools.partial of main.make_vec_env. A pool
+                of several environments plays the episodes in parallel.
+            n_eval_episodes (int): Episodes played per evaluation.
+            normalize_kwargs (dict): VecNormalize arguments of the training
+                env (norm_obs, norm_obs_keys); None when it is not normalized.
+            start_method (str): multiprocessing start method; forkserver when
+                available, like SubprocVecEnv.
+        """
+        self.env_fn = env_fn
+        self.n_eval_episodes = n_eval_episodes
+        self.normalize_kwargs = normalize_kwargs
+        if start_method is None:
+            available = mp.get_all_start_methods()
+            start_method = "forkserver" if "forkserver" in available else "spawn"
+        self.start_method = start_method
+        self.process = None
+        self.remote = None
+        self.pending = 0
+
+    @property
+    def busy(self):
+        """
+        Whether an evaluation is still running.
+        """
+        return self.pending > 0
+
+    def start(self):
+        """
+        Start the evaluation process.
+        """
+        from stable_baselines3.common.vec_env.base_vec_env import CloudpickleWrapper
+
+        ctx = mp.get_context(self.start_method)
+        self.remote, work_remote = ctx.Pipe()
+        # Not a daemon, so that the pool may use SubprocVecEnv; close() is
+        # registered to run at exit instead
+        self.process = ctx.Process(
+            target=_eval_worker,
+            args=(
+                work_remote,
+                CloudpickleWrapper(self.env_fn),
+                self.n_eval_episodes,
+                self.normalize_kwargs,
+            ),
+        )
+        self.process.start()
+        work_remote.close()
+        atexit.register(self.close)
+
+    def submit(self, timesteps, policy, obs_rms=None):
+        """
+        Send a snapshot of a policy to evaluate and return immediately.
+
+        Args:
+            timesteps (int): Training timesteps of the snapshot, reported back
+                as ``eval_timesteps``.
+            policy (BasePolicy): Policy whose weights are evaluated.
+            obs_rms (RunningMeanStd or dict): Observation statistics of the
+                training VecNormalize.
+        """
+        if self.process is None:
+            self.start()
+        state_dict = {
+            name: tensor.detach().cpu()
+            for name, tensor in policy.state_dict().items()
+        }
+        self.remote.send(
+            (
+                timesteps,
+                type(policy),
+                policy._get_constructor_parameters(),
+                state_dict,
+                obs_rms,
+            )
+        )
+        self.pending += 1
+
+    def poll(self, timeout=0.0):
+        """
+        Collect the results of finished evaluations.
+
+        Args:
+            timeout (float): Seconds to wait for a running evaluation; None
+                waits until it is done.
+
+        Returns:
+            list[dict]: One dict of ``eval_*`` statistics per evaluation.
+        """
+        results = []
+        while self.pending and self.remote.poll(timeout):
+            results.append(self.remote.recv())
+            self.pending -= 1
+        return results
+
+    def close(self):
+        """
+        Stop the evaluation process; a running evaluation is abandoned.
+        """
+        if self.process is None:
+            return
+        try:
+            self.remote.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=10)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.remote.close()
+        self.process = None
+        self.pending = 0
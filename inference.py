@@ -0,0 +1,425 @@
+"""
+inference.py
+
+Batched policy inference shared by many environments.
+
+The server loads a trained model and its VecNormalize statistics once and
+listens on a Unix socket. Clients (evaluation workers, self-play opponents,
+replay tools, in any process) send raw observations; requests arriving
+together are gathered into one micro-batch, waiting at most ``max_latency``
+after the first one or until ``max_batch`` observations are in, normalized,
+run through the policy in a single forward pass and answered with actions.
+
+    python inference.py --model soccer_agent_ppo.zip --vecnormalize vec_normalize.pkl
+    python replay.py --server /tmp/soccer_policy.sock
+
+InferenceClient.predict has the signature of the Stable-Baselines3
+``predict``, so a client can stand in for the model, e.g. in
+``evaluate_policy``.
+"""
+import argparse
+import atexit
+import multiprocessing as mp
+import os
+import pickle
+import stat
+import tempfile
+import threading
+import time
+from multiprocessing.connection import Client, Listener, wait
+
+import numpy as np
+
+MODEL_PATH = "soccer_agent_ppo.zip"
+VECNORMALIZE_PATH = "vec_normalize.pkl"
+DEFAULT_ADDRESS = os.path.join(tempfile.gettempdir(), "soccer_policy.sock")
+
+# Training schedules are not needed to act, and older pickled ones may not
+# load with the installed cloudpickle
+INFERENCE_ONLY = {
+    "learning_rate": 0.0,
+    "lr_schedule": lambda _: 0.0,
+    "clip_range": lambda _: 0.0,
+}
+
+
+def load_policy(path):
+    """
+    Load the policy of a saved PPO model for inference on the CPU.
+
+    Args:
+        path (str or io.BytesIO): The model zip.
+
+    Returns:
+        BasePolicy: The policy, in evaluation mode.
+    """
+    # Imported here: clients, normalizers and NumPy exports do without torch
+    from stable_baselines3 import PPO
+
+    policy = PPO.load(path, device="cpu", custom_objects=INFERENCE_ONLY).policy
+    policy.set_training_mode(False)
+    return policy
+
+
+class ObservationNormalizer:
+    """
+    The observation normalization of a saved VecNormalize, without an env.
+    """
+
+    def __init__(self, obs_rms, clip_obs=10.0, epsilon=1e-8):
+        """
+        Args:
+            obs_rms (RunningMeanStd): Observation statistics.
+            clip_obs (float): Clipping of the normalized values.
+            epsilon (float): Added to the variance.
+        """
+        self.mean = obs_rms.mean
+        self.std = np.sqrt(obs_rms.var + epsilon)
+        self.clip_obs = clip_obs
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read the statistics of a file written by VecNormalize.save.
+
+        Args:
+            path (str or file object): The pickle file.
+
+        Returns:
+            ObservationNormalizer: The normalizer.
+        """
+        if hasattr(path, "read"):
+            stats = pickle.load(path)
+        else:
+            with open(path, "rb") as f:
+                stats = pickle.load(f)
+        return cls(stats.obs_rms, stats.clip_obs, stats.epsilon)
+
+    def __call__(self, observations):
+        """
+        Args:
+            observations (np.ndarray): (N, D) raw observations.
+
+        Returns:
+            np.ndarray: (N, D) float32 normalized observations.
+        """
+        normalized = (observations - self.mean) / self.std
+        return np.clip(normalized, -self.clip_obs, self.clip_obs).astype(np.float32)
+
+
+def is_server(address):
+    """
+    Whether an address is the socket of a running server.
+    """
+    return os.path.exists(address) and stat.S_ISSOCK(os.stat(address).st_mode)
+
+
+def _parse_request(message, shape):
+    """
+    Observations and deterministic flag of a client request.
+
+    Args:
+        message: What the client sent.
+        shape (tuple): Shape of one observation of the policy.
+
+    Returns:
+        tuple: ((N, *shape) float32 observations, deterministic).
+
+    Raises:
+        ValueError: When the request is not a non-empty batch of observations
+            of the policy and a flag.
+    """
+    try:
+        observations, deterministic = message
+        observations = np.asarray(observations, dtype=np.float32)
+    except (TypeError, ValueError):
+        raise ValueError("Expected a request (observations, deterministic)") from None
+    if observations.shape[1:] != shape or not len(observations):
+        raise ValueError(
+            f"Expected observations of shape (N, {', '.join(map(str, shape))}), "
+            f"got {observations.shape}"
+        )
+    return observations, bool(deterministic)
+
+
+def serve(
+    address=DEFAULT_ADDRESS,
+    model_path=MODEL_PATH,
+    vecnormalize_path=VECNORMALIZE_PATH,
+    max_batch=1024,
+    max_latency=0.002,
+    ready=None,
+):
+    """
+    Run the server until the process is stopped.
+
+    Every client sends (observations, deterministic) and waits for its
+    actions, so a connection has at most one request in flight. Requests are
+    collected until ``max_batch`` observations are in or ``max_latency``
+    seconds after the first one, then answered from one forward pass per
+    value of ``deterministic``. A malformed request is answered with a
+    ValueError and left out of the batch.
+
+    Args:
+        address (str): Path of the Unix socket.
+        model_path (str): The PPO model zip.
+        vecnormalize_path (str): VecNormalize statistics of the model; None
+            when it was trained on raw observations.
+        max_batch (int): Observations per forward pass.
+        max_latency (float): Seconds a request waits for others to join it.
+        ready (Connection): Pipe end told once the socket is listening.
+    """
+    import torch as th
+
+    th.set_num_threads(1)
+    policy = load_policy(model_path)
+    shape = policy.observation_space.shape
+    normalize = None
+    if vecnormalize_path is not None:
+        normalize = ObservationNormalizer.load(vecnormalize_path)
+
+    if os.path.exists(address):
+        os.remove(address)
+    listener = Listener(address, family="AF_UNIX")
+    connections = []
+
+    def accept():
+        while True:
+            connections.append(listener.accept())
+
+    threading.Thread(target=accept, daemon=True).start()
+    if ready is not None:
+        ready.send(address)
+        ready.close()
+
+    while True:
+        # Poll again now and then, to pick up new connections
+        pending = wait(list(connections), timeout=0.05)
+        requests = []
+        size = 0
+        deadline = None
+        while pending:
+            for connection in pending:
+                try:
+                    message = connection.recv()
+                except (EOFError, OSError):
+                    connections.remove(connection)
+                    continue
+                try:
+                    observations, deterministic = _parse_request(message, shape)
+                except ValueError as error:
+                    # Only the sender gets the error, the batch goes on
+                    try:
+                        connection.send(error)
+                    except (BrokenPipeError, OSError):
+                        connections.remove(connection)
+                    continue
+                requests.append((connection, observations, deterministic))
+                size += len(observations)
+            if deadline is None:
+                deadline = time.perf_counter() + max_latency
+            remaining = deadline - time.perf_counter()
+            if size >= max_batch or remaining <= 0:
+                break
+            # Clients already in the batch wait for their answer
+            waiting = [c for c in connections if all(c is not r[0] for r in requests)]
+            if not waiting:
+                break
+            pending = wait(waiting, timeout=remaining)
+        if not requests:
+            continue
+
+        for deterministic in (True, False):
+            batch = [r for r in requests if r[2] == deterministic]
+            if not batch:
+                continue
+            observations = np.concatenate([r[1] for r in batch])
+            if normalize is not None:
+                observations = normalize(observations)
+            actions, _ = policy.predict(observations, deterministic=deterministic)
+            start = 0
+            for connection, request, _ in batch:
+                try:
+                    connection.send(actions[start : start + len(request)])
+                except (BrokenPipeError, OSError):
+                    connections.remove(connection)
+                start += len(request)
+
+
+class InferenceServer:
+    """
+    An inference server in a background process of this program.
+    """
+
+    def __init__(
+        self,
+        model_path=MODEL_PATH,
+        vecnormalize_path=VECNORMALIZE_PATH,
+        address=None,
+        max_batch=1024,
+        max_latency=0.002,
+        start_method=None,
+    ):
+        """
+        Args:
+            model_path (str): The PPO model zip.
+            vecnormalize_path (str): VecNormalize statistics of the model;
+                None when it was trained on raw observations.
+            address (str): Socket path; a fresh one in the temporary
+                directory by default.
+            max_batch (int): Observations per forward pass.
+            max_latency (float): Seconds a request waits for others.
+            start_method (str): multiprocessing start method; forkserver when
+                available, like SubprocVecEnv.
+        """
+        if address is None:
+            address = os.path.join(
+                tempfile.mkdtemp(prefix="soccer_policy_"), "policy.sock"
+            )
+        self.address = address
+        if start_method is None:
+            available = mp.get_all_start_methods()
+            start_method = "forkserver" if "forkserver" in available else "spawn"
+        ctx = mp.get_context(start_method)
+        remote, work_remote = ctx.Pipe()
+        self.process = ctx.Process(
+            target=serve,
+            args=(
+                address,
+                model_path,
+                vecnormalize_path,
+                max_batch,
+                max_latency,
+                work_remote,
+            ),
+            daemon=True,
+        )
+        self.process.start()
+        work_remote.close()
+        atexit.register(self.close)
+        # Wait for the model to load
+        remote.recv()
+        remote.close()
+
+    def client(self):
+        """
+        Returns:
+            InferenceClient: A client of this server.
+        """
+        return InferenceClient(self.address)
+
+    def close(self):
+        """
+        Stop the server process and remove its socket.
+        """
+        if self.process is None:
+            return
+        self.process.terminate()
+        self.process.join()
+        self.process = None
+        if os.path.exists(self.address):
+            os.remove(self.address)
+
+
+class InferenceClient:
+    """
+    Connection to an inference server, opened on first use.
+
+    A client can be pickled and sent to other processes; each copy opens its
+    own connection.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS):
+        """
+        Args:
+            address (str): Socket path of the server.
+        """
+        self.address = address
+        self._connection = None
+
+    def __getstate__(self):
+        return {"address": self.address, "_connection": None}
+
+    def predict(
+        self, observation, state=None, episode_start=None, deterministic=False
+    ):
+        """
+        Actions for raw (not normalized) observations, in the signature of
+        the Stable-Baselines3 ``predict``.
+
+        Args:
+            observation (np.ndarray): One observation or a (N, D) batch.
+            state: Unused; the served policies are not recurrent.
+            episode_start: Unused.
+            deterministic (bool): Take the most likely actions.
+
+        Returns:
+            tuple: (actions, None), batched like the observation.
+
+        Raises:
+            ValueError: When the server rejects the observations, e.g. for
+                their shape.
+        """
+        if self._connection is None:
+            self._connection = Client(self.address, family="AF_UNIX")
+        observation = np.asarray(observation, dtype=np.float32)
+        single = observation.ndim == 1
+        self._connection.send((np.atleast_2d(observation), bool(deterministic)))
+        actions = self._connection.recv()
+        if isinstance(actions, Exception):
+            raise actions
+        return (actions[0] if single else actions), None
+
+    def close(self):
+        """
+        Close the connection.
+        """
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def parse_args():
+    """
+    Parse the server command line.
+
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description="Serve a trained policy to local clients in micro-batches."
+    )
+    parser.add_argument("--model", default=MODEL_PATH, help="PPO model zip.")
+    parser.add_argument(
+        "--vecnormalize",
+        default=VECNORMALIZE_PATH,
+        help="VecNormalize statistics of the model ('none' for raw observations).",
+    )
+    parser.add_argument("--address", default=DEFAULT_ADDRESS, help="Socket path.")
+    parser.add_argument(
+        "--max-batch", type=int, default=1024, help="Observations per forward pass."
+    )
+    parser.add_argument(
+        "--max-latency-ms",
+        type=float,
+        default=2.0,
+        help="Milliseconds a request waits for others to share its batch.",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    vecnormalize_path = None if args.vecnormalize == "none" else args.vecnormalize
+    print(f"Serving {args.model} on {args.address}")
+    try:
+        serve(
+            args.address,
+            args.model,
+            vecnormalize_path,
+            args.max_batch,
+            args.max_latency_ms / 1000,
+        )
+    except KeyboardInterrupt:
+        if os.path.exists(args.address):
+            os.remove(args.address)
@@ -2,30 +2,64 @@
 main.py
 
 This script trains a PPO agent to play a custom 2v2 soccer game using Gymnasium and Stable-Baselines3.
-It features a custom environment, a reward tracker, a logging callback, and evaluation logic.
+It builds the training setup (vectorized environments, reward tracking, logging and
+evaluation) around the SoccerFieldEnv of soccer_env.py.
 """
 
+import argparse
+import functools
+import json
 import os
+import time
 
-import gymnasium as gym
 import numpy as np
-import pandas as pd
-import pygame
 from gymnasium import Wrapper
 from gymnasium import spaces
 from stable_baselines3 import PPO
 from stable_baselines3.common.callbacks import CheckpointCallback, BaseCallback
 from stable_baselines3.common.evaluation import evaluate_policy
 from stable_baselines3.common.monitor import Monitor
-from stable_baselines3.common.vec_env import DummyVecEnv, VecNormalize
-
-import rewards.heuristic
-from Visual_Components.field import SoccerField
-from utils import set_seed
+from stable_baselines3.common.vec_env import (
+    DummyVecEnv,
+    SubprocVecEnv,
+    VecEnv,
+    VecEnvWrapper,
+    VecNormalize,
+)
+
+from evaluation import AsyncEvaluator
+from rewards.registry import load_reward_config
+from rewards.vectorized import RewardEngine
+from selfplay import SelfPlayVecEnv
+from simulation import physics, raster
+from soccer_env import (
+    OBS_TYPES,
+    SNAPSHOT_HISTORY,
+    SNAPSHOT_SIZE,
+    SoccerFieldEnv,
+    check_frame_skip,
+    check_obs_type,
+    make_observation_space,
+)
+from utils import EpisodeStats, MetricsLog, set_seed
 
 SEED = 42
 set_seed(SEED)
 
+# PPO hyperparameters found by the Optuna search (see tune.py); a config file
+# passed with --config overrides them
+PPO_CONFIG = {
+    "learning_rate": 9.374410314646429e-05,
+    "n_steps": 3296,
+    "gamma": 0.99,
+    "gae_lambda": 0.98,
+    "ent_coef": 0.010549674409905044,
+    "clip_range": 0.3941564070073835,
+    "batch_size": 3296,
+    "vf_coef": 0.3,
+}
+POLICY_KWARGS = dict(net_arch=[dict(pi=[64, 64], vf=[128, 128, 64])])
+
 
 class RewardTracker(Wrapper):
     """
@@ -33,9 +67,12 @@ class RewardTracker(Wrapper):
 
     Attributes:
         episode_reward (float): Accumulated reward for the current episode.
-        episode_rewards (list): List of total rewards from completed episodes.
-        episode_lengths (list): Length of each completed episode.
+        episode_length (int): Steps taken in the current episode.
+        episodes (EpisodeStats): Constant-memory statistics of the completed
+            episodes.
         step_count (int): Total steps taken across all episodes.
+        reward_terms (RewardTermTracker): Running totals of the reward
+            components reported in ``info["reward_terms"]``.
     """
 
     def __init__(self, env):
@@ -47,9 +84,10 @@ class RewardTracker(Wrapper):
         """
         super().__init__(env)
         self.episode_reward = 0
-        self.episode_rewards = []
-        self.episode_lengths = []
+        self.episode_length = 0
+        self.episodes = EpisodeStats()
         self.step_count = 0
+        self.reward_terms = RewardTermTracker()
 
     def reset(self, **kwargs):
         """
@@ -60,6 +98,7 @@ class RewardTracker(Wrapper):
             info (dict): Additional reset info.
         """
         self.episode_reward = 0
+        self.episode_length = 0
         observation, info = self.env.reset(**kwargs)
         return observation, info
 
@@ -75,17 +114,19 @@ class RewardTracker(Wrapper):
         """
         observation, reward, terminated, truncated, info = self.env.step(action)
         self.episode_reward += reward
+        self.episode_length += 1
         self.step_count += 1
+        self.reward_terms.add([info])
 
         if terminated or truncated:
-            self.episode_rewards.append(self.episode_reward)
-            self.episode_lengths.append(self.step_count - sum(self.episode_lengths))
+            self.episodes.add(self.episode_reward, self.episode_length)
             info["episode"] = {
                 "r": self.episode_reward,
-                "l": self.episode_lengths[-1],
-                "episode_num": len(self.episode_rewards),
+                "l": self.episode_length,
+                "episode_num": self.episodes.count,
             }
             self.episode_reward = 0
+            self.episode_length = 0
 
         return observation, reward, terminated, truncated, info
 
@@ -96,26 +137,117 @@ class RewardTracker(Wrapper):
         Returns:
             dict: Dictionary containing reward and episode statistics.
         """
-        stats = {
-            "episode_count": len(self.episode_rewards),
-            "total_steps": self.step_count,
-            "mean_reward": np.mean(self.episode_rewards) if self.episode_rewards else 0,
-            "median_reward": (
-                np.median(self.episode_rewards) if self.episode_rewards else 0
-            ),
-            "min_reward": np.min(self.episode_rewards) if self.episode_rewards else 0,
-            "max_reward": np.max(self.episode_rewards) if self.episode_rewards else 0,
-            "std_reward": np.std(self.episode_rewards) if self.episode_rewards else 0,
-            "mean_episode_length": (
-                np.mean(self.episode_lengths) if self.episode_lengths else 0
-            ),
-        }
+        return self.episodes.summary(self.step_count)
+
+
+class VecRewardTracker(VecEnvWrapper):
+    """
+    A VecEnv wrapper that tracks reward statistics across all workers of a
+    vectorized environment (DummyVecEnv, SubprocVecEnv or BatchedSoccerVecEnv).
+
+    Place it below VecNormalize so it records raw rewards.
+
+    Attributes:
+        episode_reward (np.ndarray): Accumulated reward of each worker's current episode.
+        episode_length (np.ndarray): Steps in each worker's current episode.
+        episodes (EpisodeStats): Constant-memory statistics of the completed
+            episodes of all workers.
+        step_count (int): Total steps taken across all workers.
+        reward_terms (RewardTermTracker): Running totals of the reward
+            components reported in ``info["reward_terms"]``.
+    """
+
+    def __init__(self, venv):
+        """
+        Initialize the VecRewardTracker wrapper.
+
+        Args:
+            venv (VecEnv): The vectorized environment to wrap.
+        """
+        super().__init__(venv)
+        self.episode_reward = np.zeros(self.num_envs)
+        self.episode_length = np.zeros(self.num_envs, dtype=np.int64)
+        self.episodes = EpisodeStats()
+        self.step_count = 0
+        self.reward_terms = RewardTermTracker()
+
+    def reset(self):
+        """
+        Reset all workers and their running episode totals.
+
+        Returns:
+            np.ndarray: Initial observations.
+        """
+        self.episode_reward[:] = 0
+        self.episode_length[:] = 0
+        return self.venv.reset()
+
+    def step_wait(self):
+        """
+        Step all workers and record every episode that finished.
+
+        Returns:
+            tuple: (observations, rewards, dones, infos)
+        """
+        observations, rewards, dones, infos = self.venv.step_wait()
+        self.episode_reward += rewards
+        self.episode_length += 1
+        self.step_count += self.num_envs
+        self.reward_terms.add(infos)
+
+        for i in np.flatnonzero(dones):
+            self.episodes.add(
+                float(self.episode_reward[i]), int(self.episode_length[i])
+            )
+            self.episode_reward[i] = 0
+            self.episode_length[i] = 0
+
+        return observations, rewards, dones, infos
+
+    def get_stats(self):
+        """
+        Compute and return reward statistics aggregated over all workers.
+
+        Returns:
+            dict: Dictionary containing reward and episode statistics.
+        """
+        return self.episodes.summary(self.step_count)
+
+
+class RewardTermTracker:
+    """
+    Running per-step means of the reward components found in
+    ``info["reward_terms"]``, reported and restarted on every read.
+    """
+
+    def __init__(self):
+        self.totals = {}
+        self.steps = 0
+
+    def add(self, infos):
+        """
+        Add the reward terms of one step.
+
+        Args:
+            infos (list[dict]): Step infos, one per environment.
+        """
+        totals = self.totals
+        for info in infos:
+            for name, value in info.get("reward_terms", {}).items():
+                totals[name] = totals.get(name, 0.0) + value
+        self.steps += len(infos)
 
-        if len(self.episode_rewards) >= 100:
-            stats["last_100_mean_reward"] = np.mean(self.episode_rewards[-100:])
-            stats["last_100_median_reward"] = np.median(self.episode_rewards[-100:])
+    def pop_means(self):
+        """
+        Mean value of every reward component per step since the last call.
 
-        return stats
+        Returns:
+            dict: Component name to mean weighted value.
+        """
+        means = {name: total / self.steps for name, total in self.totals.items()}
+        self.totals = {}
+        self.steps = 0
+        return means
 
 
 class RewardLoggingCallback(BaseCallback):
@@ -123,11 +255,16 @@ class RewardLoggingCallback(BaseCallback):
     A Stable-Baselines3 callback to log reward statistics and evaluate the model periodically.
 
     Attributes:
-        reward_tracker (RewardTracker): The reward tracker used for stat collection.
-        eval_env (VecEnv): Evaluation environment.
+        reward_tracker (RewardTracker or VecRewardTracker): The reward tracker
+            used for stat collection.
+        eval_env (VecEnv): Evaluation environment, evaluated in-line.
+        evaluator (AsyncEvaluator): Background evaluator used instead of
+            eval_env when given.
         log_dir (str): Directory to save CSV logs.
         eval_freq (int): Frequency in timesteps to evaluate the model.
-        stats_history (list): Logged statistics history.
+        log_profile (bool): Whether step phase timings are logged.
+        metrics (MetricsLog): Append-only log of the statistics of every
+            rollout, ``reward_stats.csv`` in log_dir.
     """
 
     def __init__(
@@ -137,25 +274,41 @@ class RewardLoggingCallback(BaseCallback):
         log_dir="./reward_logs/",
         eval_freq=50000,
         verbose=0,
+        log_profile=False,
+        evaluator=None,
+        n_eval_episodes=5,
     ):
         """
         Initialize the RewardLoggingCallback.
 
         Args:
-            reward_tracker (RewardTracker): Tracker for training rewards.
+            reward_tracker (RewardTracker or VecRewardTracker): Tracker for
+                training rewards; a VecRewardTracker covers all workers.
             eval_env (VecEnv): Environment used for periodic evaluation.
             log_dir (str): Path to save CSV logs.
             eval_freq (int): Timesteps between evaluations.
             verbose (int): Verbosity level.
+            log_profile (bool): Log the step phase timings of the first
+                training environment (created with profile=True) every
+                rollout.
+            evaluator (AsyncEvaluator): Evaluate in a background process
+                instead of on eval_env. A snapshot of the policy is sent
+                every eval_freq timesteps (or at the first rollout after the
+                previous evaluation finished) and the results are logged
+                with the rollout they arrive at, tagged ``eval_timesteps``.
+            n_eval_episodes (int): Episodes per in-line evaluation on eval_env.
         """
         super(RewardLoggingCallback, self).__init__(verbose)
         self.reward_tracker = reward_tracker
         self.eval_env = eval_env
+        self.evaluator = evaluator
+        self.n_eval_episodes = n_eval_episodes
         self.log_dir = log_dir
         self.eval_freq = eval_freq
-        self.stats_history = []
+        self.log_profile = log_profile
         self._last_eval_step = 0
         os.makedirs(log_dir, exist_ok=True)
+        self.metrics = MetricsLog(os.path.join(log_dir, "reward_stats.csv"))
 
     def _on_step(self):
         """
@@ -189,25 +342,51 @@ class RewardLoggingCallback(BaseCallback):
             if value is not None:
                 stats[key] = value
 
-        if (
-            self.eval_env is not None
-            and (self.num_timesteps - self._last_eval_step) >= self.eval_freq
-        ):
+        # What each reward component contributed, and what it cost to compute
+        for name, value in self.reward_tracker.reward_terms.pop_means().items():
+            stats[f"reward_terms/{name}"] = value
+        costs = self.training_env.env_method("get_reward_costs", indices=0)[0]
+        for name, value in costs.items():
+            stats[f"reward_cost_us/{name}"] = value
+
+        # Where the step time went during this rollout
+        if self.log_profile:
+            profile = self.training_env.env_method("get_profile", True, indices=0)[0]
+            for phase, timing in profile.items():
+                stats[f"profile_mean_us/{phase}"] = timing["mean_us"]
+                stats[f"profile_p99_us/{phase}"] = timing["p99_us"]
+
+        eval_due = (self.num_timesteps - self._last_eval_step) >= self.eval_freq
+        if self.evaluator is not None:
+            for result in self.evaluator.poll():
+                stats.update(result)
+                self._on_evaluation(
+                    result["eval_timesteps"], result["eval_mean_reward"]
+                )
+            if eval_due and not self.evaluator.busy:
+                # Without norm_obs (pixel observations) there are no
+                # observation statistics to send
+                vec_normalize = self.model.get_vec_normalize_env()
+                obs_rms = None
+                if vec_normalize is not None and vec_normalize.norm_obs:
+                    obs_rms = vec_normalize.obs_rms
+                self.evaluator.submit(self.num_timesteps, self.model.policy, obs_rms)
+                self._last_eval_step = self.num_timesteps
+        elif self.eval_env is not None and eval_due:
             eval_mean, eval_std = self._evaluate_model()
             stats["eval_mean_reward"] = eval_mean
             stats["eval_std_reward"] = eval_std
             self._last_eval_step = self.num_timesteps
-        self.stats_history.append(stats)
+            self._on_evaluation(self.num_timesteps, eval_mean)
 
-        if len(self.stats_history) % 10 == 0:
-            self._save_stats()
+        # Buffered rows reach the CSV every 10 rollouts
+        self.metrics.write(stats)
 
     def _save_stats(self):
         """
-        Save reward and training stats to CSV.
+        Write the buffered reward and training stats to the CSV.
         """
-        df = pd.DataFrame(self.stats_history)
-        df.to_csv(os.path.join(self.log_dir, "reward_stats.csv"), index=False)
+        self.metrics.flush()
 
     def _evaluate_model(self):
         """
@@ -222,394 +401,711 @@ class RewardLoggingCallback(BaseCallback):
         mean_reward, std_reward = evaluate_policy(
             self.model,
             self.eval_env,
-            n_eval_episodes=5,
+            n_eval_episodes=self.n_eval_episodes,
             render=False,
             deterministic=True,
         )
         return mean_reward, std_reward
 
+    def _on_evaluation(self, timesteps, mean_reward):
+        """
+        Called with every evaluation result; does nothing here, subclasses
+        use it to react to evaluations (see tune.py).
+
+        Args:
+            timesteps (int): Training timesteps of the evaluated policy.
+            mean_reward (float): Mean evaluation episode reward.
+        """
+
     def on_training_end(self):
         """
-        Called when training is completed to persist stats.
+        Called when training is completed to persist stats, after waiting for
+        a background evaluation still running.
         """
+        if self.evaluator is not None:
+            for result in self.evaluator.poll(timeout=None):
+                self.metrics.write({"timesteps": self.num_timesteps, **result})
+                self._on_evaluation(
+                    result["eval_timesteps"], result["eval_mean_reward"]
+                )
+            self.evaluator.close()
         self._save_stats()
 
 
-class SoccerFieldEnv(gym.Env):
-    """
-    A custom Gym environment simulating a 2v2 soccer game using Pygame.
+# SB3 policy matching each observation type
+POLICY_TYPES = {
+    "vector": "MlpPolicy",
+    "pixels": "CnnPolicy",
+    "both": "MultiInputPolicy",
+}
 
-    The environment features multi-agent control, ball dynamics, goal scoring,
-    and support for both human and RGB rendering.
-    """
 
-    metadata = {"render_modes": ["human", "rgb_array"], "render_fps": 60}
+class BatchedSoccerVecEnv(VecEnv):
+    """
+    A native vectorized environment that simulates N soccer matches at once.
+
+    All matches live in one simulation.physics state array of shape
+    (N, STATE_SIZE) and are advanced together with vectorized NumPy
+    operations: player moves, collisions, ball friction, wall bounces, goals
+    and auto-reset. It is a drop-in replacement for a DummyVecEnv of
+    Monitor-wrapped SoccerFieldEnv instances, including the ``episode``,
+    ``terminal_observation`` and ``terminal_state`` infos, and can be wrapped
+    in VecNormalize.
+
+    Attributes and methods queried through get_attr/env_method belong to
+    the batch as a whole and are reported once per requested index.
+    """
 
-    def __init__(self, game_duration=30, render_mode=None):
+    def __init__(
+        self,
+        num_envs,
+        game_duration=30,
+        fps=60,
+        width=600,
+        height=400,
+        reward_config=None,
+        obs_type="vector",
+        pixel_size=raster.PIXEL_SIZE,
+        frame_stack=raster.FRAME_STACK,
+        frame_skip=1,
+        fast_skip=False,
+    ):
         """
-        Initialize the soccer environment.
+        Initialize the batched environment.
 
         Args:
+            num_envs (int): Number of matches simulated in parallel.
             game_duration (int): Length of a game in seconds.
-            render_mode (str): Either 'human' for display or 'rgb_array' for image frames.
+            fps (int): Simulated frames per second.
+            width (int): Field width in pixels.
+            height (int): Field height in pixels.
+            reward_config (dict or str): Weights of the reward components, or
+                the path of a JSON file holding them (default: the heuristic).
+            obs_type (str): 'vector', 'pixels' or 'both', see
+                make_observation_space.
+            pixel_size (tuple): (width, height) of the pixel observations.
+            frame_stack (int): Number of frames in a pixel observation.
+            frame_skip (int): Physics ticks each action is repeated for, see
+                SoccerFieldEnv.
+            fast_skip (bool): Compute the reward on the last tick of the step
+                only.
         """
-        super(SoccerFieldEnv, self).__init__()
-
-        self.scoring_team = None
-        self.soccer_field = SoccerField(game_duration=game_duration)
-        self.width = self.soccer_field.width
-        self.height = self.soccer_field.height
+        check_obs_type(obs_type)
+        check_frame_skip(frame_skip)
+        self.render_mode = None
+        self.frame_skip = frame_skip
+        self.fast_skip = fast_skip
+        self.width = width
+        self.height = height
         self.game_duration = game_duration
-        self.players = self.soccer_field.players
-        self.ball = self.soccer_field.ball
-        self.screen = self.soccer_field.screen
-        self.clock = self.soccer_field.clock
-
-        self.action_space = spaces.MultiDiscrete([5, 5, 5, 5])
-
-        low = np.array(
-            [
-                0,  # Player 1 blue X
-                0,  # Player 1 blue Y
-                0,  # Player 2 blue X
-                0,  # Player 2 blue Y
-                0,  # Player 3 red X
-                0,  # Player 3 red Y
-                0,  # Player 4 red X
-                0,  # Player 4 red Y
-                0,  # Ball X
-                0,  # Ball Y
-                -6,  # Ball X Velocity
-                -6,  # Ball Y Velocity
-                0,  # Red Score
-                0,  # Blue Score
-                0,  # Remaining Time
-            ],
-            dtype=np.float32,
-        )
-
-        high = np.array(
-            [
-                self.width,  # Player 1 blue X
-                self.height,  # Player 1 blue Y
-                self.width,  # Player 2 blue X
-                self.height,  # Player 2 blue Y
-                self.width,  # Player 3 red X
-                self.height,  # Player 3 red Y
-                self.width,  # Player 4 red X
-                self.height,  # Player 4 red Y
-                self.width,  # Ball X
-                self.height,  # Ball Y
-                6,  # Ball X Velocity
-                6,  # Ball Y Velocity
-                10,  # Red Score
-                10,  # Blue Score
-                self.game_duration,  # Remaining Time
-            ],
-            dtype=np.float32,
+        self.fps = fps
+        self.obs_type = obs_type
+        super().__init__(
+            num_envs,
+            make_observation_space(
+                width, height, game_duration, obs_type, pixel_size, frame_stack
+            ),
+            spaces.MultiDiscrete([5, 5, 5, 5]),
         )
+        self.pixels = None
+        if obs_type != "vector":
+            self.pixels = raster.PixelObserver(
+                num_envs, width, height, pixel_size, frame_stack
+            )
 
-        self.observation_space = spaces.Box(low=low, high=high, dtype=np.float32)
-
-        pygame.init()
-        self.render_mode = render_mode
-        self.screen = None
-        if self.render_mode == "human":
-            pygame.display.init()
-            pygame.display.set_caption("SoccerFieldEnv")
-            self.screen = pygame.display.set_mode((self.width, self.height))
-        elif self.render_mode == "rgb_array":
-            pygame.display.init()
-            self.screen = pygame.Surface((self.width, self.height))
+        self.states = physics.new_states(num_envs, width, height)
+        self.reward_engine = RewardEngine(num_envs, width, height, reward_config)
+        self.np_random = np.random.default_rng()
+        self.episode_returns = np.zeros(num_envs)
+        self.episode_lengths = np.zeros(num_envs, dtype=np.int64)
+        self._actions = None
+        self._t_start = time.time()
 
-        self.reset()
+    def reset(self):
+        """
+        Start new matches in every environment.
 
-    def reset(self, seed=None, options=None):
+        Returns:
+            np.ndarray or dict: Initial observations, (N, 15) for 'vector'.
         """
-        Reset the game environment for a new episode.
+        if self._seeds[0] is not None:
+            self.np_random = np.random.default_rng(self._seeds)
+        self._reset_seeds()
+        self._reset_options()
+
+        physics.reset_matches(self.states, self.np_random, self.width, self.height)
+        self.episode_returns[:] = 0
+        self.episode_lengths[:] = 0
+        if self.pixels is not None:
+            self.pixels.reset(self.states)
+        return self._observe()
+
+    def _observe(self, rows=None):
+        """
+        Observations of some matches, in the format of the observation space.
 
         Args:
-            seed (int): Optional seed for randomization.
-            options (dict): Optional reset parameters.
+            rows (np.ndarray): Indices of the matches; None for all of them.
 
         Returns:
-            tuple: (observation, info)
+            np.ndarray or dict: Batched observations.
         """
-        super().reset(seed=seed)
-
-        self.soccer_field.reset_positions()
-
-        # Randomize player positions
-        for player in self.players:
-            if player.team == "blue":
-                x_min, x_max = 50, self.width // 2 - 50
-            else:
-                x_min, x_max = self.width // 2 + 50, self.width - 50
-
-            y_min, y_max = 50, self.height - 50
+        observations = {}
+        if self.obs_type != "pixels":
+            states = self.states if rows is None else self.states[rows]
+            observations["vector"] = physics.observe(
+                states, self.game_duration, self.fps
+            )
+        if self.obs_type != "vector":
+            observations["pixels"] = self.pixels.observe(rows)
+        if self.obs_type == "both":
+            return observations
+        return observations[self.obs_type]
 
-            player.x = self.np_random.uniform(x_min, x_max)
-            player.y = self.np_random.uniform(y_min, y_max)
+    def step_async(self, actions):
+        """
+        Store the actions to apply on the next step_wait.
 
-        self.ball = self.soccer_field.ball
-        self.players = self.soccer_field.players
+        Args:
+            actions (np.ndarray): (N, 4) player actions.
+        """
+        self._actions = actions
 
-        self.soccer_field.red_score = 0
-        self.soccer_field.blue_score = 0
-        self.soccer_field.kickoff_started = False
+    def step_wait(self):
+        """
+        Advance every match by ``frame_skip`` frames and reset the finished
+        ones.
 
-        self.soccer_field.start_time = pygame.time.get_ticks()
-        observation = self._get_observation()
-        info = {}
-        if self.render_mode == "human":
-            self._render_frame()
-        return observation, info
+        The whole batch is simulated on every tick. A match that ends before
+        the last tick is put back in its final state (and reward history)
+        afterwards, so it ends exactly as with SoccerFieldEnv.
 
-    def _get_observation(self):
+        Returns:
+            tuple: (observations, rewards, dones, infos)
         """
-        Collect environment observations.
+        states = self.states
+        engine = self.reward_engine
+        rewards = np.zeros(self.num_envs)
+        terms = np.zeros_like(engine.terms)
+        terminated = truncated = False
+        active = True
+        finished = []
+        for tick in range(self.frame_skip):
+            physics.take_actions(states, self._actions, self.width, self.height)
+            physics.update(states, self.width, self.height, self.np_random)
+            states[:, physics.FRAME] += 1
+            goals = physics.check_goals(states, self.width, self.height)
+
+            scored = goals != physics.NO_GOAL
+            time_up = physics.elapsed_time(states, self.fps) > self.game_duration
+            ending = (scored | time_up) & active
+            last = tick == self.frame_skip - 1
+
+            # Reward of the matches still playing, or with fast_skip only of
+            # those ending on this tick
+            early = self.fast_skip and not last
+            counted = ending if early else active
+            if np.count_nonzero(counted):
+                if early:
+                    # The other matches take their reward on the last tick,
+                    # from the reward history they had before it
+                    history = engine.get_state()
+                rewards += self._calculate_rewards(goals) * counted
+                terms += engine.terms * np.reshape(counted, (-1, 1))
+                if early:
+                    kept = np.flatnonzero(~ending)
+                    engine.set_state(history[kept], kept)
+            terminated = terminated | (scored & ending)
+            truncated = truncated | (time_up & ending)
+            if last:
+                break
+
+            if np.count_nonzero(ending):
+                rows = np.flatnonzero(ending)
+                finished.append(
+                    (rows, states[rows].copy(), engine.prev_positions[rows].copy())
+                )
+                active = active & ~ending
+                if not np.count_nonzero(active):
+                    break
+
+        for rows, final_states, prev_positions in finished:
+            states[rows] = final_states
+            engine.prev_positions[rows] = prev_positions
+        dones = terminated | truncated
+        if self.pixels is not None:
+            self.pixels.push(states)
+        observations = self._observe()
+
+        self.episode_returns += rewards
+        self.episode_lengths += 1
+        # Like DummyVecEnv, every info says whether the time limit cut the
+        # episode short
+        time_limits = (truncated & ~terminated).tolist()
+        infos = [
+            {"reward_terms": match_terms, "TimeLimit.truncated": time_limit}
+            for match_terms, time_limit in zip(
+                self.reward_engine.term_infos(terms), time_limits
+            )
+        ]
+        if dones.any():
+            done_rows = np.flatnonzero(dones)
+            elapsed = round(time.time() - self._t_start, 6)
+            for i in done_rows:
+                if self.obs_type == "both":
+                    infos[i]["terminal_observation"] = {
+                        key: value[i].copy() for key, value in observations.items()
+                    }
+                else:
+                    infos[i]["terminal_observation"] = observations[i].copy()
+                infos[i]["terminal_state"] = states[i].copy()
+                infos[i]["episode"] = {
+                    "r": round(float(self.episode_returns[i]), 6),
+                    "l": int(self.episode_lengths[i]),
+                    "t": elapsed,
+                }
+
+            physics.reset_matches(
+                states, self.np_random, self.width, self.height, dones
+            )
+            if self.pixels is not None:
+                self.pixels.reset(states, done_rows)
+            if self.obs_type == "both":
+                for key, value in self._observe(done_rows).items():
+                    observations[key][done_rows] = value
+            else:
+                observations[done_rows] = self._observe(done_rows)
+            self.episode_returns[done_rows] = 0
+            self.episode_lengths[done_rows] = 0
 
-        Returns:
-            np.ndarray: The current state observation.
-        """
-        player_blue_1 = self.players[0]
-        player_blue_2 = self.players[1]
-        player_red_1 = self.players[2]
-        player_red_2 = self.players[3]
-        remaining_time = (
-            self.soccer_field.game_duration
-            - (pygame.time.get_ticks() - self.soccer_field.start_time) / 1000
-        )
-        observation = np.array(
-            [
-                player_blue_1.x,
-                player_blue_1.y,
-                player_blue_2.x,
-                player_blue_2.y,
-                player_red_1.x,
-                player_red_1.y,
-                player_red_2.x,
-                player_red_2.y,
-                self.ball.x,
-                self.ball.y,
-                self.ball.velocity[0],
-                self.ball.velocity[1],
-                self.soccer_field.red_score,
-                self.soccer_field.blue_score,
-                remaining_time,
-            ],
-            dtype=np.float32,
-        )
-        return observation
+        return observations, rewards.astype(np.float32), dones, infos
 
-    def step(self, action):
+    def _calculate_rewards(self, goals):
         """
-        Perform a step in the environment.
+        Compute the reward of every match in one vectorized pass.
 
         Args:
-            action (list[int]): Actions for the 4 players.
+            goals (np.ndarray): (N,) goal codes of this step.
 
         Returns:
-            tuple: (observation, reward, terminated, truncated, info)
+            np.ndarray: (N,) rewards.
         """
-        (
-            action_agent_blue_1,
-            action_agent_blue_2,
-            action_agent_red_1,
-            action_agent_red_2,
-        ) = action
-
-        self._take_action(action_agent_blue_1, 0)
-        self._take_action(action_agent_blue_2, 1)
-        self._take_action(action_agent_red_1, 2)
-        self._take_action(action_agent_red_2, 3)
-
-        self._update_game_state()
-
-        reward = self._calculate_reward()
+        return self.reward_engine(self.states, goals)
 
-        terminated = self._is_done()
-        truncated = self._is_truncated()
+    def get_reward_costs(self):
+        """
+        Average compute time of each reward component.
 
-        observation = self._get_observation()
+        Returns:
+            dict: Component name to microseconds per batched step.
+        """
+        return self.reward_engine.get_costs()
 
-        info = {}
-        if self.render_mode == "human":
-            self._render_frame()
+    def get_state(self, rows=None):
+        """
+        Snapshots of some matches, in the layout of SoccerFieldEnv.get_state.
+        Finished matches are reset within the step, so the goal code is
+        always NO_GOAL.
 
-        return observation, reward, terminated, truncated, info
+        Args:
+            rows (np.ndarray): Indices of the matches; None for all of them.
 
-    def _take_action(self, action, player_index):
+        Returns:
+            np.ndarray: (n, SNAPSHOT_SIZE) float64 snapshots.
+        """
+        states = self.states if rows is None else self.states[rows]
+        snapshots = np.empty((len(states), SNAPSHOT_SIZE))
+        snapshots[:, : physics.STATE_SIZE] = states
+        snapshots[:, SNAPSHOT_HISTORY] = self.reward_engine.get_state(rows)
+        snapshots[:, -1] = physics.NO_GOAL
+        return snapshots
+
+    def set_state(self, snapshots, rows=None):
         """
-        Apply a single player's action.
+        Restore snapshots into some matches, e.g. one SoccerFieldEnv snapshot
+        into every match to branch N rollouts from it. The restored matches
+        start new episodes for the episode statistics and the frame stacks.
 
         Args:
-            action (int): The action to perform.
-            player_index (int): Index of the player.
+            snapshots (np.ndarray): (n, SNAPSHOT_SIZE) snapshots, or one
+                snapshot for all the rows.
+            rows (np.ndarray): Indices of the matches; None for all of them.
+
+        Returns:
+            np.ndarray or dict: Observations of the restored matches.
         """
+        if rows is None:
+            rows = np.arange(self.num_envs)
+        snapshots = np.asarray(snapshots)
+        self.states[rows] = snapshots[..., : physics.STATE_SIZE]
+        self.reward_engine.set_state(snapshots[..., SNAPSHOT_HISTORY], rows)
+        self.episode_returns[rows] = 0
+        self.episode_lengths[rows] = 0
+        if self.pixels is not None:
+            self.pixels.reset(self.states, rows)
+        return self._observe(rows)
 
-        player = self.players[player_index]
-        if not player.frozen:
-            if not self.soccer_field.kickoff_started:
-                self.soccer_field.kickoff_started = True
-                if self.scoring_team is None:
-                    self.soccer_field.unfreeze_team("red")
-                    self.soccer_field.unfreeze_team("blue")
-                else:
-                    self.soccer_field.unfreeze_team(self.scoring_team)
-                self.scoring_team = None
+    def close(self):
+        """
+        Nothing to release: the batch holds no rendering resources.
+        """
 
-            if action == 0:  # forward
-                player.move(0, -1, self.width, self.height, self.players)
-            elif action == 1:  # backward
-                player.move(0, 1, self.width, self.height, self.players)
-            elif action == 2:  # left
-                player.move(-1, 0, self.width, self.height, self.players)
-            elif action == 3:  # right
-                player.move(1, 0, self.width, self.height, self.players)
+    def _indices(self, indices):
+        if indices is None:
+            return range(self.num_envs)
+        if isinstance(indices, int):
+            return [indices]
+        return indices
 
-    def _update_game_state(self):
+    def get_attr(self, attr_name, indices=None):
         """
-        Update the game state, like detect ball collisions.
+        Return an attribute of the batch, once per requested index.
         """
-        self.soccer_field.check_player_ball_overlaps()
+        value = getattr(self, attr_name)
+        return [value for _ in self._indices(indices)]
 
-    def _calculate_reward(self):
+    def set_attr(self, attr_name, value, indices=None):
         """
-        Compute the reward based on current environment state.
-
-        Returns:
-            float: Computed reward.
+        Set an attribute of the batch.
         """
-        return rewards.heuristic.reward_function(self)
-        # return rewards.checkpoint.reward_function(self)
+        setattr(self, attr_name, value)
 
-    def _is_done(self):
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
         """
-        Check whether the episode should terminate due to a goal.
-
-        Returns:
-            bool: Whether a terminal condition is met.
+        Call a method of the batch once and report its result per index.
         """
-        return self.soccer_field.check_goal()[0]
+        result = getattr(self, method_name)(*method_args, **method_kwargs)
+        return [result for _ in self._indices(indices)]
 
-    def _is_truncated(self):
+    def env_is_wrapped(self, wrapper_class, indices=None):
         """
-        Check whether the episode exceeded the time limit.
-
-        Returns:
-            bool: Whether the episode is truncated.
+        The matches are not gym environments, so they are never wrapped.
         """
-        elapsed_time = (pygame.time.get_ticks() - self.soccer_field.start_time) / 1000
-        return elapsed_time > self.game_duration
+        return [False for _ in self._indices(indices)]
 
-    def _render_frame(self):
-        """
-        Render the game frame based on the render mode.
 
-        Returns:
-            np.ndarray or None: Image frame if 'rgb_array', else None.
-        """
-        if self.screen is None:
-            pygame.init()
-            pygame.display.init()
-            self.screen = pygame.display.set_mode((self.width, self.height))
-
-        self.soccer_field.draw_field()
-        if self.render_mode == "human":
-            pygame.display.flip()
-            self.clock.tick(self.metadata["render_fps"])
-        elif self.render_mode == "rgb_array":
-            return np.transpose(
-                np.array(pygame.surfarray.pixels3d(self.screen)), axes=(1, 0, 2)
+
+def make_monitored_env(
+    rank=0,
+    seed=SEED,
+    reseed_globals=False,
+    reward_config=None,
+    profile=False,
+    obs_type="vector",
+    frame_skip=1,
+):
+    """
+    Create a monitored headless SoccerFieldEnv for one rollout worker.
+
+    Args:
+        rank (int): Index of the worker.
+        seed (int): Base seed; the worker uses seed + rank.
+        reseed_globals (bool): Reseed Python's and NumPy's global RNGs with the
+            worker seed, for workers running in their own process.
+        reward_config (dict or str): Reward component weights.
+        profile (bool): Time the phases of every step.
+        obs_type (str): 'vector', 'pixels' or 'both'.
+        frame_skip (int): Physics ticks per action.
+
+    Returns:
+        gym.Env: A monitored SoccerFieldEnv.
+    """
+    if reseed_globals:
+        set_seed(seed + rank)
+    return Monitor(
+        SoccerFieldEnv(
+            render_mode=None,
+            game_duration=30,
+            reward_config=reward_config,
+            profile=profile,
+            obs_type=obs_type,
+            frame_skip=frame_skip,
+        )
+    )
+
+
+def make_vec_env(
+    backend="dummy",
+    num_envs=1,
+    seed=SEED,
+    reward_config=None,
+    profile=False,
+    obs_type="vector",
+    frame_skip=1,
+    opponents=None,
+    opponent_vecnormalize=None,
+):
+    """
+    Build a vectorized training environment with deterministic per-worker
+    seeds (seed + worker index) applied on the first reset.
+
+    Args:
+        backend (str): 'dummy' (workers stepped in this process), 'subproc'
+            (one process per worker) or 'batched' (BatchedSoccerVecEnv).
+        num_envs (int): Number of parallel environments.
+        seed (int): Base seed.
+        reward_config (dict or str): Reward component weights.
+        profile (bool): Time the phases of every SoccerFieldEnv step; not
+            available with the batched backend.
+        obs_type (str): 'vector', 'pixels' or 'both'.
+        frame_skip (int): Physics ticks per action.
+        opponents (list[str]): Checkpoints playing the red team, see
+            selfplay.SelfPlayVecEnv; None lets the policy control all four
+            players.
+        opponent_vecnormalize (str): VecNormalize file of the opponents saved
+            without statistics of their own.
+
+    Returns:
+        VecEnv: The vectorized environment.
+    """
+    if backend == "batched":
+        if profile:
+            raise ValueError("Step profiling needs the dummy or subproc backend")
+        venv = BatchedSoccerVecEnv(
+            num_envs,
+            game_duration=30,
+            reward_config=reward_config,
+            obs_type=obs_type,
+            frame_skip=frame_skip,
+        )
+    else:
+        subproc = backend == "subproc"
+        env_fns = [
+            functools.partial(
+                make_monitored_env,
+                rank,
+                seed,
+                subproc,
+                reward_config,
+                profile,
+                obs_type,
+                frame_skip,
             )
+            for rank in range(num_envs)
+        ]
+        venv = SubprocVecEnv(env_fns) if subproc else DummyVecEnv(env_fns)
+    venv.seed(seed)
+    if opponents:
+        venv = SelfPlayVecEnv(
+            venv, opponents, seed=seed, vecnormalize=opponent_vecnormalize
+        )
+    return venv
 
-    def render(self):
-        """
-        Render the environment externally.
 
-        Returns:
-            np.ndarray or None: Rendered frame if applicable.
-        """
-        if self.render_mode == "rgb_array":
-            return self._render_frame()
+def scale_ppo_config(ppo_config, num_envs):
+    """
+    Adapt a PPO config tuned on a single environment to num_envs of them.
 
-    def close(self):
-        """
-        Close the environment and Pygame resources.
-        """
-        if self.screen is not None:
-            import pygame
+    ``n_steps`` counts steps per environment, so keeping it would grow the
+    rollout with num_envs: with PPO_CONFIG a 64-env run would make only ~4
+    updates in 1M steps. It is divided instead, so the rollout (and the
+    number of updates per step) stays that of the single-env run, and
+    ``batch_size`` keeps the number of minibatches per rollout.
+
+    Args:
+        ppo_config (dict): PPO keyword arguments with n_steps and batch_size.
+        num_envs (int): Number of parallel environments.
+
+    Returns:
+        dict: The scaled PPO keyword arguments.
+    """
+    minibatches = max(ppo_config["n_steps"] // ppo_config["batch_size"], 1)
+    n_steps = max(ppo_config["n_steps"] // num_envs, 1)
+    return {
+        **ppo_config,
+        "n_steps": n_steps,
+        "batch_size": max(n_steps * num_envs // minibatches, 2),
+    }
+
+
+def load_config(path=None):
+    """
+    Load a training config, such as the best config written by tune.py.
+
+    Args:
+        path (str): JSON file with optional "ppo" (PPO keyword arguments,
+            overriding PPO_CONFIG scaled by scale_ppo_config) and "reward"
+            (component weights) entries. Configs written by tune.py are
+            already sized for the number of environments they were tuned on.
+            None gives an empty config.
+
+    Returns:
+        dict: The config.
+    """
+    if path is None:
+        return {}
+    with open(path) as f:
+        return json.load(f)
 
-            pygame.display.quit()
-            pygame.quit()
 
+def parse_args():
+    """
+    Parse the training command line.
+
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Train a PPO agent on SoccerFieldEnv.")
+    parser.add_argument(
+        "--num-envs", type=int, default=1, help="Number of parallel environments."
+    )
+    parser.add_argument(
+        "--vec-backend",
+        choices=["dummy", "subproc", "batched"],
+        default="dummy",
+        help="How rollouts are collected from the parallel environments.",
+    )
+    parser.add_argument(
+        "--config",
+        default=None,
+        help="JSON training config, e.g. best_config.json from tune.py: PPO "
+        "hyperparameters and reward weights.",
+    )
+    parser.add_argument(
+        "--reward-config",
+        default=None,
+        help="JSON file mapping reward components to weights, taking "
+        "precedence over the weights of --config (default: every component "
+        "with weight 1, the heuristic reward).",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time every phase of the environment step and log the timings "
+        "next to the reward stats (dummy and subproc backends).",
+    )
+    parser.add_argument(
+        "--obs-type",
+        choices=OBS_TYPES,
+        default="vector",
+        help="Observations of the policy: the 15-D state vector (MlpPolicy), "
+        "stacked 84x84 rasterized frames (CnnPolicy) or both (MultiInputPolicy).",
+    )
+    parser.add_argument(
+        "--frame-skip",
+        type=int,
+        default=1,
+        help="Physics ticks each action is repeated for, in training and "
+        "evaluation; the rewards of the ticks are summed.",
+    )
+    parser.add_argument(
+        "--opponents",
+        nargs="+",
+        default=None,
+        help="Self-play: checkpoints (zips, archives of zips or directories, "
+        "e.g. model_checkpoints/) playing the red team, one drawn per episode, "
+        "while the policy controls blue only (vector observations).",
+    )
+    parser.add_argument(
+        "--opponent-vecnormalize",
+        default=None,
+        help="VecNormalize file of the opponents saved without statistics of "
+        "their own (checkpoints are paired with the "
+        "<prefix>_vecnormalize_<steps>_steps.pkl, other models with the "
+        "vec_normalize.pkl, saved next to them).",
+    )
+    parser.add_argument(
+        "--eval-envs",
+        type=int,
+        default=8,
+        help="Parallel environments of the background evaluation process.",
+    )
+    parser.add_argument(
+        "--eval-backend",
+        choices=["dummy", "subproc", "batched"],
+        default="batched",
+        help="How the evaluation process steps its environments.",
+    )
+    parser.add_argument(
+        "--eval-episodes",
+        type=int,
+        default=20,
+        help="Episodes played per evaluation.",
+    )
+    args = parser.parse_args()
+    if args.frame_skip < 1:
+        parser.error("--frame-skip must be at least 1")
+    if args.profile and args.vec_backend == "batched":
+        parser.error("--profile needs the dummy or subproc backend")
+    if args.opponents and args.obs_type != "vector":
+        parser.error("--opponents needs vector observations")
+    if args.opponent_vecnormalize and not args.opponents:
+        parser.error("--opponent-vecnormalize needs --opponents")
+    return args
 
 if __name__ == "__main__":
+    args = parse_args()
+
     # === Callbacks ===
+    # save_freq counts calls, one per step of all num_envs environments
     checkpoint_callback = CheckpointCallback(
-        save_freq=100000,
+        save_freq=max(100_000 // args.num_envs, 1),
         save_path="./model_checkpoints/",
         name_prefix="soccer_model",
         save_replay_buffer=True,
         save_vecnormalize=True,
     )
 
-    def make_train_env():
-        """
-        Factory function to create a training environment.
-
-        Returns:
-            gym.Env: A wrapped and monitored SoccerFieldEnv.
-        """
-        base_env = Monitor(SoccerFieldEnv(render_mode="rgb_array", game_duration=30))
-        return RewardTracker(base_env)
-
     # === Training and Evaluation Environments ===
-    env = DummyVecEnv([make_train_env])
-    env = VecNormalize(env, norm_obs=True, norm_reward=True, clip_reward=10.0)
-    env.seed(SEED)
-
-    def make_eval_env():
-        """
-        Factory function to create an evaluation environment.
-
-        Returns:
-            gym.Env: A monitored SoccerFieldEnv instance.
-        """
-        return Monitor(SoccerFieldEnv(render_mode="rgb_array", game_duration=30))
+    config = load_config(args.config)
+    reward_config = load_reward_config(args.reward_config or config.get("reward"))
+    reward_tracker = VecRewardTracker(
+        make_vec_env(
+            args.vec_backend,
+            args.num_envs,
+            reward_config=reward_config,
+            profile=args.profile,
+            obs_type=args.obs_type,
+            frame_skip=args.frame_skip,
+            opponents=args.opponents,
+            opponent_vecnormalize=args.opponent_vecnormalize,
+        )
+    )
 
-    eval_env = DummyVecEnv([make_eval_env])
-    eval_env = VecNormalize(eval_env, training=False, norm_obs=True, norm_reward=True)
+    # Frames are scaled by the CNN feature extractor, only the state vector
+    # is normalized
+    normalize_kwargs = dict(norm_obs=args.obs_type != "pixels")
+    if args.obs_type == "both":
+        normalize_kwargs["norm_obs_keys"] = ["vector"]
+    env = VecNormalize(
+        reward_tracker, norm_reward=True, clip_reward=10.0, **normalize_kwargs
+    )
 
-    eval_env.obs_rms = env.obs_rms
-    eval_env.ret_rms = env.ret_rms
+    # Evaluation runs in a background process on its own pool of envs
+    evaluator = AsyncEvaluator(
+        functools.partial(
+            make_vec_env,
+            args.eval_backend,
+            args.eval_envs,
+            SEED + args.num_envs,
+            reward_config,
+            False,
+            args.obs_type,
+            args.frame_skip,
+            args.opponents,
+            args.opponent_vecnormalize,
+        ),
+        n_eval_episodes=args.eval_episodes,
+        normalize_kwargs=normalize_kwargs,
+    )
 
     # === Logging Callback ===
     reward_logging_callback = RewardLoggingCallback(
-        reward_tracker=env.venv.envs[0],
-        eval_env=eval_env,
+        reward_tracker=reward_tracker,
         log_dir="./reward_logs/",
         eval_freq=50000,
+        log_profile=args.profile,
+        evaluator=evaluator,
     )
 
     # === Model Configuration ===
-    policy_kwargs = dict(net_arch=[dict(pi=[64, 64], vf=[128, 128, 64])])
-
     model = PPO(
-        "MlpPolicy",
+        POLICY_TYPES[args.obs_type],
         env,
         seed=SEED,
         verbose=1,
-        policy_kwargs=policy_kwargs,
-        learning_rate=9.374410314646429e-05,
-        n_steps=3296,
-        gamma=0.99,
-        gae_lambda=0.98,
-        ent_coef=0.010549674409905044,
-        clip_range=0.3941564070073835,
-        batch_size=3296,
-        vf_coef=0.3,
+        policy_kwargs=POLICY_KWARGS,
+        **{**scale_ppo_config(PPO_CONFIG, args.num_envs), **config.get("ppo", {})},
     )
 
     # === Training ===
@@ -0,0 +1,256 @@
+"""
+numpy_policy.py
+
+Export of a trained PPO actor to a single .npz file, and a NumPy runtime to
+act with it.
+
+The export holds the layers of the policy network and of the action head,
+and the observation statistics of the VecNormalize the model was trained
+under. NumpyPolicy replays the same float32 computation, so its
+deterministic actions are those of the SB3 model, but loading it takes
+milliseconds and never imports torch:
+
+    python numpy_policy.py soccer_agent_ppo.zip --vecnormalize vec_normalize.pkl
+    python replay.py --policy soccer_agent_ppo.npz
+
+Only MLP policies on the vector observations with a MultiDiscrete action
+space (the default setup of main.py) can be exported.
+"""
+import argparse
+
+import numpy as np
+
+ACTIVATIONS = {
+    "tanh": np.tanh,
+    "relu": lambda x: np.maximum(x, 0),
+}
+
+
+class NumpyPolicy:
+    """
+    Actor of an exported PPO model, acting on raw observations.
+    """
+
+    def __init__(
+        self,
+        weights,
+        biases,
+        nvec,
+        activation="tanh",
+        obs_mean=None,
+        obs_std=None,
+        clip_obs=10.0,
+        seed=None,
+    ):
+        """
+        Args:
+            weights (list[np.ndarray]): (inputs, outputs) weights of the hidden
+                layers, then of the action head.
+            biases (list[np.ndarray]): Matching biases.
+            nvec (np.ndarray): Choices of each MultiDiscrete action.
+            activation (str): Activation of the hidden layers, a key of
+                ACTIVATIONS.
+            obs_mean (np.ndarray): VecNormalize observation mean; None for a
+                policy trained on raw observations.
+            obs_std (np.ndarray): sqrt(var + epsilon) of the observations.
+            clip_obs (float): Clipping of the normalized observations.
+            seed (int): Seed of the sampled (non-deterministic) actions.
+        """
+        self.weights = [np.asarray(w, dtype=np.float32) for w in weights]
+        self.biases = [np.asarray(b, dtype=np.float32) for b in biases]
+        self.nvec = np.asarray(nvec)
+        self.activation = activation
+        self.obs_mean = obs_mean
+        self.obs_std = obs_std
+        self.clip_obs = clip_obs
+        self.rng = np.random.default_rng(seed)
+        self._activate = ACTIVATIONS[activation]
+        # Every action dimension padded to the same number of choices, so the
+        # logits reshape to (N, actions, choices)
+        self._choices = int(self.nvec.max())
+        self._uniform = bool((self.nvec == self._choices).all())
+
+    @classmethod
+    def load(cls, path, seed=None):
+        """
+        Load an export written by save.
+
+        Args:
+            path (str): The .npz file.
+            seed (int): Seed of the sampled actions.
+
+        Returns:
+            NumpyPolicy: The policy.
+        """
+        with np.load(path) as data:
+            layers = int(data["layers"])
+            normalized = "obs_mean" in data
+            return cls(
+                [data[f"weight_{i}"] for i in range(layers)],
+                [data[f"bias_{i}"] for i in range(layers)],
+                data["nvec"],
+                str(data["activation"]),
+                data["obs_mean"] if normalized else None,
+                data["obs_std"] if normalized else None,
+                float(data["clip_obs"]),
+                seed,
+            )
+
+    def save(self, path):
+        """
+        Write the policy to a single .npz file.
+
+        Args:
+            path (str): Output path.
+        """
+        arrays = {
+            "layers": len(self.weights),
+            "nvec": self.nvec,
+            "activation": self.activation,
+            "clip_obs": self.clip_obs,
+        }
+        for i, (weight, bias) in enumerate(zip(self.weights, self.biases)):
+            arrays[f"weight_{i}"] = weight
+            arrays[f"bias_{i}"] = bias
+        if self.obs_mean is not None:
+            arrays["obs_mean"] = self.obs_mean
+            arrays["obs_std"] = self.obs_std
+        np.savez(path, **arrays)
+
+    def logits(self, observations):
+        """
+        Action logits of a batch of raw observations.
+
+        Args:
+            observations (np.ndarray): (N, D) observations.
+
+        Returns:
+            np.ndarray: (N, sum(nvec)) float32 logits.
+        """
+        x = observations
+        if self.obs_mean is not None:
+            x = np.clip(
+                (x - self.obs_mean) / self.obs_std, -self.clip_obs, self.clip_obs
+            )
+        x = np.asarray(x, dtype=np.float32)
+        for weight, bias in zip(self.weights[:-1], self.biases[:-1]):
+            x = self._activate(x @ weight + bias)
+        return x @ self.weights[-1] + self.biases[-1]
+
+    def predict(
+        self, observation, state=None, episode_start=None, deterministic=False
+    ):
+        """
+        Actions for raw observations, in the signature of the
+        Stable-Baselines3 ``predict``.
+
+        Args:
+            observation (np.ndarray): One observation or a (N, D) batch.
+            state: Unused; the policy is not recurrent.
+            episode_start: Unused.
+            deterministic (bool): Take the most likely actions instead of
+                sampling them.
+
+        Returns:
+            tuple: (actions, None), batched like the observation.
+        """
+        observation = np.asarray(observation)
+        single = observation.ndim == 1
+        logits = self.logits(np.atleast_2d(observation))
+        if self._uniform:
+            logits = logits.reshape(len(logits), len(self.nvec), self._choices)
+        else:
+            padded = np.full(
+                (len(logits), len(self.nvec), self._choices), -np.inf, np.float32
+            )
+            for i, split in enumerate(np.split(logits, np.cumsum(self.nvec)[:-1], 1)):
+                padded[:, i, : self.nvec[i]] = split
+            logits = padded
+        if not deterministic:
+            # Gumbel-max: the argmax of logits plus Gumbel noise is a sample
+            # of the softmax distribution
+            logits = logits - np.log(-np.log(self.rng.random(logits.shape)))
+        actions = logits.argmax(axis=-1)
+        return (actions[0] if single else actions), None
+
+
+def export_policy(model_path, vecnormalize_path=None, output_path=None):
+    """
+    Export the actor of a PPO model (needs torch and Stable-Baselines3).
+
+    Args:
+        model_path (str): The PPO model zip.
+        vecnormalize_path (str): VecNormalize statistics of the model; None
+            when it was trained on raw observations.
+        output_path (str): The .npz to write; the model path with the .npz
+            extension by default.
+
+    Returns:
+        str: The path written.
+    """
+    from torch import nn
+
+    from inference import ObservationNormalizer, load_policy
+
+    policy = load_policy(model_path)
+    if len(policy.observation_space.shape) != 1 or not hasattr(
+        policy.action_space, "nvec"
+    ):
+        raise ValueError("Only MLP policies with MultiDiscrete actions export")
+
+    linears = [
+        module
+        for module in policy.mlp_extractor.policy_net
+        if isinstance(module, nn.Linear)
+    ] + [policy.action_net]
+    activation = policy.activation_fn.__name__.lower()
+    if activation not in ACTIVATIONS:
+        raise ValueError(f"Unsupported activation {policy.activation_fn.__name__}")
+
+    obs_mean = obs_std = None
+    clip_obs = 10.0
+    if vecnormalize_path is not None:
+        normalize = ObservationNormalizer.load(vecnormalize_path)
+        obs_mean, obs_std, clip_obs = normalize.mean, normalize.std, normalize.clip_obs
+
+    exported = NumpyPolicy(
+        [linear.weight.detach().numpy().T for linear in linears],
+        [linear.bias.detach().numpy() for linear in linears],
+        policy.action_space.nvec,
+        activation,
+        obs_mean,
+        obs_std,
+        clip_obs,
+    )
+    if output_path is None:
+        output_path = model_path[: -len(".zip")] + ".npz"
+    exported.save(output_path)
+    return output_path
+
+
+def parse_args():
+    """
+    Parse the export command line.
+
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description="Export a PPO model to a NumPy-only .npz policy."
+    )
+    parser.add_argument("model", help="PPO model zip, e.g. soccer_agent_ppo.zip.")
+    parser.add_argument(
+        "--vecnormalize",
+        default=None,
+        help="VecNormalize statistics the model was trained with, e.g. "
+        "vec_normalize.pkl.",
+    )
+    parser.add_argument(
+        "--output", default=None, help="Output .npz (default: next to the model)."
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print(f"Wrote {export_policy(args.model, args.vecnormalize, args.output)}")
@@ -0,0 +1,356 @@
+"""
+opponents.py
+
+Frozen opponents for self-play (see selfplay.py).
+
+An OpponentPool holds the policies playing red: checkpoints (model zips,
+archives of them or directories), NumPy exports (.npz, see numpy_policy.py)
+and inference server sockets (see inference.py), each acting from the
+mirrored view of the game. OpponentWorker runs a pool in a separate process.
+Only checkpoints need torch and Stable-Baselines3, which are imported when
+the first one is loaded, so a pool of exports and servers starts in
+milliseconds.
+"""
+import atexit
+import glob
+import io
+import multiprocessing as mp
+import os
+import posixpath
+import re
+import sys
+import zipfile
+
+import numpy as np
+
+from inference import InferenceClient, ObservationNormalizer, is_server, load_policy
+from numpy_policy import NumpyPolicy
+from simulation import physics
+
+# Players controlled by the learner (blue) and by the opponents (red)
+LEARNER_PLAYERS = 2
+
+# VecNormalize statistics saved by CheckpointCallback next to a checkpoint
+_CHECKPOINT_NAME = re.compile(r"^(?P<prefix>.*)_(?P<steps>\d+)_steps\.zip$")
+
+
+def _vecnormalize_name(name):
+    """
+    File name of the VecNormalize statistics saved with a model: for a
+    checkpoint ``<prefix>_<n>_steps.zip``,
+    ``<prefix>_vecnormalize_<n>_steps.pkl`` (CheckpointCallback);
+    vec_normalize.pkl for any other model (as saved by main.py).
+    """
+    match = _CHECKPOINT_NAME.match(name)
+    if match:
+        return f"{match['prefix']}_vecnormalize_{match['steps']}_steps.pkl"
+    return "vec_normalize.pkl"
+
+
+def find_checkpoints(paths):
+    """
+    Expand checkpoint paths into the models they hold, each with the
+    VecNormalize statistics saved next to it: in the same directory, or for
+    a member of an archive in the same directory of the archive.
+
+    Args:
+        paths (list[str]): Model zips, archives of model zips (as in
+            model_checkpoints/) or directories of either.
+
+    Returns:
+        list[tuple]: (name, file, stats) per model, where file is the path
+            or an in-memory copy of the zip, name its path (archive members
+            as ``archive.zip/member.zip``) and stats the path or an
+            in-memory copy of the statistics, None if none were found.
+    """
+    checkpoints = []
+    for path in paths:
+        if os.path.isdir(path):
+            members = sorted(glob.glob(os.path.join(path, "*.zip")))
+            checkpoints += find_checkpoints(members)
+            continue
+        with zipfile.ZipFile(path) as archive:
+            members = archive.namelist()
+            if "data" in members:
+                directory, name = os.path.split(path)
+                stats = os.path.join(directory, _vecnormalize_name(name))
+                if not os.path.exists(stats):
+                    stats = None
+                checkpoints.append((path, path, stats))
+                continue
+            for member in sorted(members):
+                if member.endswith(".zip"):
+                    directory, name = posixpath.split(member)
+                    stats = posixpath.join(directory, _vecnormalize_name(name))
+                    if stats in members:
+                        stats = io.BytesIO(archive.read(stats))
+                    else:
+                        stats = None
+                    checkpoints.append(
+                        (
+                            f"{path}/{member}",
+                            io.BytesIO(archive.read(member)),
+                            stats,
+                        )
+                    )
+    return checkpoints
+
+
+class Opponent:
+    """
+    A frozen policy playing red from the mirrored view of the game.
+    """
+
+    def __init__(self, policy, width, normalize=None):
+        """
+        Args:
+            policy (BasePolicy, NumpyPolicy or InferenceClient): Policy
+                trained on vector observations.
+            width (int): Field width in pixels, to mirror the observations.
+            normalize (ObservationNormalizer): Normalization of the
+                VecNormalize the policy was trained under; None when it sees
+                raw observations (also when a server normalizes them).
+        """
+        self.policy = policy
+        self.width = width
+        self.normalize = normalize
+
+    @classmethod
+    def load(cls, file, stats, width):
+        """
+        Load the policy of a model zip and its VecNormalize statistics.
+
+        Args:
+            file (str or io.BytesIO): The model zip.
+            stats (str or io.BytesIO): The VecNormalize file.
+            width (int): Field width in pixels.
+
+        Returns:
+            Opponent: The opponent.
+        """
+        return cls(load_policy(file), width, ObservationNormalizer.load(stats))
+
+    def act(self, observations, deterministic=False):
+        """
+        Red actions for a batch of matches.
+
+        Args:
+            observations (np.ndarray): (n, OBSERVATION_SIZE) raw observations.
+            deterministic (bool): Take the most likely actions instead of
+                sampling them.
+
+        Returns:
+            np.ndarray: (n, 2) actions of the red players.
+        """
+        mirrored = physics.mirror_observations(observations, self.width)
+        if self.normalize is not None:
+            mirrored = self.normalize(mirrored)
+        actions, _ = self.policy.predict(mirrored, deterministic=deterministic)
+        return physics.MIRRORED_ACTIONS[actions[:, :LEARNER_PLAYERS]]
+
+
+class OpponentPool:
+    """
+    Frozen opponents loaded once, acting in one batch per opponent.
+
+    ``submit`` and ``receive`` split a call of ``act`` in two, like
+    OpponentWorker; in this process the work is done in ``receive``.
+    """
+
+    def __init__(self, paths, width, deterministic=False, vecnormalize=None):
+        """
+        Args:
+            paths (list[str]): Checkpoints, see find_checkpoints, NumPy
+                exports (.npz, see numpy_policy.py) and inference server
+                sockets.
+            width (int): Field width in pixels.
+            deterministic (bool): Opponents take their most likely actions.
+            vecnormalize (str): VecNormalize file of the checkpoints saved
+                without statistics of their own.
+
+        Raises:
+            ValueError: If no opponent was found, or a checkpoint has no
+                VecNormalize statistics: its policy would act on raw
+                observations it never saw in training.
+        """
+        servers = [path for path in paths if is_server(path)]
+        exports = [path for path in paths if path.endswith(".npz")]
+        checkpoints = find_checkpoints(
+            [path for path in paths if path not in servers and path not in exports]
+        )
+        if vecnormalize is not None:
+            checkpoints = [
+                (name, file, vecnormalize if stats is None else stats)
+                for name, file, stats in checkpoints
+            ]
+        missing = [name for name, _, stats in checkpoints if stats is None]
+        if missing:
+            raise ValueError(
+                f"No VecNormalize statistics saved with the opponents {missing}; "
+                "give them with --opponent-vecnormalize"
+            )
+        # Servers and exports normalize the observations themselves
+        self.opponents = (
+            [Opponent(InferenceClient(address), width) for address in servers]
+            + [Opponent(NumpyPolicy.load(path), width) for path in exports]
+            + [Opponent.load(file, stats, width) for _, file, stats in checkpoints]
+        )
+        if not self.opponents:
+            raise ValueError(f"No checkpoints found in {paths}")
+        self.deterministic = deterministic
+        self._pending = None
+
+    def __len__(self):
+        return len(self.opponents)
+
+    def act(self, observations, assignment):
+        """
+        Red actions of every match.
+
+        Args:
+            observations (np.ndarray): (N, OBSERVATION_SIZE) raw observations.
+            assignment (np.ndarray): (N,) index of each match's opponent.
+
+        Returns:
+            np.ndarray: (N, 2) actions of the red players.
+        """
+        actions = np.empty((len(observations), LEARNER_PLAYERS), dtype=np.int64)
+        for index in np.unique(assignment):
+            rows = np.flatnonzero(assignment == index)
+            actions[rows] = self.opponents[index].act(
+                observations[rows], self.deterministic
+            )
+        return actions
+
+    def submit(self, observations, assignment):
+        """
+        Keep the arguments of the next act, replacing those of a submit not
+        received yet.
+        """
+        self._pending = (observations, assignment)
+
+    def receive(self):
+        """
+        Red actions of the last submit.
+
+        Returns:
+            np.ndarray: (N, 2) actions of the red players.
+        """
+        return self.act(*self._pending)
+
+    def close(self):
+        """
+        Nothing to release: the opponents live in this process.
+        """
+
+
+def _opponent_worker(remote, paths, width, deterministic, vecnormalize):
+    """
+    Worker process: load the pool, report its size (or the error that kept
+    it from loading), then answer every (observations, assignment) request
+    with the red actions until the None sentinel or a closed pipe.
+    """
+    try:
+        pool = OpponentPool(paths, width, deterministic, vecnormalize)
+    except Exception as error:
+        remote.send(error)
+        return
+    # One core: the learner runs its own forward pass at the same time. Only
+    # checkpoint (zip) opponents load torch
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(1)
+    remote.send(len(pool))
+    try:
+        while True:
+            message = remote.recv()
+            if message is None:
+                break
+            remote.send(pool.act(*message))
+    except (EOFError, KeyboardInterrupt):
+        pass
+
+
+class OpponentWorker:
+    """
+    OpponentPool running in a separate process.
+    """
+
+    def __init__(
+        self,
+        paths,
+        width,
+        deterministic=False,
+        vecnormalize=None,
+        start_method=None,
+    ):
+        """
+        Args:
+            paths (list[str]): Checkpoints, see OpponentPool.
+            width (int): Field width in pixels.
+            deterministic (bool): Opponents take their most likely actions.
+            vecnormalize (str): See OpponentPool.
+            start_method (str): multiprocessing start method; forkserver when
+                available, like SubprocVecEnv.
+
+        Raises:
+            ValueError: If the pool failed to load, see OpponentPool.
+        """
+        if start_method is None:
+            available = mp.get_all_start_methods()
+            start_method = "forkserver" if "forkserver" in available else "spawn"
+        ctx = mp.get_context(start_method)
+        self.remote, work_remote = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_opponent_worker,
+            args=(work_remote, paths, width, deterministic, vecnormalize),
+            daemon=True,
+        )
+        self.process.start()
+        work_remote.close()
+        atexit.register(self.close)
+        # Wait for the checkpoints to load
+        self.size = self.remote.recv()
+        self._outstanding = False
+        if isinstance(self.size, Exception):
+            self.close()
+            raise self.size
+
+    def __len__(self):
+        return self.size
+
+    def submit(self, observations, assignment):
+        """
+        Send the observations of every match and return immediately. Like
+        OpponentPool.submit, it replaces a submit not received yet: the
+        answer to that one is read and dropped first.
+        """
+        if self._outstanding:
+            self.remote.recv()
+        self.remote.send((observations, assignment))
+        self._outstanding = True
+
+    def receive(self):
+        """
+        Wait for the red actions of the last submit.
+
+        Returns:
+            np.ndarray: (N, 2) actions of the red players.
+        """
+        self._outstanding = False
+        return self.remote.recv()
+
+    def close(self):
+        """
+        Stop the worker process.
+        """
+        if self.process is None:
+            return
+        try:
+            self.remote.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=10)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.remote.close()
+        self.process = None
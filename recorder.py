@@ -0,0 +1,268 @@
+"""
+recorder.py
+
+Recording of rollouts into a trajectory store (simulation/trajectory.py).
+
+TrajectoryRecorder wraps a SoccerFieldEnv and VecTrajectoryRecorder a
+DummyVecEnv or BatchedSoccerVecEnv. Every step they keep the observation the
+action was taken on, the action, the reward, the done flag and the physics
+state row of the match at that observation; finished episodes are written
+whole, followed by their final observation and state (the store's final
+step), and unfinished ones are dropped. The physics state is enough to
+redraw a match (see replay_states.py) and to restore it with set_state, so
+pixel observations are not stored. Neither wrapper imports
+Stable-Baselines3 or torch.
+
+    python recorder.py --policy soccer_agent_ppo.npz --episodes 100
+"""
+import argparse
+
+import gymnasium as gym
+import numpy as np
+from gymnasium import spaces
+
+from simulation import physics
+from simulation.trajectory import CHUNK_SIZE, TrajectoryWriter
+
+
+def trajectory_fields(observation_space, action_space):
+    """
+    Fields of the store for an environment.
+
+    Args:
+        observation_space (gym.Space): Observations; only a flat Box is
+            stored.
+        action_space (spaces.MultiDiscrete): Actions.
+
+    Returns:
+        dict: Field name to (per-step shape, dtype), see TrajectoryWriter.
+    """
+    fields = {
+        "states": ((physics.STATE_SIZE,), np.float32),
+        "actions": (action_space.shape, np.int8),
+        "rewards": ((), np.float32),
+        "dones": ((), bool),
+    }
+    flat = isinstance(observation_space, spaces.Box)
+    if flat and len(observation_space.shape) == 1:
+        fields["observations"] = (observation_space.shape, observation_space.dtype)
+    return fields
+
+
+class _EpisodeBuffer:
+    """
+    Steps of the running episode of one match.
+    """
+
+    def __init__(self, fields):
+        self.steps = {name: [] for name in fields}
+        self.reward = 0.0
+
+    def add(self, observation, state, action, reward, done):
+        if "observations" in self.steps:
+            self.steps["observations"].append(observation)
+        self.steps["states"].append(state)
+        self.steps["actions"].append(action)
+        self.steps["rewards"].append(reward)
+        self.steps["dones"].append(done)
+        self.reward += reward
+
+    def write(self, writer, terminated, observation, state):
+        """
+        Write the episode, ended on observation and state, and start an
+        empty one.
+        """
+        final = {"states": state}
+        if "observations" in self.steps:
+            final["observations"] = observation
+        writer.add_episode(
+            self.reward,
+            terminated,
+            final,
+            **{name: np.asarray(values) for name, values in self.steps.items()},
+        )
+        for values in self.steps.values():
+            values.clear()
+        self.reward = 0.0
+
+
+class TrajectoryRecorder(gym.Wrapper):
+    """
+    Records every finished episode of a SoccerFieldEnv into a store.
+    """
+
+    def __init__(self, env, path, chunk_size=CHUNK_SIZE):
+        """
+        Args:
+            env (gym.Env): A SoccerFieldEnv, possibly wrapped.
+            path (str): Store directory, created or appended to.
+            chunk_size (int): Steps per chunk file.
+        """
+        super().__init__(env)
+        fields = trajectory_fields(env.observation_space, env.action_space)
+        info = {"game_duration": env.unwrapped.game_duration}
+        self.writer = TrajectoryWriter(path, fields, chunk_size, info)
+        self.buffer = _EpisodeBuffer(fields)
+        self._observation = None
+
+    def reset(self, **kwargs):
+        """
+        Reset the environment; an unfinished episode is dropped.
+        """
+        self.buffer = _EpisodeBuffer(self.writer.fields)
+        self._observation, info = self.env.reset(**kwargs)
+        return self._observation, info
+
+    def step(self, action):
+        state = self.env.unwrapped.soccer_field.state.copy()
+        observation, reward, terminated, truncated, info = self.env.step(action)
+        done = terminated or truncated
+        self.buffer.add(self._observation, state, action, reward, done)
+        if done:
+            final_state = self.env.unwrapped.soccer_field.state
+            self.buffer.write(self.writer, terminated, observation, final_state)
+        self._observation = observation
+        return observation, reward, terminated, truncated, info
+
+    def close(self):
+        self.writer.close()
+        super().close()
+
+
+class VecTrajectoryRecorder:
+    """
+    Records every finished episode of a vectorized environment into a store.
+
+    Needs the physics states of the matches: a BatchedSoccerVecEnv, or a
+    DummyVecEnv of SoccerFieldEnv. Place it below VecNormalize so the raw
+    observations are stored.
+
+    It follows the Stable-Baselines3 VecEnv interface without subclassing
+    VecEnvWrapper, so that recording does not import torch: everything but
+    reset, step and close is forwarded to the wrapped environment.
+    """
+
+    def __init__(self, venv, path, chunk_size=CHUNK_SIZE):
+        """
+        Args:
+            venv (VecEnv): The vectorized environment.
+            path (str): Store directory, created or appended to.
+            chunk_size (int): Steps per chunk file.
+        """
+        if not hasattr(venv, "states") and not hasattr(venv, "envs"):
+            raise ValueError("Recording needs the batched or the dummy backend")
+        self.venv = venv
+        fields = trajectory_fields(venv.observation_space, venv.action_space)
+        info = {"game_duration": venv.get_attr("game_duration")[0]}
+        self.writer = TrajectoryWriter(path, fields, chunk_size, info)
+        self.buffers = [_EpisodeBuffer(fields) for _ in range(self.num_envs)]
+        self._observations = None
+        self._actions = None
+        self._step_states = None
+
+    def __getattr__(self, name):
+        if name == "venv":
+            raise AttributeError(name)
+        return getattr(self.venv, name)
+
+    def _states(self):
+        """
+        (N, STATE_SIZE) copy of the physics state of every match.
+        """
+        if hasattr(self.venv, "states"):
+            return self.venv.states.copy()
+        return np.stack([env.unwrapped.soccer_field.state for env in self.venv.envs])
+
+    def reset(self):
+        """
+        Reset all matches; unfinished episodes are dropped.
+        """
+        self.buffers = [_EpisodeBuffer(self.writer.fields) for _ in self.buffers]
+        self._observations = self.venv.reset()
+        return self._observations
+
+    def step_async(self, actions):
+        self._actions = np.asarray(actions)
+        self._step_states = self._states()
+        self.venv.step_async(actions)
+
+    def step_wait(self):
+        observations, rewards, dones, infos = self.venv.step_wait()
+        for i, buffer in enumerate(self.buffers):
+            buffer.add(
+                self._observations[i],
+                self._step_states[i],
+                self._actions[i],
+                rewards[i],
+                dones[i],
+            )
+            if dones[i]:
+                truncated = infos[i].get("TimeLimit.truncated", False)
+                buffer.write(
+                    self.writer,
+                    not truncated,
+                    infos[i]["terminal_observation"],
+                    infos[i]["terminal_state"],
+                )
+        self._observations = observations
+        return observations, rewards, dones, infos
+
+    def step(self, actions):
+        """
+        Step the environments, see VecEnv.step.
+
+        Returns:
+            tuple: (observations, rewards, dones, infos)
+        """
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self):
+        self.writer.close()
+        self.venv.close()
+
+
+def parse_args():
+    """
+    Parse the recording command line.
+
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description="Record episodes of an exported policy into a trajectory store."
+    )
+    parser.add_argument(
+        "--policy",
+        default="soccer_agent_ppo.npz",
+        help="NumPy export of the policy (numpy_policy.py).",
+    )
+    parser.add_argument("--episodes", type=int, default=100)
+    parser.add_argument("--num-envs", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--deterministic",
+        action="store_true",
+        help="Record the most likely actions instead of sampled ones.",
+    )
+    parser.add_argument("--output", default="trajectories", help="Store directory.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    from main import BatchedSoccerVecEnv
+    from numpy_policy import NumpyPolicy
+
+    args = parse_args()
+    policy = NumpyPolicy.load(args.policy, seed=args.seed)
+    venv = VecTrajectoryRecorder(
+        BatchedSoccerVecEnv(args.num_envs, game_duration=30), args.output
+    )
+    venv.seed(args.seed)
+    observations = venv.reset()
+    start = venv.writer.episodes
+    while venv.writer.episodes - start < args.episodes:
+        actions, _ = policy.predict(observations, deterministic=args.deterministic)
+        observations, _, _, _ = venv.step(actions)
+    venv.close()
+    print(f"Recorded {venv.writer.episodes - start} episodes to {args.output}")
@@ -3,14 +3,16 @@ replay.py
 
 This script loads a trained PPO agent and a VecNormalize object, and then evaluates the agent's performance in a
 SoccerField environment. The environment is then rendered allowing each individual episode to be observed.
+
+With --policy it plays an export of numpy_policy.py instead, without importing torch.
 """
+import argparse
 import random
 
-from stable_baselines3 import PPO
-from stable_baselines3.common.monitor import Monitor
-from stable_baselines3.common.vec_env import DummyVecEnv, VecNormalize
+from numpy_policy import NumpyPolicy
+from soccer_env import SoccerFieldEnv
 
-from main import SoccerFieldEnv
+NUM_EPISODES = 5
 
 
 def make_env():
@@ -19,26 +21,73 @@ def make_env():
     Returns:
         Monitor wrapped SoccerField environment for keeping track of individual episode statistics.
     """
+    from stable_baselines3.common.monitor import Monitor
+
     return Monitor(SoccerFieldEnv(render_mode="human"))
 
 
-eval_env = DummyVecEnv([make_env])
-eval_env = VecNormalize.load("vec_normalize.pkl", eval_env)
+def replay_numpy_policy(path):
+    """
+    Watch an exported NumPy policy play, stepping the environment directly.
 
-eval_env.training = False
-eval_env.norm_reward = False
+    Args:
+        path (str): The .npz written by numpy_policy.py.
+    """
+    policy = NumpyPolicy.load(path)
+    env = SoccerFieldEnv(render_mode="human")
+    for episode in range(NUM_EPISODES):
+        obs, _ = env.reset(seed=random.randint(0, 1_000_000))
+        done = False
+        print(f"\nEpisode {episode + 1}")
 
-model = PPO.load("soccer_agent_ppo.zip", env=eval_env)
+        while not done:
+            action, _ = policy.predict(obs, deterministic=False)
+            obs, reward, terminated, truncated, info = env.step(action)
+            done = terminated or truncated
+    env.close()
 
-NUM_EPISODES = 5
 
-for episode in range(NUM_EPISODES):
-    eval_env.seed(random.randint(0, 1_000_000))
-    obs = eval_env.reset()
-    done = False
-    print(f"\nEpisode {episode + 1}")
+parser = argparse.ArgumentParser(description="Watch the trained agent play.")
+parser.add_argument(
+    "--server",
+    default=None,
+    help="Socket of a running inference.py server to take the actions from, "
+    "instead of loading the model here.",
+)
+parser.add_argument(
+    "--policy",
+    default=None,
+    help="NumPy export of the model (numpy_policy.py) to play without torch.",
+)
+args = parser.parse_args()
+
+if args.policy is not None:
+    replay_numpy_policy(args.policy)
+else:
+    from stable_baselines3 import PPO
+    from stable_baselines3.common.vec_env import DummyVecEnv, VecNormalize
+
+    from inference import InferenceClient
+
+    eval_env = DummyVecEnv([make_env])
+    if args.server is None:
+        eval_env = VecNormalize.load("vec_normalize.pkl", eval_env)
+
+        eval_env.training = False
+        eval_env.norm_reward = False
+
+        model = PPO.load("soccer_agent_ppo.zip", env=eval_env)
+    else:
+        # The server normalizes the raw observations with the model's statistics
+        model = InferenceClient(args.server)
+
+    for episode in range(NUM_EPISODES):
+        eval_env.seed(random.randint(0, 1_000_000))
+        obs = eval_env.reset()
+        done = False
+        print(f"\nEpisode {episode + 1}")
 
-    while not done:
-        action, _ = model.predict(obs, deterministic=False)
-        obs, reward, done, info = eval_env.step(action)
-        eval_env.render()
+        while not done:
+            action, _ = model.predict(obs, deterministic=False)
+            obs, reward, done, info = eval_env.step(action)
+            eval_env.render()
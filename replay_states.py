@@ -0,0 +1,396 @@
+"""
+replay_states.py
+
+Replay of recorded matches (recorder.py) from their physics states.
+
+Every recorded step holds the physics state row of its match, which is all
+SoccerField.draw_field needs: a state is copied into the field and drawn, so
+nothing is simulated, no policy is loaded and torch is never imported. What
+is shown is exactly what was recorded, however the actions were chosen.
+
+    python replay_states.py trajectories --episodes 3 4 --speed 2
+    python replay_states.py trajectories --output frames --frame-skip 4 --workers 4
+
+In the window: space pauses, left/right seek one second (comma/period one
+step while paused), up/down double or halve the speed, page up/down or p/n
+change episode, home restarts it and escape quits. With --output the
+episodes are rendered offscreen as fast as they draw, on --workers
+processes, into one (frames, H, W, C) uint8 .npy per episode.
+"""
+import argparse
+import multiprocessing as mp
+import os
+import time
+
+import numpy as np
+import pygame
+
+from simulation import physics
+from simulation.trajectory import TrajectoryStore
+from soccer_env import SoccerFieldEnv
+from Visual_Components.field import SoccerField
+
+FPS = SoccerFieldEnv.metadata["render_fps"]
+GAME_DURATION = 30  # Match length of stores recorded without it
+SPEEDS = (0.125, 16.0)  # Slowest and fastest playback
+
+
+def episode_states(store, episode):
+    """
+    Physics states of one recorded episode, ending on its final state when
+    the store has it (the goal or the last tick of the clock).
+
+    Args:
+        store (TrajectoryStore): The store.
+        episode (int): Episode index.
+
+    Returns:
+        np.ndarray: (length + 1, STATE_SIZE) memmap slice, (length,) for
+            stores recorded without final steps.
+    """
+    return store.episode(episode, ["states"], store.final_step)["states"]
+
+
+class StateRenderer:
+    """
+    Draws physics states offscreen into image frames.
+    """
+
+    def __init__(self, game_duration=GAME_DURATION, frame_size=None, grayscale=False):
+        """
+        Args:
+            game_duration (float): Match length, for the timer.
+            frame_size (tuple): (width, height) the frames are downscaled to;
+                None keeps the field size.
+            grayscale (bool): Render (H, W, 1) luma frames instead of RGB.
+        """
+        # The rgb_array pipeline of the environment, fed states instead of
+        # stepped
+        self.env = SoccerFieldEnv(
+            game_duration,
+            render_mode="rgb_array",
+            frame_size=frame_size,
+            grayscale=grayscale,
+            reuse_frame=True,
+        )
+
+    def render(self, state):
+        """
+        Draw one state.
+
+        Args:
+            state (np.ndarray): (STATE_SIZE,) physics state row.
+
+        Returns:
+            np.ndarray: (H, W, C) uint8 frame, overwritten by the next render.
+        """
+        self.env.soccer_field.state[:] = state
+        return self.env.render()
+
+    def render_episode(self, states, frame_skip=1, out=None):
+        """
+        Draw every ``frame_skip``-th state of an episode.
+
+        Args:
+            states (np.ndarray): (length, STATE_SIZE) states.
+            frame_skip (int): Recorded steps per frame.
+            out (np.ndarray): (frames, H, W, C) uint8 array to draw into, e.g.
+                a memmap; a new array by default.
+
+        Returns:
+            np.ndarray: The frames.
+        """
+        states = states[::frame_skip]
+        for i, state in enumerate(states):
+            frame = self.render(state)
+            if out is None:
+                out = np.empty((len(states), *frame.shape), dtype=np.uint8)
+            out[i] = frame
+        return out
+
+    def close(self):
+        self.env.close()
+
+
+def _export_episodes(path, episodes, output, frame_skip, frame_size, grayscale):
+    """
+    Render some episodes of a store to .npy files, see export_frames.
+
+    Returns:
+        int: Number of frames written.
+    """
+    store = TrajectoryStore(path)
+    renderer = StateRenderer(
+        store.info.get("game_duration", GAME_DURATION), frame_size, grayscale
+    )
+    shape = renderer.render(episode_states(store, episodes[0])[0]).shape
+    written = 0
+    for episode in episodes:
+        states = episode_states(store, episode)
+        frames = np.lib.format.open_memmap(
+            os.path.join(output, f"episode_{episode:05d}.npy"),
+            mode="w+",
+            dtype=np.uint8,
+            shape=(len(states[::frame_skip]), *shape),
+        )
+        renderer.render_episode(states, frame_skip, out=frames)
+        frames.flush()
+        written += len(frames)
+        del frames
+    renderer.close()
+    return written
+
+
+def export_frames(
+    store,
+    episodes,
+    output,
+    frame_skip=1,
+    frame_size=None,
+    grayscale=False,
+    workers=1,
+):
+    """
+    Render episodes offscreen, one .npy of frames per episode.
+
+    Args:
+        store (TrajectoryStore): The store.
+        episodes (list[int]): Episode indices.
+        output (str): Output directory, holding episode_<index>.npy files.
+        frame_skip (int): Recorded steps per frame.
+        frame_size (tuple): (width, height) of the frames; the field size by
+            default.
+        grayscale (bool): Render luma frames.
+        workers (int): Processes rendering episodes side by side.
+
+    Returns:
+        int: Number of frames written.
+    """
+    os.makedirs(output, exist_ok=True)
+    jobs = [
+        (store.path, episodes[i::workers], output, frame_skip, frame_size, grayscale)
+        for i in range(min(workers, len(episodes)))
+    ]
+    if len(jobs) == 1:
+        return _export_episodes(*jobs[0])
+    available = mp.get_all_start_methods()
+    ctx = mp.get_context("forkserver" if "forkserver" in available else "spawn")
+    with ctx.Pool(len(jobs)) as pool:
+        return sum(pool.starmap(_export_episodes, jobs))
+
+
+class StateViewer:
+    """
+    Window playing recorded episodes, with seeking and variable speed.
+
+    The playback position is a simulated frame of the match; it advances by
+    ``speed`` frames per displayed frame and shows the last recorded step at
+    or before it, so speeds above one skip steps and speeds below one hold
+    them.
+    """
+
+    def __init__(self, store, episodes=None, speed=1.0):
+        """
+        Args:
+            store (TrajectoryStore): The store.
+            episodes (list[int]): Episodes to play, in order; all by default.
+            speed (float): Playback speed, 1 for real time.
+        """
+        self.store = store
+        self.episodes = list(range(len(store)) if episodes is None else episodes)
+        self.speed = speed
+        self.paused = False
+        self.field = SoccerField(
+            game_duration=store.info.get("game_duration", GAME_DURATION), fps=FPS
+        )
+        self.position = 0  # Index in self.episodes
+        self.tick = 0.0
+        self._load()
+
+    def _load(self):
+        """
+        Start the episode at self.position.
+        """
+        self.states = episode_states(self.store, self.episodes[self.position])
+        self.frames = self.states[:, physics.FRAME]
+        self.tick = float(self.frames[0])
+
+    def step_index(self):
+        """
+        Index of the recorded step shown at the current position.
+        """
+        step = np.searchsorted(self.frames, self.tick, side="right") - 1
+        return int(np.clip(step, 0, len(self.states) - 1))
+
+    def seek(self, seconds):
+        """
+        Move the position by some match time, within the episode.
+        """
+        self.tick = float(
+            np.clip(self.tick + seconds * FPS, self.frames[0], self.frames[-1])
+        )
+
+    def step(self, steps):
+        """
+        Move the position by some recorded steps, within the episode.
+        """
+        step = np.clip(self.step_index() + steps, 0, len(self.states) - 1)
+        self.tick = float(self.frames[step])
+
+    def change_episode(self, offset):
+        """
+        Jump to another episode of the list; past either end stops playback.
+        """
+        self.position += offset
+        if 0 <= self.position < len(self.episodes):
+            self._load()
+
+    def handle(self, event):
+        """
+        Apply one keyboard or window event.
+
+        Returns:
+            bool: False when the viewer should close.
+        """
+        if event.type == pygame.QUIT:
+            return False
+        if event.type != pygame.KEYDOWN:
+            return True
+        key = event.key
+        if key in (pygame.K_ESCAPE, pygame.K_q):
+            return False
+        if key == pygame.K_SPACE:
+            self.paused = not self.paused
+        elif key == pygame.K_LEFT:
+            self.seek(-1)
+        elif key == pygame.K_RIGHT:
+            self.seek(1)
+        elif key == pygame.K_COMMA:
+            self.step(-1)
+        elif key == pygame.K_PERIOD:
+            self.step(1)
+        elif key == pygame.K_UP:
+            self.speed = min(self.speed * 2, SPEEDS[1])
+        elif key == pygame.K_DOWN:
+            self.speed = max(self.speed / 2, SPEEDS[0])
+        elif key in (pygame.K_PAGEDOWN, pygame.K_n):
+            self.change_episode(1)
+        elif key in (pygame.K_PAGEUP, pygame.K_p):
+            self.change_episode(-1 if self.position > 0 else 0)
+        elif key == pygame.K_HOME:
+            self.tick = float(self.frames[0])
+        return True
+
+    def run(self):
+        """
+        Play until the last episode ends or the window is closed.
+        """
+        caption = None
+        while 0 <= self.position < len(self.episodes):
+            if not all(self.handle(event) for event in pygame.event.get()):
+                break
+            if not 0 <= self.position < len(self.episodes):
+                break
+
+            step = self.step_index()
+            self.field.state[:] = self.states[step]
+            self.field.draw_field()
+            pygame.display.flip()
+            self.field.clock.tick(FPS)
+
+            text = (
+                f"Episode {self.episodes[self.position]} - step {step + 1}"
+                f"/{len(self.states)} - x{self.speed:g}"
+                + (" - paused" if self.paused else "")
+            )
+            if text != caption:
+                pygame.display.set_caption(text)
+                caption = text
+
+            if not self.paused:
+                self.tick += self.speed
+                # Hold the last step for a second before the next episode
+                if self.tick > self.frames[-1] + FPS:
+                    self.change_episode(1)
+        pygame.quit()
+
+
+def parse_args():
+    """
+    Parse the replay command line.
+
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description="Replay recorded matches from their physics states."
+    )
+    parser.add_argument("store", help="Trajectory store written by recorder.py.")
+    parser.add_argument(
+        "--episodes",
+        type=int,
+        nargs="+",
+        default=None,
+        help="Episodes to replay, in order (default: all of them).",
+    )
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="Playback speed, 1 for real time."
+    )
+    parser.add_argument(
+        "--start", type=float, default=0.0, help="Seconds into the first episode."
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="Render offscreen into this directory instead of opening a window.",
+    )
+    parser.add_argument(
+        "--frame-skip",
+        type=int,
+        default=1,
+        help="Recorded steps per rendered frame with --output.",
+    )
+    parser.add_argument(
+        "--frame-size",
+        type=int,
+        nargs=2,
+        default=None,
+        metavar=("WIDTH", "HEIGHT"),
+        help="Size of the rendered frames with --output.",
+    )
+    parser.add_argument(
+        "--grayscale", action="store_true", help="Render luma frames with --output."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes rendering episodes in parallel with --output.",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    store = TrajectoryStore(args.store)
+    episodes = list(range(len(store))) if args.episodes is None else args.episodes
+    if args.output is not None:
+        start = time.perf_counter()
+        frames = export_frames(
+            store,
+            episodes,
+            args.output,
+            args.frame_skip,
+            args.frame_size,
+            args.grayscale,
+            args.workers,
+        )
+        elapsed = time.perf_counter() - start
+        print(
+            f"Rendered {frames} frames of {len(episodes)} episodes to "
+            f"{args.output} in {elapsed:.1f}s ({frames / elapsed:.0f} frames/s)"
+        )
+    else:
+        viewer = StateViewer(store, episodes, args.speed)
+        viewer.seek(args.start)
+        viewer.run()
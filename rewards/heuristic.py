@@ -19,19 +19,16 @@ def reward_function(self):
     red1, red2 = self.players[2], self.players[3]
 
     # 1. Goal Reward — large reward/penalty for scoring or conceding
-    scored, team = self.soccer_field.check_goal()
+    # (the goal is checked once per step by the environment)
+    scored, team = self.goal_event
     if scored:
         if team == "Blue: Goal":
-            self.scoring_team = "blue"
             return 10.0  # positive reward for scoring
         elif team == "Blue: Own Goal":
-            self.scoring_team = "blue"
             return -10.0  # penalty for own goal
         elif team == "Red: Goal":
-            self.scoring_team = "red"
             return -10.0  # penalty for conceding
         elif team == "Red: Own Goal":
-            self.scoring_team = "red"
             return 10.0  # reward if opponent scores own goal
 
     # Save previous positions for tracking movement and trends
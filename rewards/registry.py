@@ -0,0 +1,73 @@
+import json
+
+# Reward components by name, in registration order. Each component takes the
+# geometry dict computed by rewards.vectorized.RewardEngine and returns a
+# tuple of (N,) arrays that are added to the reward one after the other.
+REWARD_COMPONENTS = {}
+
+# Weight of every built-in component; all 1.0 reproduces rewards.heuristic
+DEFAULT_REWARD_CONFIG = {
+    "goal": 1.0,
+    "proximity": 1.0,
+    "possession": 1.0,
+    "ball_direction": 1.0,
+    "positioning": 1.0,
+    "spacing": 1.0,
+    "advance": 1.0,
+    "interception": 1.0,
+    "defense": 1.0,
+    "time_penalty": 1.0,
+}
+
+
+def register_component(name):
+    """
+    Decorator registering a reward component under a name.
+
+    Args:
+        name (str): Name used for the component in reward configs and in the
+            ``reward_terms`` info.
+
+    Returns:
+        callable: The decorator.
+    """
+
+    def decorator(function):
+        if name in REWARD_COMPONENTS:
+            raise ValueError(f"Reward component '{name}' is already registered")
+        REWARD_COMPONENTS[name] = function
+        return function
+
+    return decorator
+
+
+def load_reward_config(config=None):
+    """
+    Resolve a reward config into component weights.
+
+    Components left out of the config are not computed at all. The returned
+    dict follows the registration order, so the terms are always added in
+    the same order whatever the order of the config.
+
+    Args:
+        config (dict or str): Mapping from component name to weight, or the
+            path of a JSON file holding one. None gives DEFAULT_REWARD_CONFIG.
+
+    Returns:
+        dict: Component name to weight, in registration order.
+    """
+    if config is None:
+        config = DEFAULT_REWARD_CONFIG
+    elif isinstance(config, str):
+        with open(config) as f:
+            config = json.load(f)
+
+    unknown = set(config) - set(REWARD_COMPONENTS)
+    if unknown:
+        raise KeyError(
+            f"Unknown reward components {sorted(unknown)}; "
+            f"available: {list(REWARD_COMPONENTS)}"
+        )
+    return {
+        name: float(config[name]) for name in REWARD_COMPONENTS if name in config
+    }
@@ -0,0 +1,548 @@
+import operator
+import time
+
+import numpy as np
+
+from rewards.registry import (
+    REWARD_COMPONENTS,
+    load_reward_config,
+    register_component,
+)
+from simulation import physics
+
+# Reward for each goal code: scoring or an opponent own goal is good for blue
+GOAL_REWARDS = np.zeros(len(physics.GOAL_MESSAGES))
+GOAL_REWARDS[physics.BLUE_GOAL] = 10.0
+GOAL_REWARDS[physics.BLUE_OWN_GOAL] = -10.0
+GOAL_REWARDS[physics.RED_GOAL] = -10.0
+GOAL_REWARDS[physics.RED_OWN_GOAL] = 10.0
+
+# State columns tracked between steps: the four players, then the ball
+TRACKED_COLUMNS = np.concatenate(
+    [
+        np.stack([physics.PLAYER_X, physics.PLAYER_Y], axis=1).ravel(),
+        [physics.BALL_X, physics.BALL_Y],
+    ]
+)
+
+# Size of a match's reward history in RewardEngine.get_state: the tracked
+# positions, then whether they are set
+HISTORY_SIZE = len(TRACKED_COLUMNS) + 1
+
+# Rows of the per-match point table built in RewardEngine.__call__
+BLUE1, BLUE2, RED1, RED2, BALL = range(5)
+PREV_RED1, PREV_RED2, PREV_BALL = range(5, 8)
+OWN_GOAL, OPP_GOAL, ORIGIN, VELOCITY = range(8, 12)
+NUM_POINTS = 12
+
+# Vectors (a - b) between points, oriented the way the heuristic passes them
+# to np.arctan2; norms do not depend on the orientation
+VECTORS = np.array(
+    [
+        (BLUE1, BALL),
+        (BLUE2, BALL),
+        (BALL, RED1),
+        (BALL, RED2),
+        (OWN_GOAL, BALL),
+        (OPP_GOAL, BALL),
+        (PREV_BALL, OWN_GOAL),
+        (BLUE1, BLUE2),
+        (RED1, PREV_RED1),
+        (RED2, PREV_RED2),
+        (BLUE1, OWN_GOAL),
+        (BLUE2, OWN_GOAL),
+        (VELOCITY, ORIGIN),
+    ]
+)
+(
+    BLUE1_BALL,
+    BLUE2_BALL,
+    RED1_BALL,
+    RED2_BALL,
+    BALL_OWN_GOAL,
+    BALL_OPP_GOAL,
+    PREV_BALL_OWN_GOAL,
+    BLUE_TEAM,
+    RED1_MOVE,
+    RED2_MOVE,
+    BLUE1_OWN_GOAL,
+    BLUE2_OWN_GOAL,
+    BALL_VELOCITY,
+) = range(len(VECTORS))
+
+# Pairs of vectors whose angle difference is needed
+ANGLE_VECTORS = [
+    BALL_OPP_GOAL,
+    BALL_VELOCITY,
+    BALL_OWN_GOAL,
+    BALL_VELOCITY,
+    RED1_BALL,
+    RED1_MOVE,
+    RED2_BALL,
+    RED2_MOVE,
+]
+
+# Single match: the tracked positions from a state row as a list, the
+# (head, tail) indices into the flattened point table of every vector
+# coordinate, and the vector indices of each angle pair
+_tracked_values = operator.itemgetter(*TRACKED_COLUMNS.tolist())
+_COORDINATE_PAIRS = [
+    (2 * head + axis, 2 * tail + axis)
+    for head, tail in VECTORS.tolist()
+    for axis in (0, 1)
+]
+_ANGLE_PAIRS = list(zip(ANGLE_VECTORS[0::2], ANGLE_VECTORS[1::2]))
+
+
+def _minimum(a, b):
+    """
+    Elementwise minimum of arrays, or min of Python floats; the first
+    argument tells which.
+    """
+    if isinstance(a, np.ndarray):
+        return np.minimum(a, b)
+    return min(a, b)
+
+
+def _angle_difference(a, b):
+    """
+    Absolute difference between two angles, scaled to [0, 1].
+    """
+    diff = abs(a - b)
+    return _minimum(diff, 2 * np.pi - diff) / np.pi
+
+
+def _norms(vectors):
+    """
+    Euclidean norms of a stack of 2D vectors.
+
+    np.linalg.norm of a list computes ``sqrt(x.dot(x))``, and the BLAS dot
+    may fuse the multiply-add. A batched matmul of (1, 2) by (2, 1) goes
+    through the same dot routine, so the norms match np.linalg.norm bit for
+    bit where ``sqrt(x**2 + y**2)`` would differ in the last place.
+
+    Args:
+        vectors (np.ndarray): (..., 2) float64 vectors.
+
+    Returns:
+        np.ndarray: (...) norms.
+    """
+    return np.sqrt(np.matmul(vectors[..., None, :], vectors[..., :, None]))[..., 0, 0]
+
+
+@register_component("goal")
+def goal_reward(geometry):
+    """
+    1. Goal Reward: large reward/penalty for scoring or conceding.
+    """
+    return (GOAL_REWARDS[geometry["goals"]],)
+
+
+@register_component("proximity")
+def proximity_reward(geometry):
+    """
+    2. Ball Proximity: blue close to the ball, red far from it.
+    """
+    norms = geometry["norms"]
+    field_diagonal = geometry["field_diagonal"]
+    blue1 = norms[BLUE1_BALL] / field_diagonal
+    blue2 = norms[BLUE2_BALL] / field_diagonal
+    red1 = norms[RED1_BALL] / field_diagonal
+    red2 = norms[RED2_BALL] / field_diagonal
+    return (0.5 * (1 - blue1) + 0.5 * (1 - blue2), 0.5 * red1 + 0.5 * red2)
+
+
+@register_component("possession")
+def possession_reward(geometry):
+    """
+    3. Ball Possession: blue close enough to possess the ball.
+    """
+    return (geometry["blue_possession"] * 0.5,)
+
+
+@register_component("ball_direction")
+def ball_direction_reward(geometry):
+    """
+    4. Ball Movement Direction: ball moving toward the opponent goal rather
+    than the own goal.
+    """
+    moving = geometry["norms"][BALL_VELOCITY] > 0.5
+    angle_diffs = geometry["angle_diffs"]
+    return (
+        0.5 * (1 - angle_diffs[0]) * moving,
+        0.3 * angle_diffs[1] * moving,
+    )
+
+
+@register_component("positioning")
+def positioning_reward(geometry):
+    """
+    5. Strategic Positioning: ball moved away from the own goal.
+    """
+    norms = geometry["norms"]
+    field_diagonal = geometry["field_diagonal"]
+    return (
+        -(
+            0.3
+            * -(
+                norms[BALL_OWN_GOAL] / field_diagonal
+                - norms[PREV_BALL_OWN_GOAL] / field_diagonal
+            )
+        ),
+    )
+
+
+@register_component("spacing")
+def spacing_reward(geometry):
+    """
+    6. Team Coordination: blue players a quarter field width apart.
+    """
+    optimal_spacing = geometry["width"] / 4
+    norm_spacing_diff = _minimum(
+        abs(geometry["norms"][BLUE_TEAM] - optimal_spacing) / optimal_spacing,
+        1.0,
+    )
+    return (0.2 * (1 - norm_spacing_diff),)
+
+
+@register_component("advance")
+def advance_reward(geometry):
+    """
+    Possession scaled by ball position: the further into red territory the
+    better.
+    """
+    position_multiplier = geometry["ball_x"] / geometry["width"]
+    return (0.5 * (1 + position_multiplier) * geometry["blue_possession"],)
+
+
+@register_component("interception")
+def interception_reward(geometry):
+    """
+    7. Interception & Movement: red standing still far from the ball is
+    penalized, and so is red running at the ball.
+    """
+    norms = geometry["norms"]
+    angle_diffs = geometry["angle_diffs"]
+    far = physics.PLAYER_RADIUS * 3
+    return (
+        -(((norms[RED1_MOVE] < 0.1) & (norms[RED1_BALL] > far)) * 0.1),
+        -(((norms[RED2_MOVE] < 0.1) & (norms[RED2_BALL] > far)) * 0.1),
+        -((norms[RED1_MOVE] > 0.1) * (0.2 * (1 - angle_diffs[2]))),
+        -((norms[RED2_MOVE] > 0.1) * (0.2 * (1 - angle_diffs[3]))),
+    )
+
+
+@register_component("defense")
+def defense_reward(geometry):
+    """
+    8. Defensive Positioning: a blue player closer to the own goal than the
+    ball.
+    """
+    norms = geometry["norms"]
+    blue_to_own_goal = _minimum(norms[BLUE1_OWN_GOAL], norms[BLUE2_OWN_GOAL])
+    return ((blue_to_own_goal < norms[BALL_OWN_GOAL]) * 0.3,)
+
+
+@register_component("time_penalty")
+def time_penalty(geometry):
+    """
+    9. Time Penalty: encourage to try by penalizing time steps.
+    """
+    return (-0.01,)
+
+
+class RewardEngine:
+    """
+    Vectorized, configurable version of rewards.heuristic.reward_function.
+
+    Shared geometry (distances and angles) is computed once for a batch of N
+    matches straight from the physics state array, then every configured
+    component of rewards.registry adds its weighted terms. With the default
+    config the result is exactly the heuristic's (same float64 operations in
+    the same order). The previous positions the heuristic keeps in
+    ``prev_positions`` dicts are held here as an (N, 10) array.
+
+    Attributes:
+        weights (dict): Component name to weight, in evaluation order.
+        terms (np.ndarray): (N, K) weighted value of each component at the
+            last call.
+        costs (dict): Seconds spent in the geometry and in each component.
+        calls (int): Number of calls timed in ``costs``.
+        prev_positions (np.ndarray): (N, 10) previous player and ball positions.
+        has_prev (np.ndarray): (N,) whether prev_positions has been set.
+    """
+
+    def __init__(self, num_envs, width, height, config=None):
+        """
+        Initialize the reward engine.
+
+        Args:
+            num_envs (int): Number of matches.
+            width (int): Field width in pixels.
+            height (int): Field height in pixels.
+            config (dict or str): Reward config, see
+                rewards.registry.load_reward_config.
+        """
+        self.width = width
+        self.height = height
+        self.field_diagonal = float(np.sqrt(width**2 + height**2))
+        self.weights = load_reward_config(config)
+        self.components = [
+            (name, REWARD_COMPONENTS[name], weight)
+            for name, weight in self.weights.items()
+        ]
+        self.terms = np.zeros((num_envs, len(self.components)))
+        self.costs = dict.fromkeys(["geometry", *self.weights], 0.0)
+        self.calls = 0
+        self.prev_positions = np.zeros((num_envs, len(TRACKED_COLUMNS)))
+        self.has_prev = np.zeros(num_envs, dtype=bool)
+
+        # Point table reused every step; the goal mouths and origin never move
+        self._points = np.zeros((num_envs, NUM_POINTS, 2))
+        self._points[:, OWN_GOAL] = 10, height // 2
+        self._points[:, OPP_GOAL] = width - 10, height // 2
+        self._fixed_points = self._points[0, OWN_GOAL:VELOCITY].ravel().tolist()
+
+    def __call__(self, states, goals):
+        """
+        Compute the reward of every match after a step.
+
+        Components return signed terms that are added one by one, so the
+        running sum sees the same operations as the heuristic's ``+=`` and
+        ``-=``; conditional terms are ``value * mask``, which adds an exact
+        0.0 where the heuristic skips the term. A match that scored this step
+        is rewarded by the goal term alone.
+
+        Args:
+            states (np.ndarray): (N, STATE_SIZE) physics state array.
+            goals (np.ndarray): (N,) goal codes of this step.
+
+        Returns:
+            np.ndarray: (N,) float64 rewards.
+        """
+        start = time.perf_counter()
+        single = len(states) == 1
+        if single:
+            values = states[0].tolist()
+            current = list(_tracked_values(values))
+            goal = int(goals[0])
+            scored = goal != physics.NO_GOAL
+            geometry = self._measure_single(values, goal, current, scored)
+        else:
+            current = states[:, TRACKED_COLUMNS].astype(np.float64)
+            scored = goals != physics.NO_GOAL
+            geometry = self._measure(states, goals, current, scored)
+        now = time.perf_counter()
+        self.costs["geometry"] += now - start
+
+        reward = None
+        terms = []
+        for name, component, weight in self.components:
+            start = now
+            term = None
+            for part in component(geometry):
+                if weight != 1.0:
+                    part = weight * part
+                term = part if term is None else term + part
+                reward = part if reward is None else reward + part
+            terms.append(term)
+            now = time.perf_counter()
+            self.costs[name] += now - start
+        self.calls += 1
+        if single:
+            return np.array([self._record_single(terms, reward, current, scored)])
+
+        for k, term in enumerate(terms):
+            self.terms[:, k] = term
+        rewards = np.zeros(len(states))
+        if reward is not None:
+            rewards[:] = reward
+
+        # The goal reward replaces everything else, and freezes the history
+        if np.count_nonzero(scored):
+            if "goal" in self.weights:
+                goal_column = list(self.weights).index("goal")
+                goal_terms = self.terms[scored, goal_column]
+                rewards[scored] = goal_terms
+                self.terms[scored] = 0.0
+                self.terms[scored, goal_column] = goal_terms
+            self.prev_positions[~scored] = current[~scored]
+        else:
+            self.prev_positions[:] = current
+        return rewards
+
+    def _record_single(self, terms, reward, current, scored):
+        """
+        Store the terms and history of a single match, like the end of
+        __call__ does for a batch.
+
+        Args:
+            terms (list): Weighted value of each component.
+            reward (float): Sum of the terms; None without components.
+            current (list[float]): Tracked positions of this step.
+            scored (bool): Whether the match scored this step.
+
+        Returns:
+            float: Reward of the match.
+        """
+        if scored:
+            if "goal" in self.weights:
+                goal_column = list(self.weights).index("goal")
+                reward = terms[goal_column]
+                terms = [0.0] * len(terms)
+                terms[goal_column] = reward
+        else:
+            self.prev_positions[0] = current
+        self.terms[0] = terms
+        return 0.0 if reward is None else reward
+
+    def _measure(self, states, goals, current, scored):
+        """
+        Compute the distances and angles shared by the components.
+
+        Args:
+            states (np.ndarray): (N, STATE_SIZE) physics state array.
+            goals (np.ndarray): (N,) goal codes of this step.
+            current (np.ndarray): (N, 10) float64 tracked positions.
+            scored (np.ndarray): (N,) whether each match scored this step.
+
+        Returns:
+            dict: Geometry of the step, see _geometry.
+        """
+        # Matches seen for the first time start from their current positions
+        if np.count_nonzero(self.has_prev) < len(self.has_prev):
+            first = ~self.has_prev & ~scored
+            self.prev_positions[first] = current[first]
+            self.has_prev |= first
+
+        points = self._points
+        points[:, :PREV_RED1] = current.reshape(-1, 5, 2)
+        points[:, PREV_RED1:OWN_GOAL] = self.prev_positions[:, 4:].reshape(-1, 3, 2)
+        points[:, VELOCITY] = states[:, physics.BALL_VX : physics.BALL_VY + 1]
+        vectors = points[:, VECTORS[:, 0]] - points[:, VECTORS[:, 1]]
+        norms = _norms(vectors).T
+        angle_vectors = vectors[:, ANGLE_VECTORS]
+        angles = np.arctan2(angle_vectors[..., 1], angle_vectors[..., 0])
+        angle_diffs = _angle_difference(angles[:, 0::2], angles[:, 1::2]).T
+        return self._geometry(goals, current[:, 8], norms, angle_diffs)
+
+    def _measure_single(self, values, goal, current, scored):
+        """
+        _measure for a single match on Python floats: the per-match axis is
+        dropped, and the components do their arithmetic on floats, which
+        costs a fraction of the same operation on a one-element array and
+        rounds identically. Only the norms and angles go through NumPy, one
+        call each, as their rounding depends on its routines.
+
+        Args:
+            values (list[float]): State row of the match.
+            goal (int): Goal code of this step.
+            current (list[float]): Tracked positions.
+            scored (bool): Whether the match scored this step.
+
+        Returns:
+            dict: Geometry of the step, see _geometry.
+        """
+        if not self.has_prev[0] and not scored:
+            self.prev_positions[0] = current
+            self.has_prev[0] = True
+
+        points = [
+            *current,
+            *self.prev_positions[0, 4:].tolist(),
+            *self._fixed_points,
+            values[physics.BALL_VX],
+            values[physics.BALL_VY],
+        ]
+        vectors = np.array(
+            [points[head] - points[tail] for head, tail in _COORDINATE_PAIRS]
+        ).reshape(-1, 2)
+        norms = _norms(vectors).tolist()
+        angles = np.arctan2(vectors[:, 1], vectors[:, 0]).tolist()
+        angle_diffs = [_angle_difference(angles[a], angles[b]) for a, b in _ANGLE_PAIRS]
+        return self._geometry(goal, current[8], norms, angle_diffs)
+
+    def _geometry(self, goals, ball_x, norms, angle_diffs):
+        """
+        Geometry passed to the components, for a batch or, with floats in
+        place of the per-match arrays, for a single match.
+
+        Returns:
+            dict: See the keys below.
+        """
+        radius = physics.PLAYER_RADIUS
+        return {
+            # (N,) goal codes
+            "goals": goals,
+            "width": self.width,
+            "field_diagonal": self.field_diagonal,
+            # (N,) ball x coordinate
+            "ball_x": ball_x,
+            # (13, N) norms of VECTORS
+            "norms": norms,
+            # (4, N) toward opponent goal, toward own goal, red1 and red2
+            # intercepting
+            "angle_diffs": angle_diffs,
+            "blue_possession": (norms[BLUE1_BALL] < radius * 1.5)
+            | (norms[BLUE2_BALL] < radius * 1.5),
+        }
+
+    def term_infos(self, terms=None):
+        """
+        Per-match breakdown of the last reward.
+
+        Args:
+            terms (np.ndarray): (N, K) terms to report instead of the last
+                call's, e.g. summed over the ticks of a skipped frame.
+
+        Returns:
+            list[dict]: For each match, component name to weighted value.
+        """
+        names = list(self.weights)
+        if terms is None:
+            terms = self.terms
+        return [dict(zip(names, row)) for row in terms.tolist()]
+
+    def get_state(self, rows=None):
+        """
+        Copy of the reward history of some matches.
+
+        Args:
+            rows (np.ndarray): Indices of the matches; None for all of them.
+
+        Returns:
+            np.ndarray: (n, HISTORY_SIZE) float64, the previous positions
+                followed by has_prev as 0.0 or 1.0.
+        """
+        if rows is None:
+            rows = slice(None)
+        state = np.empty((len(self.has_prev), HISTORY_SIZE))[rows]
+        state[:, :-1] = self.prev_positions[rows]
+        state[:, -1] = self.has_prev[rows]
+        return state
+
+    def set_state(self, state, rows=None):
+        """
+        Restore a reward history taken by get_state.
+
+        Args:
+            state (np.ndarray): (n, HISTORY_SIZE) histories, or one history
+                broadcast to every row.
+            rows (np.ndarray): Indices of the matches; None for all of them.
+        """
+        if rows is None:
+            rows = slice(None)
+        state = np.asarray(state)
+        self.prev_positions[rows] = state[..., :-1]
+        self.has_prev[rows] = state[..., -1] != 0
+
+    def get_costs(self):
+        """
+        Average compute time of the geometry and of each component.
+
+        Returns:
+            dict: Name to microseconds per call (one call covers all N
+                matches).
+        """
+        calls = max(self.calls, 1)
+        return {name: 1e6 * total / calls for name, total in self.costs.items()}
@@ -0,0 +1,100 @@
+"""
+selfplay.py
+
+Self-play against a pool of frozen checkpoints.
+
+SelfPlayVecEnv hands the learner the two blue players only; the red players
+are driven by past policies loaded from checkpoints, one opponent drawn per
+episode. Every opponent plays from the mirrored view of the game (as blue,
+see physics.mirror_observations), so both the checkpoints of ordinary
+training runs, which control all four players, and those of self-play runs,
+which control blue only, make valid opponents: the actions of their blue
+players move the red team.
+
+The pool (opponents.py) is loaded once, in a worker process by default; an
+inference server socket (see inference.py) in the pool is an opponent too, and
+so is a NumPy export (see numpy_policy.py). The observations
+are sent to it as soon as a step returns, so the opponents' forward passes
+(one batch per opponent) run while the learner computes its own actions.
+"""
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.vec_env import VecEnvWrapper
+
+from opponents import LEARNER_PLAYERS, OpponentPool, OpponentWorker
+from simulation import physics
+
+
+class SelfPlayVecEnv(VecEnvWrapper):
+    """
+    VecEnv wrapper giving the learner the blue team only, while frozen
+    opponents drawn from a checkpoint pool play red.
+
+    Wrap the raw environments (vector observations), below VecRewardTracker
+    and VecNormalize. The info of a finished episode holds the index of the
+    opponent it was played against under ``"opponent"``.
+    """
+
+    def __init__(
+        self,
+        venv,
+        opponents,
+        seed=None,
+        deterministic=False,
+        worker=True,
+        vecnormalize=None,
+    ):
+        """
+        Args:
+            venv (VecEnv): Environments whose action controls all 4 players.
+            opponents (list[str]): Checkpoints of the pool, see
+                OpponentPool.
+            seed (int): Seed of the opponent draws.
+            deterministic (bool): Opponents take their most likely actions.
+            worker (bool): Run the opponents in a separate process; False
+                runs them in this one, after the learner.
+            vecnormalize (str): VecNormalize file of the checkpoints saved
+                without statistics, see OpponentPool.
+        """
+        if venv.observation_space.shape != (physics.OBSERVATION_SIZE,):
+            raise ValueError("Self-play needs vector observations")
+        blue = venv.action_space.nvec[:LEARNER_PLAYERS]
+        super().__init__(venv, action_space=spaces.MultiDiscrete(blue))
+        width = venv.get_attr("width", [0])[0]
+        pool_class = OpponentWorker if worker else OpponentPool
+        self.pool = pool_class(opponents, width, deterministic, vecnormalize)
+        self.rng = np.random.default_rng(seed)
+        self.assignment = np.zeros(self.num_envs, dtype=np.int64)
+
+    def _draw(self, rows):
+        self.assignment[rows] = self.rng.integers(len(self.pool), size=len(rows))
+
+    def reset(self):
+        """
+        Reset all environments and draw a new opponent for each.
+
+        Returns:
+            np.ndarray: Initial observations.
+        """
+        observations = self.venv.reset()
+        self._draw(np.arange(self.num_envs))
+        self.pool.submit(observations, self.assignment.copy())
+        return observations
+
+    def step_async(self, actions):
+        red = self.pool.receive()
+        self.venv.step_async(np.concatenate([actions, red], axis=1))
+
+    def step_wait(self):
+        observations, rewards, dones, infos = self.venv.step_wait()
+        done_rows = np.flatnonzero(dones)
+        if len(done_rows):
+            for i in done_rows:
+                infos[i]["opponent"] = int(self.assignment[i])
+            self._draw(done_rows)
+        self.pool.submit(observations, self.assignment.copy())
+        return observations, rewards, dones, infos
+
+    def close(self):
+        self.pool.close()
+        self.venv.close()
@@ -0,0 +1,907 @@
+"""
+physics.py
+
+Array-based physics core for the 2v2 soccer game.
+
+The complete state of N matches is held in a single contiguous float32 array
+of shape (N, STATE_SIZE): player positions, facing angles and frozen flags,
+ball position and velocity, scores, the kickoff flags and the simulated frame
+counter. Every function in this module operates on such an array in place and
+advances all N matches at once, so the same code drives a single environment
+(N = 1) and a batch of matches. The Player, Ball and SoccerField classes in
+Visual_Components are thin views onto one row of this array used for drawing.
+
+Because the whole game lives in one small array, a state snapshot is a plain
+array copy.
+"""
+
+import itertools
+import operator
+import struct
+
+import numpy as np
+
+# === State layout ===
+NUM_PLAYERS = 4
+PLAYER_FIELDS = 4
+P_X, P_Y, P_ANGLE, P_FROZEN = range(PLAYER_FIELDS)
+
+BALL_X = NUM_PLAYERS * PLAYER_FIELDS
+BALL_Y = BALL_X + 1
+BALL_VX = BALL_X + 2
+BALL_VY = BALL_X + 3
+BALL_TOUCHED = BALL_X + 4  # Team code of the last player to touch the ball
+RED_SCORE = BALL_X + 5
+BLUE_SCORE = BALL_X + 6
+KICKOFF = BALL_X + 7  # 1 once the kickoff after a reset has been taken
+SCORING_TEAM = BALL_X + 8  # Team code frozen until the other team kicks off
+FRAME = BALL_X + 9  # Simulated frames since the start of the match
+STATE_SIZE = BALL_X + 10
+
+# === Team and goal codes ===
+TEAM_NONE, TEAM_BLUE, TEAM_RED = 0, 1, 2
+TEAM_NAMES = {TEAM_NONE: None, TEAM_BLUE: "blue", TEAM_RED: "red"}
+TEAM_CODES = {name: code for code, name in TEAM_NAMES.items()}
+PLAYER_TEAMS = np.array([TEAM_BLUE, TEAM_BLUE, TEAM_RED, TEAM_RED])
+
+NO_GOAL, BLUE_GOAL, BLUE_OWN_GOAL, RED_GOAL, RED_OWN_GOAL = range(5)
+GOAL_MESSAGES = {
+    NO_GOAL: "",
+    BLUE_GOAL: "Blue: Goal",
+    BLUE_OWN_GOAL: "Blue: Own Goal",
+    RED_GOAL: "Red: Goal",
+    RED_OWN_GOAL: "Red: Own Goal",
+}
+GOAL_CODES = {message: code for code, message in GOAL_MESSAGES.items()}
+
+# === Physical constants ===
+PLAYER_RADIUS = 20
+PLAYER_SPEED = 7
+BALL_RADIUS = 10
+BALL_FRICTION = 0.98
+BALL_MIN_VELOCITY = 0.1
+KICK_SPEED = 5
+GOAL_HEIGHT = 100
+GOAL_LINE = 20  # Depth of the goal posts from the field edge
+SIDE_BUFFER = 10  # Players keep this distance from the left/right edges
+
+INITIAL_PLAYER_POSITIONS = np.array(
+    [[150, 200], [250, 150], [450, 250], [550, 200]], dtype=np.float32
+)
+
+# Movement direction for each discrete action: up, down, left, right, stay
+ACTION_DIRECTIONS = np.array(
+    [[0, -1], [0, 1], [-1, 0], [1, 0], [0, 0]], dtype=np.float32
+)
+
+# State columns making up the first 14 entries of the observation vector
+OBSERVATION_INDEX = np.array(
+    [
+        P_X,
+        P_Y,
+        PLAYER_FIELDS + P_X,
+        PLAYER_FIELDS + P_Y,
+        2 * PLAYER_FIELDS + P_X,
+        2 * PLAYER_FIELDS + P_Y,
+        3 * PLAYER_FIELDS + P_X,
+        3 * PLAYER_FIELDS + P_Y,
+        BALL_X,
+        BALL_Y,
+        BALL_VX,
+        BALL_VY,
+        RED_SCORE,
+        BLUE_SCORE,
+    ]
+)
+OBSERVATION_SIZE = len(OBSERVATION_INDEX) + 1
+
+
+def player_column(player_index, field):
+    """
+    Column of a player's field in the state array.
+
+    Args:
+        player_index (int): Index of the player (0-1 blue, 2-3 red).
+        field (int): One of P_X, P_Y, P_ANGLE, P_FROZEN.
+
+    Returns:
+        int: Column index.
+    """
+    return player_index * PLAYER_FIELDS + field
+
+
+PLAYER_X = np.array([player_column(i, P_X) for i in range(NUM_PLAYERS)])
+PLAYER_Y = np.array([player_column(i, P_Y) for i in range(NUM_PLAYERS)])
+PLAYER_FROZEN = np.array([player_column(i, P_FROZEN) for i in range(NUM_PLAYERS)])
+
+# Per-action displacement, whether the action moves, and the facing angle
+# after moving (atan2(-dy, dx) in degrees)
+ACTION_STEPS = ACTION_DIRECTIONS * PLAYER_SPEED
+ACTION_MOVES = (ACTION_DIRECTIONS != 0).any(axis=1)
+ACTION_ANGLES = np.array([90, 270, 180, 0, 0], dtype=np.float32)
+
+# Pairs (i, j) of distinct players, and the same against a doubled player list
+_OTHERS = ~np.eye(NUM_PLAYERS, dtype=bool)
+_OTHERS_TWICE = np.concatenate([_OTHERS, _OTHERS], axis=1)
+
+# Single-match fast paths work on Python floats. A distance test there
+# counts as close within this margin (squared pixels) of the threshold,
+# more than the float32 rounding of the array code, so only a certain "no"
+# skips the array code and every borderline case is left to it
+_ROUNDING_MARGIN = 1.0
+_STEPS = ACTION_STEPS.tolist()
+_MOVES = ACTION_MOVES.tolist()
+_ANGLES = ACTION_ANGLES.tolist()
+_FRICTION = float(np.float32(BALL_FRICTION))
+# Packing two floats as float32 rounds them like storing into the state array
+_FLOAT32_PAIR = struct.Struct("2f")
+_observation_values = operator.itemgetter(*OBSERVATION_INDEX.tolist())
+
+
+def players_view(states):
+    """
+    View of the player records of every match.
+
+    Args:
+        states (np.ndarray): State array.
+
+    Returns:
+        np.ndarray: (N, NUM_PLAYERS, PLAYER_FIELDS) view; writes go to states.
+    """
+    return states[:, : NUM_PLAYERS * PLAYER_FIELDS].reshape(
+        len(states), NUM_PLAYERS, PLAYER_FIELDS
+    )
+
+
+def _positions(values):
+    """
+    (x, y) of every player, from the player fields of a single match as a
+    list of Python floats.
+    """
+    return list(zip(values[P_X::PLAYER_FIELDS], values[P_Y::PLAYER_FIELDS]))
+
+
+def _near(point, others, reach):
+    """
+    Whether a point may be closer than ``reach`` to any of the others in the
+    float32 array code; False is certain.
+    """
+    x, y = point[0], point[1]
+    limit = reach * reach + _ROUNDING_MARGIN
+    for other_x, other_y in others:
+        dx = x - other_x
+        dy = y - other_y
+        if dx * dx + dy * dy < limit:
+            return True
+    return False
+
+
+def _any_near(points, others, reach):
+    """
+    Whether any point may be closer than ``reach`` to an other point of a
+    different index, like _near; None points are skipped.
+    """
+    limit = reach * reach + _ROUNDING_MARGIN
+    for i, point in enumerate(points):
+        if point is None:
+            continue
+        x, y = point
+        for j, (other_x, other_y) in enumerate(others):
+            dx = x - other_x
+            dy = y - other_y
+            if i != j and dx * dx + dy * dy < limit:
+                return True
+    return False
+
+
+def _crowded(points, reach):
+    """
+    Whether any two of the points may be closer than ``reach``, like _near.
+    """
+    limit = reach * reach + _ROUNDING_MARGIN
+    for (x, y), (other_x, other_y) in itertools.combinations(points, 2):
+        dx = x - other_x
+        dy = y - other_y
+        if dx * dx + dy * dy < limit:
+            return True
+    return False
+
+
+def new_states(n=1, width=600, height=400):
+    """
+    Allocate the state of n matches at kickoff.
+
+    Args:
+        n (int): Number of matches.
+        width (int): Field width in pixels.
+        height (int): Field height in pixels.
+
+    Returns:
+        np.ndarray: State array of shape (n, STATE_SIZE), dtype float32.
+    """
+    states = np.zeros((n, STATE_SIZE), dtype=np.float32)
+    states[:, PLAYER_X] = INITIAL_PLAYER_POSITIONS[:, 0]
+    states[:, PLAYER_Y] = INITIAL_PLAYER_POSITIONS[:, 1]
+    states[:, BALL_X] = width // 2
+    states[:, BALL_Y] = height // 2
+    return states
+
+
+def _goal_mouth(height):
+    """
+    Vertical extent of the goal openings.
+
+    Returns:
+        tuple: (goal_top, goal_bottom) in pixels.
+    """
+    goal_top = (height - GOAL_HEIGHT) // 2
+    return goal_top, goal_top + GOAL_HEIGHT
+
+
+def kickoff(states, player_index):
+    """
+    Start play in matches where the given player may move but the kickoff
+    has not been taken yet. The conceding team's first move unfreezes the
+    team that scored (or everybody at the start of a match).
+
+    Args:
+        states (np.ndarray): State array, modified in place.
+        player_index (int): Index of the player about to act.
+    """
+    starting = (states[:, player_column(player_index, P_FROZEN)] == 0) & (
+        states[:, KICKOFF] == 0
+    )
+    if not starting.any():
+        return
+
+    scoring = states[:, SCORING_TEAM]
+    unfreeze = starting[:, None] & (
+        (scoring[:, None] == TEAM_NONE) | (scoring[:, None] == PLAYER_TEAMS)
+    )
+    states[:, PLAYER_FROZEN] = np.where(unfreeze, 0, states[:, PLAYER_FROZEN])
+    states[starting, KICKOFF] = 1
+    states[starting, SCORING_TEAM] = TEAM_NONE
+
+
+def move_player(states, player_index, directions, width, height):
+    """
+    Move one player in every match, cancelling the move if it would leave
+    the field or run into another player.
+
+    Args:
+        states (np.ndarray): State array, modified in place.
+        player_index (int): Index of the player to move.
+        directions (np.ndarray): (N, 2) movement directions in {-1, 0, 1}.
+        width (int): Field width in pixels.
+        height (int): Field height in pixels.
+    """
+    col_x = player_column(player_index, P_X)
+    col_y = player_column(player_index, P_Y)
+    dx = directions[:, 0]
+    dy = directions[:, 1]
+
+    new_x = states[:, col_x] + dx * PLAYER_SPEED
+    new_y = states[:, col_y] + dy * PLAYER_SPEED
+
+    # Field boundaries, with a buffer on the sides so players don't get stuck
+    ok = (
+        (states[:, player_column(player_index, P_FROZEN)] == 0)
+        & (new_x - PLAYER_RADIUS >= SIDE_BUFFER)
+        & (new_x + PLAYER_RADIUS <= width - SIDE_BUFFER)
+        & (new_y - PLAYER_RADIUS >= 0)
+        & (new_y + PLAYER_RADIUS <= height)
+    )
+
+    # Cancel the movement if it would collide with any other player
+    dist = np.sqrt(
+        (new_x[:, None] - states[:, PLAYER_X]) ** 2
+        + (new_y[:, None] - states[:, PLAYER_Y]) ** 2
+    )
+    dist[:, player_index] = np.inf
+    ok &= (dist >= PLAYER_RADIUS * 2).all(axis=1)
+
+    states[:, col_x] = np.where(ok, new_x, states[:, col_x])
+    states[:, col_y] = np.where(ok, new_y, states[:, col_y])
+
+    # Face the direction of movement
+    turned = ok & ((dx != 0) | (dy != 0))
+    if turned.any():
+        col_angle = player_column(player_index, P_ANGLE)
+        angle = np.degrees(np.arctan2(-dy, dx)) % 360
+        states[:, col_angle] = np.where(turned, angle, states[:, col_angle])
+
+
+def take_actions(states, actions, width, height):
+    """
+    Apply one discrete action per player in every match. Players act in
+    order, each taking a pending kickoff and then moving.
+
+    Moves are first resolved for all players at once. Only matches where a
+    kickoff is pending or where the players' paths interact (so the move
+    order matters) are re-run player by player.
+
+    Args:
+        states (np.ndarray): State array, modified in place.
+        actions (np.ndarray): (N, NUM_PLAYERS) actions in [0, 4]; 0 up,
+            1 down, 2 left, 3 right, 4 stay.
+        width (int): Field width in pixels.
+        height (int): Field height in pixels.
+    """
+    if len(states) == 1 and _take_actions_single(states, actions, width, height):
+        return
+
+    actions = np.asarray(actions).reshape(len(states), NUM_PLAYERS)
+    players = players_view(states)
+    position = players[:, :, P_X : P_Y + 1]
+    target = position + ACTION_STEPS[actions]
+
+    # Field boundaries, with a buffer on the sides so players don't get stuck
+    low = (PLAYER_RADIUS + SIDE_BUFFER, PLAYER_RADIUS)
+    high = (width - SIDE_BUFFER - PLAYER_RADIUS, height - PLAYER_RADIUS)
+    movable = (
+        ACTION_MOVES[actions]
+        & (players[:, :, P_FROZEN] == 0)
+        & ((target >= low) & (target <= high)).all(axis=-1)
+    )
+
+    # A move interacts with another player if it ends within reach of that
+    # player's current or target position; then the move order matters
+    both = np.concatenate([position, target], axis=1)
+    dx = target[:, :, None, 0] - both[:, None, :, 0]
+    dy = target[:, :, None, 1] - both[:, None, :, 1]
+    interacting = (dx * dx + dy * dy < (PLAYER_RADIUS * 2) ** 2) & _OTHERS_TWICE
+    interacting &= movable[:, :, None]
+    sequential = states[:, KICKOFF] == 0
+    if interacting.any():
+        sequential |= interacting.any(axis=(1, 2))
+
+    moved = movable & ~sequential[:, None]
+    if moved.any():
+        position[...] = np.where(moved[:, :, None], target, position)
+        players[:, :, P_ANGLE] = np.where(
+            moved, ACTION_ANGLES[actions], players[:, :, P_ANGLE]
+        )
+
+    if sequential.any():
+        rows = np.flatnonzero(sequential)
+        subset = states[rows]
+        for player_index in range(NUM_PLAYERS):
+            kickoff(subset, player_index)
+            action = actions[rows, player_index]
+            if (action != 4).any():
+                move_player(
+                    subset, player_index, ACTION_DIRECTIONS[action], width, height
+                )
+        states[rows] = subset
+
+
+def _take_actions_single(states, actions, width, height):
+    """
+    take_actions for a single match on Python floats, for the common case
+    where the kickoff has been taken and no move interacts with another
+    player, which the array code resolves all at once too.
+
+    Returns:
+        bool: Whether the actions were applied; False leaves the state
+            untouched for the array code.
+    """
+    row = states[0]
+    if row[KICKOFF] == 0:
+        return False
+    actions = np.asarray(actions).reshape(NUM_PLAYERS).tolist()
+    values = row[: NUM_PLAYERS * PLAYER_FIELDS].tolist()
+    positions = _positions(values)
+    low_x, low_y = PLAYER_RADIUS + SIDE_BUFFER, PLAYER_RADIUS
+    high_x, high_y = width - SIDE_BUFFER - PLAYER_RADIUS, height - PLAYER_RADIUS
+
+    targets = []
+    moving = []  # Target of each movable player, None for the others
+    for (x, y), action, frozen in zip(
+        positions, actions, values[P_FROZEN::PLAYER_FIELDS]
+    ):
+        step_x, step_y = _STEPS[action]
+        # Exact sums of float32 positions and whole steps: the bounds are
+        # whole pixels, and storing rounds them like the float32 array sums
+        target_x = x + step_x
+        target_y = y + step_y
+        targets.append((target_x, target_y))
+        movable = (
+            _MOVES[action]
+            and frozen == 0
+            and low_x <= target_x <= high_x
+            and low_y <= target_y <= high_y
+        )
+        moving.append((target_x, target_y) if movable else None)
+    if not any(moving):
+        return True
+
+    # Same interaction test as the array code: the move order only matters
+    # if a move ends within reach of another player's position or target.
+    # Players further apart than reach and both steps cannot interact
+    reach = PLAYER_RADIUS * 2
+    if _crowded(positions, reach + 2 * PLAYER_SPEED + 1) and (
+        _any_near(moving, positions, reach) or _any_near(moving, targets, reach)
+    ):
+        return False
+
+    for i, target in enumerate(moving):
+        if target is not None:
+            start = i * PLAYER_FIELDS
+            values[start + P_X], values[start + P_Y] = target
+            values[start + P_ANGLE] = _ANGLES[actions[i]]
+    row[: NUM_PLAYERS * PLAYER_FIELDS] = values
+    return True
+
+
+def separate_pair(states, i, j):
+    """
+    Push players i and j apart equally where they overlap.
+
+    Args:
+        states (np.ndarray): State array, modified in place.
+        i (int): Index of the first player.
+        j (int): Index of the second player.
+    """
+    xi, yi = player_column(i, P_X), player_column(i, P_Y)
+    xj, yj = player_column(j, P_X), player_column(j, P_Y)
+    dx = states[:, xi] - states[:, xj]
+    dy = states[:, yi] - states[:, yj]
+    distance = np.sqrt(dx**2 + dy**2)
+
+    hit = (distance < PLAYER_RADIUS * 2) & (distance > 0)
+    if not hit.any():
+        return
+
+    half_overlap = np.where(hit, (PLAYER_RADIUS * 2 - distance) / 2, 0)
+    distance = np.where(hit, distance, 1)
+    push_x = dx / distance * half_overlap
+    push_y = dy / distance * half_overlap
+    states[:, xi] += push_x
+    states[:, yi] += push_y
+    states[:, xj] -= push_x
+    states[:, yj] -= push_y
+
+
+def separate_players(states):
+    """
+    Resolve player-player overlaps for every ordered pair of players.
+
+    Args:
+        states (np.ndarray): State array, modified in place.
+    """
+    # Fast path: movement already prevents overlaps in almost every frame
+    if len(states) == 1:
+        positions = _positions(states[0, : NUM_PLAYERS * PLAYER_FIELDS].tolist())
+        if not _crowded(positions, PLAYER_RADIUS * 2):
+            return
+
+    players = players_view(states)
+    dx = players[:, :, None, P_X] - players[:, None, :, P_X]
+    dy = players[:, :, None, P_Y] - players[:, None, :, P_Y]
+    overlapping = (dx * dx + dy * dy < (PLAYER_RADIUS * 2) ** 2) & _OTHERS
+    if not overlapping.any():
+        return
+
+    overlapping = overlapping.any(axis=(1, 2))
+    rows = np.flatnonzero(overlapping)
+    subset = states[rows]
+    for i in range(NUM_PLAYERS):
+        for j in range(NUM_PLAYERS):
+            if i != j:
+                separate_pair(subset, i, j)
+    states[rows] = subset
+
+
+def move_ball(states):
+    """
+    Advance the ball by its velocity and apply friction, stopping velocity
+    components below the minimum threshold.
+
+    Args:
+        states (np.ndarray): State array, modified in place.
+    """
+    if len(states) == 1:
+        row = states[0]
+        row[BALL_X : BALL_VY + 1] = _ball_step(*row[BALL_X : BALL_VY + 1].tolist())
+        return
+
+    states[:, BALL_X : BALL_Y + 1] += states[:, BALL_VX : BALL_VY + 1]
+
+    velocity = states[:, BALL_VX : BALL_VY + 1]
+    velocity *= BALL_FRICTION
+    velocity[np.abs(velocity) < BALL_MIN_VELOCITY] = 0
+
+
+def _ball_step(x, y, vx, vy):
+    """
+    move_ball for a single match on Python floats.
+
+    Returns:
+        tuple: New (x, y, vx, vy); the positions round like the float32 sums
+            of the array code once stored.
+    """
+    # Products rounded like the float32 array code
+    new_vx, new_vy = _FLOAT32_PAIR.unpack(
+        _FLOAT32_PAIR.pack(vx * _FRICTION, vy * _FRICTION)
+    )
+    return (
+        x + vx,
+        y + vy,
+        new_vx if abs(new_vx) >= BALL_MIN_VELOCITY else 0.0,
+        new_vy if abs(new_vy) >= BALL_MIN_VELOCITY else 0.0,
+    )
+
+
+def _ball_settled(x, y, vx, vy, width, height):
+    """
+    Whether bounce_ball leaves the ball of a single match alone: it is
+    inside the field and not crawling.
+    """
+    inside = (
+        BALL_RADIUS <= x <= width - BALL_RADIUS
+        and BALL_RADIUS <= y <= height - BALL_RADIUS
+    )
+    return inside and not (0 < abs(vx) < 0.1 or 0 < abs(vy) < 0.1)
+
+
+def bounce_ball(states, width, height, rng=None):
+    """
+    Bounce the ball off the field edges, except through the goal openings,
+    and nudge a ball that is crawling but not stopped.
+
+    Args:
+        states (np.ndarray): State array, modified in place.
+        width (int): Field width in pixels.
+        height (int): Field height in pixels.
+        rng: Random source with a ``uniform`` method (default: np.random).
+    """
+    if len(states) == 1 and _ball_settled(
+        *states[0, BALL_X : BALL_VY + 1].tolist(), width, height
+    ):
+        return
+
+    rng = np.random if rng is None else rng
+    ball = states[:, BALL_X : BALL_Y + 1]
+    low = (BALL_RADIUS, BALL_RADIUS)
+    high = (width - BALL_RADIUS, height - BALL_RADIUS)
+    if ((ball < low) | (ball > high)).any():
+        _bounce_off_edges(states, width, height)
+
+    # Add small random movement if ball is moving very slowly but not stopped
+    velocity = states[:, BALL_VX : BALL_VY + 1]
+    speed = np.abs(velocity)
+    if ((speed > 0) & (speed < 0.1)).any():
+        crawling = (speed < 0.1).all(axis=1) & (speed > 0).any(axis=1)
+        velocity[crawling] += rng.uniform(-1, 1, size=(int(crawling.sum()), 2)) * 0.5
+
+
+def _bounce_off_edges(states, width, height):
+    """
+    Reflect the ball off the field edges outside the goal openings.
+
+    Args:
+        states (np.ndarray): State array, modified in place.
+        width (int): Field width in pixels.
+        height (int): Field height in pixels.
+    """
+    x = states[:, BALL_X]
+    y = states[:, BALL_Y]
+    outside_goal = ~((height // 2 - 50 <= y) & (y <= height // 2 + 50))
+
+    left = (x - BALL_RADIUS < 0) & outside_goal
+    right = (x + BALL_RADIUS > width) & outside_goal
+    states[left, BALL_X] = BALL_RADIUS
+    states[right, BALL_X] = width - BALL_RADIUS
+    states[left | right, BALL_VX] *= -1
+
+    top = y - BALL_RADIUS < 0
+    states[top, BALL_Y] = BALL_RADIUS
+    states[top, BALL_VY] *= -1
+    bottom = states[:, BALL_Y] + BALL_RADIUS > height
+    states[bottom, BALL_Y] = height - BALL_RADIUS
+    states[bottom, BALL_VY] *= -1
+
+
+def kick_ball(states, player_index):
+    """
+    Send the ball away from a player it touches at a fixed speed and record
+    the player's team as the last to touch it.
+
+    Args:
+        states (np.ndarray): State array, modified in place.
+        player_index (int): Index of the player.
+    """
+    dx = states[:, BALL_X] - states[:, player_column(player_index, P_X)]
+    dy = states[:, BALL_Y] - states[:, player_column(player_index, P_Y)]
+    distance = np.sqrt(dx**2 + dy**2)
+
+    hit = distance < BALL_RADIUS + PLAYER_RADIUS
+    if not hit.any():
+        return
+
+    magnitude = np.where(distance != 0, distance, 1)
+    states[hit, BALL_VX] = (dx / magnitude * KICK_SPEED)[hit]
+    states[hit, BALL_VY] = (dy / magnitude * KICK_SPEED)[hit]
+    states[hit, BALL_TOUCHED] = PLAYER_TEAMS[player_index]
+
+
+def unstick_ball(states, rng=None):
+    """
+    Push the ball out of any player it is stuck inside, adding a small random
+    velocity so it does not immediately collide again.
+
+    Args:
+        states (np.ndarray): State array, modified in place.
+        rng: Random source with a ``uniform`` method (default: np.random).
+    """
+    rng = np.random if rng is None else rng
+    for player_index in range(NUM_PLAYERS):
+        dx = states[:, BALL_X] - states[:, player_column(player_index, P_X)]
+        dy = states[:, BALL_Y] - states[:, player_column(player_index, P_Y)]
+        distance = np.sqrt(dx**2 + dy**2)
+
+        hit = (distance < BALL_RADIUS + PLAYER_RADIUS) & (distance > 0)
+        if not hit.any():
+            continue
+
+        overlap = (BALL_RADIUS + PLAYER_RADIUS - distance)[hit]
+        states[hit, BALL_X] += dx[hit] / distance[hit] * overlap
+        states[hit, BALL_Y] += dy[hit] / distance[hit] * overlap
+        states[hit, BALL_VX : BALL_VY + 1] += rng.uniform(
+            -1, 1, size=(int(hit.sum()), 2)
+        )
+
+
+def update(states, width, height, rng=None):
+    """
+    Run one physics tick after the players have moved: separate overlapping
+    players, move and bounce the ball, resolve ball-player collisions.
+
+    Args:
+        states (np.ndarray): State array, modified in place.
+        width (int): Field width in pixels.
+        height (int): Field height in pixels.
+        rng: Random source with a ``uniform`` method (default: np.random).
+    """
+    if len(states) == 1 and _update_single(states, width, height):
+        return
+
+    separate_players(states)
+    move_ball(states)
+    bounce_ball(states, width, height, rng)
+
+    # Fast path: skip the per-player collision passes if the ball is clear
+    if len(states) == 1:
+        values = states[0, : BALL_Y + 1].tolist()
+        ball = values[BALL_X:]
+        positions = _positions(values[:BALL_X])
+        if not _near(ball, positions, BALL_RADIUS + PLAYER_RADIUS):
+            return
+
+    players = players_view(states)
+    dx = states[:, BALL_X, None] - players[:, :, P_X]
+    dy = states[:, BALL_Y, None] - players[:, :, P_Y]
+    touching = dx * dx + dy * dy < (BALL_RADIUS + PLAYER_RADIUS) ** 2
+    if not touching.any():
+        return
+
+    touching = touching.any(axis=1)
+    rows = np.flatnonzero(touching)
+    subset = states[rows]
+    for player_index in range(NUM_PLAYERS):
+        kick_ball(subset, player_index)
+    unstick_ball(subset, rng)
+    states[rows] = subset
+
+
+def _update_single(states, width, height):
+    """
+    update for a single match on Python floats, for the common tick where no
+    players overlap and the moved ball stays inside the field, not crawling
+    and clear of every player.
+
+    Returns:
+        bool: Whether the tick was applied; False leaves the state untouched
+            for the array code.
+    """
+    row = states[0]
+    values = row[: BALL_VY + 1].tolist()
+    positions = _positions(values[:BALL_X])
+    if _crowded(positions, PLAYER_RADIUS * 2):
+        return False
+    ball = _ball_step(*values[BALL_X:])
+    if not _ball_settled(*ball, width, height) or _near(
+        ball, positions, BALL_RADIUS + PLAYER_RADIUS
+    ):
+        return False
+    row[BALL_X : BALL_VY + 1] = ball
+    return True
+
+
+def reset_positions(states, width, height, mask=None):
+    """
+    Return the ball to the center and players to their initial positions,
+    and require a new kickoff.
+
+    Args:
+        states (np.ndarray): State array, modified in place.
+        width (int): Field width in pixels.
+        height (int): Field height in pixels.
+        mask (np.ndarray): Optional (N,) boolean selecting matches to reset.
+    """
+    rows = slice(None) if mask is None else mask
+    states[rows, BALL_X] = width // 2
+    states[rows, BALL_Y] = height // 2
+    states[rows, BALL_VX] = 0
+    states[rows, BALL_VY] = 0
+    states[rows, KICKOFF] = 0
+    for player_index in range(NUM_PLAYERS):
+        states[rows, player_column(player_index, P_X)] = INITIAL_PLAYER_POSITIONS[
+            player_index, 0
+        ]
+        states[rows, player_column(player_index, P_Y)] = INITIAL_PLAYER_POSITIONS[
+            player_index, 1
+        ]
+
+
+def check_goals(states, width, height):
+    """
+    Detect goals, update the scores, reset positions and freeze the scoring
+    team until the other team kicks off.
+
+    Args:
+        states (np.ndarray): State array, modified in place.
+        width (int): Field width in pixels.
+        height (int): Field height in pixels.
+
+    Returns:
+        np.ndarray: (N,) goal codes, NO_GOAL where nothing happened.
+    """
+    codes = np.zeros(len(states), dtype=np.int8)
+    if len(states) == 1:
+        # Clear of both goal lines, with a pixel to spare for rounding
+        x = float(states[0, BALL_X])
+        if GOAL_LINE + 1 < x - BALL_RADIUS and x + BALL_RADIUS < width - GOAL_LINE - 1:
+            return codes
+
+    x = states[:, BALL_X]
+    left_line = x - BALL_RADIUS <= GOAL_LINE
+    right_line = ~left_line & (x + BALL_RADIUS >= width - GOAL_LINE)
+    if not (left_line.any() or right_line.any()):
+        return codes
+
+    goal_top, goal_bottom = _goal_mouth(height)
+    y = states[:, BALL_Y]
+    in_mouth = (goal_top <= y) & (y <= goal_bottom)
+    left = left_line & in_mouth
+    right = right_line & in_mouth
+    if not (left.any() or right.any()):
+        return codes
+
+    touched = states[:, BALL_TOUCHED]
+    codes[left & (touched == TEAM_BLUE)] = BLUE_OWN_GOAL
+    codes[left & (touched != TEAM_BLUE)] = RED_GOAL
+    codes[right & (touched == TEAM_RED)] = RED_OWN_GOAL
+    codes[right & (touched != TEAM_RED)] = BLUE_GOAL
+
+    states[left, RED_SCORE] += 1
+    states[right, BLUE_SCORE] += 1
+
+    scored = left | right
+    reset_positions(states, width, height, scored)
+
+    # The team credited with the event is frozen for the restart
+    frozen_team = np.where(
+        (codes == BLUE_GOAL) | (codes == BLUE_OWN_GOAL), TEAM_BLUE, TEAM_RED
+    )
+    frozen = scored[:, None] & (frozen_team[:, None] == PLAYER_TEAMS)
+    thawed = scored[:, None] & (frozen_team[:, None] != PLAYER_TEAMS)
+    states[:, PLAYER_FROZEN] = np.where(frozen, 1, states[:, PLAYER_FROZEN])
+    states[:, PLAYER_FROZEN] = np.where(thawed, 0, states[:, PLAYER_FROZEN])
+    states[scored, SCORING_TEAM] = frozen_team[scored]
+    return codes
+
+
+def reset_matches(states, rng, width, height, mask=None):
+    """
+    Start new matches: reset positions, place players at random in their own
+    half, and clear the scores and the game clock.
+
+    Args:
+        states (np.ndarray): State array, modified in place.
+        rng (np.random.Generator): Source of the random player positions.
+        width (int): Field width in pixels.
+        height (int): Field height in pixels.
+        mask (np.ndarray): Optional (N,) boolean selecting matches to reset.
+    """
+    rows = np.arange(len(states)) if mask is None else np.flatnonzero(mask)
+    reset_positions(states, width, height, rows)
+
+    # Random positions in each team's own half, drawn x then y per player
+    low = np.array(
+        [[50, 50], [50, 50], [width // 2 + 50, 50], [width // 2 + 50, 50]]
+    )
+    high = np.array(
+        [
+            [width // 2 - 50, height - 50],
+            [width // 2 - 50, height - 50],
+            [width - 50, height - 50],
+            [width - 50, height - 50],
+        ]
+    )
+    positions = low + (high - low) * rng.random((len(rows), NUM_PLAYERS, 2))
+    states[rows[:, None], PLAYER_X] = positions[:, :, 0]
+    states[rows[:, None], PLAYER_Y] = positions[:, :, 1]
+
+    states[rows, RED_SCORE] = 0
+    states[rows, BLUE_SCORE] = 0
+    states[rows, FRAME] = 0
+
+
+def elapsed_time(states, fps):
+    """
+    Simulated game time of every match.
+
+    Args:
+        states (np.ndarray): State array.
+        fps (int): Simulated frames per second.
+
+    Returns:
+        np.ndarray: (N,) elapsed seconds as float64.
+    """
+    return states[:, FRAME].astype(np.float64) * (1.0 / fps)
+
+
+def observe(states, game_duration, fps):
+    """
+    Build the 15-D observation vector of every match: player and ball
+    positions, ball velocity, scores and remaining game time.
+
+    Args:
+        states (np.ndarray): State array.
+        game_duration (float): Match length in seconds.
+        fps (int): Simulated frames per second.
+
+    Returns:
+        np.ndarray: (N, OBSERVATION_SIZE) float32 observations.
+    """
+    if len(states) == 1:
+        values = states[0].tolist()
+        remaining = game_duration - values[FRAME] * (1.0 / fps)
+        return np.array(
+            [(*_observation_values(values), remaining)], dtype=np.float32
+        )
+
+    observation = np.empty((len(states), OBSERVATION_SIZE), dtype=np.float32)
+    observation[:, :-1] = states[:, OBSERVATION_INDEX]
+    observation[:, -1] = game_duration - elapsed_time(states, fps)
+    return observation
+
+
+# The same game seen by the red team as if it were blue: the teams and the
+# scores swap places, and x positions and velocities are flipped
+_MIRROR_ORDER = np.array([4, 5, 6, 7, 0, 1, 2, 3, 8, 9, 10, 11, 13, 12, 14])
+_MIRROR_X = np.array([0, 2, 4, 6, 8])
+_MIRROR_VX = 10
+
+# Action of a mirrored player: left and right swap
+MIRRORED_ACTIONS = np.array([0, 1, 3, 2, 4])
+
+
+def mirror_observations(observations, width):
+    """
+    Turn observations around for the red team, so that a policy trained as
+    blue can play red.
+
+    Args:
+        observations (np.ndarray): (N, OBSERVATION_SIZE) observations.
+        width (int): Field width in pixels.
+
+    Returns:
+        np.ndarray: (N, OBSERVATION_SIZE) observations with the red players
+            first, attacking to the right.
+    """
+    mirrored = observations[:, _MIRROR_ORDER]
+    mirrored[:, _MIRROR_X] = width - mirrored[:, _MIRROR_X]
+    mirrored[:, _MIRROR_VX] *= -1
+    return mirrored
@@ -0,0 +1,248 @@
+"""
+raster.py
+
+Software rasterizer producing low-resolution pixel observations straight from
+the physics state array, without pygame.
+
+Every match is drawn as a single-channel uint8 image: the goal mouths on a
+black field, the players as discs with one gray level per team and the ball
+as a white disc on top. The discs are stamped with precomputed pixel offsets,
+so drawing N matches costs a handful of NumPy operations whatever N is.
+
+Frames are stacked channel-first in a ring buffer that holds every frame
+twice, so the last k frames of a match are always one contiguous slice and a
+new frame is written once instead of shifting the whole stack.
+"""
+
+import numpy as np
+
+from simulation import physics
+
+PIXEL_SIZE = (84, 84)  # (width, height) of the pixel observations
+FRAME_STACK = 4
+
+# Gray level of everything drawn on the (black) field
+GOAL_VALUE = 48
+BLUE_VALUE = 112
+RED_VALUE = 176
+BALL_VALUE = 255
+
+# Gray level of every player, by team
+_PLAYER_VALUES = np.where(
+    physics.PLAYER_TEAMS == physics.TEAM_BLUE, BLUE_VALUE, RED_VALUE
+).astype(np.uint8)
+
+# (y, x) state columns of the players and of the ball
+_PLAYER_COLUMNS = np.stack([physics.PLAYER_Y, physics.PLAYER_X])
+_BALL_COLUMNS = np.array([[physics.BALL_Y], [physics.BALL_X]])
+
+
+def _disc_offsets(radius_x, radius_y):
+    """
+    Pixel offsets covered by an ellipse centered on a pixel.
+
+    Args:
+        radius_x (float): Horizontal radius in pixels.
+        radius_y (float): Vertical radius in pixels.
+
+    Returns:
+        np.ndarray: (2, 1, K) int offsets, dy then dx, broadcasting against
+            (2, objects, 1) centers; always contains (0, 0), so even a
+            sub-pixel object is visible.
+    """
+    reach_x, reach_y = int(radius_x), int(radius_y)
+    dy, dx = np.mgrid[-reach_y : reach_y + 1, -reach_x : reach_x + 1]
+    inside = (dx / max(radius_x, 0.5)) ** 2 + (dy / max(radius_y, 0.5)) ** 2 <= 1
+    return np.stack([dy[inside], dx[inside]])[:, None, :]
+
+
+class Rasterizer:
+    """
+    Draws the matches of a state array as (N, height, width) uint8 images.
+    """
+
+    def __init__(self, width, height, size=PIXEL_SIZE):
+        """
+        Args:
+            width (int): Field width in pixels.
+            height (int): Field height in pixels.
+            size (tuple): (width, height) of the produced images.
+        """
+        self.size = tuple(size)
+        self.scale_x = size[0] / width
+        self.scale_y = size[1] / height
+        self.scale = np.array([[self.scale_y], [self.scale_x]], dtype=np.float32)
+        self.last_pixel = np.array([[[size[1] - 1]], [[size[0] - 1]]])
+
+        # Static background: the goal mouths on both sides of the field
+        self.background = np.zeros((size[1], size[0]), dtype=np.uint8)
+        goal_top, goal_bottom = physics._goal_mouth(height)
+        rows = slice(
+            int(goal_top * self.scale_y), int(np.ceil(goal_bottom * self.scale_y))
+        )
+        depth = max(int(round(physics.GOAL_LINE * self.scale_x)), 1)
+        self.background[rows, :depth] = GOAL_VALUE
+        self.background[rows, size[0] - depth :] = GOAL_VALUE
+
+        # Objects in drawing order: later ones are drawn on top
+        player = _disc_offsets(
+            physics.PLAYER_RADIUS * self.scale_x, physics.PLAYER_RADIUS * self.scale_y
+        )
+        ball = _disc_offsets(
+            physics.BALL_RADIUS * self.scale_x, physics.BALL_RADIUS * self.scale_y
+        )
+        self.layers = [
+            (_PLAYER_COLUMNS, player, _PLAYER_VALUES[:, None]),
+            (_BALL_COLUMNS, ball, BALL_VALUE),
+        ]
+
+    def __call__(self, states, out=None):
+        """
+        Draw every match.
+
+        Args:
+            states (np.ndarray): State array of N matches.
+            out (np.ndarray): Optional (N, height, width) uint8 array to draw
+                into, e.g. a slice of a frame stack.
+
+        Returns:
+            np.ndarray: (N, height, width) uint8 images.
+        """
+        width, height = self.size
+        n = len(states)
+        if out is None:
+            out = np.empty((n, height, width), dtype=np.uint8)
+        out[:] = self.background
+
+        # Pixel indices of shape (N, 2, objects, offsets), y then x; objects
+        # reaching past the border are clamped onto the edge pixels
+        rows = np.arange(n)[:, None, None]
+        for columns, offsets, value in self.layers:
+            centers = (states[:, columns] * self.scale).astype(np.intp)
+            pixels = centers[..., None] + offsets
+            np.maximum(pixels, 0, out=pixels)
+            np.minimum(pixels, self.last_pixel, out=pixels)
+            out[rows, pixels[:, 0], pixels[:, 1]] = value
+        return out
+
+
+class FrameStack:
+    """
+    Ring buffer of the last ``num_frames`` frames of N matches.
+
+    Frame t is written to slots t % k and t % k + k of a 2k-slot buffer, so
+    slots head .. head + k - 1 always hold the stack from oldest to newest.
+    """
+
+    def __init__(self, num_envs, frame_shape, num_frames=FRAME_STACK):
+        """
+        Args:
+            num_envs (int): Number of matches.
+            frame_shape (tuple): (height, width) of one frame.
+            num_frames (int): Frames per stack.
+        """
+        self.num_frames = num_frames
+        self.buffer = np.zeros(
+            (num_envs, 2 * num_frames, *frame_shape), dtype=np.uint8
+        )
+        self.head = 0
+
+    def next_slot(self):
+        """
+        View of the slot the next frame of every match goes to.
+
+        Returns:
+            np.ndarray: (N, height, width) view to draw into before push.
+        """
+        return self.buffer[:, self.head]
+
+    def push(self):
+        """
+        Commit the frame drawn into next_slot as the newest frame.
+        """
+        self.buffer[:, self.head + self.num_frames] = self.buffer[:, self.head]
+        self.head = (self.head + 1) % self.num_frames
+
+    def restart(self, rows, frames):
+        """
+        Clear the stack of some matches and make ``frames`` their only frame,
+        like a fresh episode (older frames read as black).
+
+        Args:
+            rows (np.ndarray): Indices of the matches.
+            frames (np.ndarray): (len(rows), height, width) first frames.
+        """
+        newest = (self.head - 1) % self.num_frames
+        self.buffer[rows] = 0
+        self.buffer[rows, newest] = frames
+        self.buffer[rows, newest + self.num_frames] = frames
+
+    def stacks(self, rows=None):
+        """
+        Copy of the current stacks, oldest frame first.
+
+        Args:
+            rows (np.ndarray): Matches to return; None for all of them.
+
+        Returns:
+            np.ndarray: (N, num_frames, height, width) uint8.
+        """
+        window = self.buffer[:, self.head : self.head + self.num_frames]
+        if rows is None:
+            return window.copy()
+        return window[rows]
+
+
+class PixelObserver:
+    """
+    Rasterizer and frame stack producing the pixel observations of N matches.
+    """
+
+    def __init__(
+        self, num_envs, width, height, size=PIXEL_SIZE, num_frames=FRAME_STACK
+    ):
+        """
+        Args:
+            num_envs (int): Number of matches.
+            width (int): Field width in pixels.
+            height (int): Field height in pixels.
+            size (tuple): (width, height) of the frames.
+            num_frames (int): Frames per observation.
+        """
+        self.rasterizer = Rasterizer(width, height, size)
+        self.frames = FrameStack(num_envs, (size[1], size[0]), num_frames)
+        self.shape = (num_frames, size[1], size[0])
+
+    def reset(self, states, rows=None):
+        """
+        Start the stacks of new episodes with the current frame.
+
+        Args:
+            states (np.ndarray): State array of all N matches.
+            rows (np.ndarray): Matches that were reset; None for all of them.
+        """
+        if rows is None:
+            rows = np.arange(len(states))
+        self.frames.restart(rows, self.rasterizer(states[rows]))
+
+    def push(self, states):
+        """
+        Draw the current frame of every match and add it to the stacks.
+
+        Args:
+            states (np.ndarray): State array of all N matches.
+        """
+        self.rasterizer(states, out=self.frames.next_slot())
+        self.frames.push()
+
+    def observe(self, rows=None):
+        """
+        Current observations.
+
+        Args:
+            rows (np.ndarray): Matches to return; None for all of them.
+
+        Returns:
+            np.ndarray: (N, num_frames, height, width) uint8 stacks.
+        """
+        return self.frames.stacks(rows)
@@ -0,0 +1,244 @@
+"""
+trajectory.py
+
+Episode store on disk: per-step arrays in chunked, memory-mapped .npy files
+and an episode index.
+
+A store is a directory holding ``meta.json`` (the fields and their shape
+and dtype), ``episodes.csv`` (chunk, first step, length, return and how
+every episode ended) and one directory per chunk with one .npy file per
+field. Episodes are written whole and never span chunks, so an episode is
+a plain slice of each field's memmap: reading one costs no copy and no
+simulation.
+
+Every episode is followed by one more row, its final step: the observation
+and state the last action led to (e.g. ``terminal_observation``), with the
+other fields zeroed. It is not counted in the episode length; stores written
+before it existed have no such row (``final_step`` False).
+"""
+
+import csv
+import json
+import os
+
+import numpy as np
+
+CHUNK_SIZE = 1 << 16  # Steps per chunk
+INDEX_COLUMNS = ["chunk", "start", "length", "reward", "terminated"]
+
+
+def _chunk_dir(path, chunk):
+    return os.path.join(path, f"chunk_{chunk:05d}")
+
+
+class TrajectoryWriter:
+    """
+    Appends whole episodes to a store, a chunk of memmaps at a time.
+    """
+
+    def __init__(self, path, fields, chunk_size=CHUNK_SIZE, info=None):
+        """
+        Args:
+            path (str): Store directory; an existing store is appended to,
+                with its own fields and info.
+            fields (dict): Field name to (per-step shape, dtype).
+            chunk_size (int): Steps per chunk; a longer episode gets a chunk
+                of its own length.
+            info (dict): JSON-serializable facts about the recorded matches,
+                e.g. their length, kept in meta.json.
+        """
+        self.path = path
+        meta_path = os.path.join(path, "meta.json")
+        if os.path.exists(meta_path):
+            store = TrajectoryStore(path)
+            self.fields = store.fields
+            self.chunk_size = store.chunk_size
+            self.info = store.info
+            self.episodes = len(store)
+            self.chunk = int(store.index["chunk"][-1]) + 1 if len(store) else 0
+            self.final_step = store.final_step
+        else:
+            os.makedirs(path, exist_ok=True)
+            self.fields = {
+                name: (tuple(shape), np.dtype(dtype).str)
+                for name, (shape, dtype) in fields.items()
+            }
+            self.chunk_size = chunk_size
+            self.info = info or {}
+            self.final_step = True
+            meta = {
+                "fields": self.fields,
+                "chunk_size": chunk_size,
+                "info": self.info,
+                "final_step": True,
+            }
+            with open(meta_path, "w") as f:
+                json.dump(meta, f)
+            self.episodes = 0
+            self.chunk = 0
+        self._arrays = None
+        self._used = 0
+        self._index = open(os.path.join(path, "episodes.csv"), "a", newline="")
+        self._rows = csv.writer(self._index)
+        if self._index.tell() == 0:
+            self._rows.writerow(INDEX_COLUMNS)
+
+    def _new_chunk(self, size):
+        """
+        Close the current chunk and map the files of the next one.
+        """
+        self._close_chunk()
+        directory = _chunk_dir(self.path, self.chunk)
+        os.makedirs(directory, exist_ok=True)
+        self._arrays = {
+            name: np.lib.format.open_memmap(
+                os.path.join(directory, f"{name}.npy"),
+                mode="w+",
+                dtype=dtype,
+                shape=(size, *shape),
+            )
+            for name, (shape, dtype) in self.fields.items()
+        }
+        self._used = 0
+        self.chunk += 1
+
+    def _close_chunk(self):
+        if self._arrays is not None:
+            for array in self._arrays.values():
+                array.flush()
+            self._arrays = None
+
+    def add_episode(self, reward, terminated, final=None, **steps):
+        """
+        Write one episode.
+
+        Args:
+            reward (float): Episode return.
+            terminated (bool): Whether it ended on a goal (False: time up).
+            final (dict): Field name to the row of the final step (see the
+                module docstring), e.g. states and observations; missing
+                fields are zeroed. Ignored by stores without final steps.
+            **steps (np.ndarray): (length, *shape) array of every field.
+
+        Returns:
+            int: Index of the episode in the store.
+        """
+        length = len(next(iter(steps.values())))
+        rows = length + self.final_step
+        if self._arrays is None or self._used + rows > len(
+            next(iter(self._arrays.values()))
+        ):
+            self._new_chunk(max(self.chunk_size, rows))
+        start = self._used
+        for name, array in self._arrays.items():
+            array[start : start + length] = steps[name]
+            if self.final_step:
+                array[start + length] = (final or {}).get(name, 0)
+        self._used += rows
+
+        self._rows.writerow(
+            [self.chunk - 1, start, length, float(reward), int(terminated)]
+        )
+        self._index.flush()
+        self.episodes += 1
+        return self.episodes - 1
+
+    def close(self):
+        """
+        Flush the last chunk and the index.
+        """
+        self._close_chunk()
+        self._index.close()
+
+
+class TrajectoryStore:
+    """
+    Read-only view of a store written by TrajectoryWriter.
+
+    Attributes:
+        fields (dict): Field name to (per-step shape, dtype).
+        info (dict): Facts about the recorded matches, see TrajectoryWriter.
+        index (dict): INDEX_COLUMNS name to (episodes,) array.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Store directory.
+        """
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        self.fields = {
+            name: (tuple(shape), dtype)
+            for name, (shape, dtype) in meta["fields"].items()
+        }
+        self.chunk_size = meta["chunk_size"]
+        self.info = meta.get("info", {})
+        self.final_step = meta.get("final_step", False)
+        with open(os.path.join(path, "episodes.csv"), newline="") as f:
+            rows = list(csv.reader(f))[1:]
+        columns = list(zip(*rows)) if rows else [()] * len(INDEX_COLUMNS)
+        self.index = {
+            name: np.array(column, dtype=dtype)
+            for name, column, dtype in zip(
+                INDEX_COLUMNS, columns, [int, int, int, float, int]
+            )
+        }
+        self.index["terminated"] = self.index["terminated"].astype(bool)
+        self._chunks = {}
+
+    def __len__(self):
+        return len(self.index["length"])
+
+    def _chunk(self, chunk):
+        """
+        Memmaps of a chunk's fields, opened on first use.
+        """
+        if chunk not in self._chunks:
+            directory = _chunk_dir(self.path, chunk)
+            self._chunks[chunk] = {
+                name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+                for name in self.fields
+            }
+        return self._chunks[chunk]
+
+    def episode(self, i, fields=None, final=False):
+        """
+        The steps of one episode.
+
+        Args:
+            i (int): Episode index.
+            fields (list[str]): Fields to return; None for all of them.
+            final (bool): Append the final step (see the module docstring),
+                e.g. to draw the last state or bootstrap from the last
+                observation.
+
+        Returns:
+            dict: Field name to a read-only (length, *shape) memmap slice,
+                (length + 1, *shape) with the final step.
+
+        Raises:
+            ValueError: If the final step is asked of a store without them.
+        """
+        if final and not self.final_step:
+            raise ValueError(f"{self.path} was recorded without final steps")
+        chunk = self._chunk(int(self.index["chunk"][i]))
+        start = int(self.index["start"][i])
+        stop = start + int(self.index["length"][i]) + final
+        return {name: chunk[name][start:stop] for name in fields or self.fields}
+
+    def field(self, name, episodes=None):
+        """
+        One field of several episodes, concatenated (a copy).
+
+        Args:
+            name (str): Field name.
+            episodes (list[int]): Episode indices; None for all of them.
+
+        Returns:
+            np.ndarray: (total steps, *shape) array.
+        """
+        if episodes is None:
+            episodes = range(len(self))
+        return np.concatenate([self.episode(i, [name])[name] for i in episodes])
@@ -0,0 +1,598 @@
+"""
+soccer_env.py
+
+The single-match Gymnasium environment, SoccerFieldEnv, and its observation
+spaces. It only needs NumPy, Gymnasium and pygame, so replaying or evaluating
+with an exported policy (numpy_policy.py) does not import torch; main.py
+builds the training setup around it.
+"""
+
+import gymnasium as gym
+import numpy as np
+import pygame
+from gymnasium import spaces
+
+from rewards.vectorized import HISTORY_SIZE, RewardEngine
+from simulation import physics, raster
+from utils import StepProfiler
+from Visual_Components.field import SoccerField
+
+OBS_TYPES = ("vector", "pixels", "both")
+
+# Layout of the float64 snapshots of get_state/set_state: the physics state
+# row, the reward history, then the goal code of the last step
+SNAPSHOT_SIZE = physics.STATE_SIZE + HISTORY_SIZE + 1
+SNAPSHOT_HISTORY = slice(physics.STATE_SIZE, SNAPSHOT_SIZE - 1)
+
+
+def make_observation_space(
+    width,
+    height,
+    game_duration,
+    obs_type="vector",
+    pixel_size=raster.PIXEL_SIZE,
+    frame_stack=raster.FRAME_STACK,
+):
+    """
+    Build the observation space of the soccer game.
+
+    Args:
+        width (int): Field width in pixels.
+        height (int): Field height in pixels.
+        game_duration (int): Length of a game in seconds.
+        obs_type (str): 'vector' for the 15-D state vector, 'pixels' for a
+            stack of rasterized frames, 'both' for a dict holding the two.
+        pixel_size (tuple): (width, height) of the rasterized frames.
+        frame_stack (int): Number of stacked frames.
+
+    Returns:
+        spaces.Space: Observation space.
+    """
+    low = np.array(
+        [
+            0,  # Player 1 blue X
+            0,  # Player 1 blue Y
+            0,  # Player 2 blue X
+            0,  # Player 2 blue Y
+            0,  # Player 3 red X
+            0,  # Player 3 red Y
+            0,  # Player 4 red X
+            0,  # Player 4 red Y
+            0,  # Ball X
+            0,  # Ball Y
+            -6,  # Ball X Velocity
+            -6,  # Ball Y Velocity
+            0,  # Red Score
+            0,  # Blue Score
+            0,  # Remaining Time
+        ],
+        dtype=np.float32,
+    )
+
+    high = np.array(
+        [
+            width,  # Player 1 blue X
+            height,  # Player 1 blue Y
+            width,  # Player 2 blue X
+            height,  # Player 2 blue Y
+            width,  # Player 3 red X
+            height,  # Player 3 red Y
+            width,  # Player 4 red X
+            height,  # Player 4 red Y
+            width,  # Ball X
+            height,  # Ball Y
+            6,  # Ball X Velocity
+            6,  # Ball Y Velocity
+            10,  # Red Score
+            10,  # Blue Score
+            game_duration,  # Remaining Time
+        ],
+        dtype=np.float32,
+    )
+
+    vector_space = spaces.Box(low=low, high=high, dtype=np.float32)
+    if obs_type == "vector":
+        return vector_space
+
+    # Channel-first stack, oldest frame first, as expected by CnnPolicy
+    pixel_space = spaces.Box(
+        low=0,
+        high=255,
+        shape=(frame_stack, pixel_size[1], pixel_size[0]),
+        dtype=np.uint8,
+    )
+    if obs_type == "pixels":
+        return pixel_space
+    return spaces.Dict({"vector": vector_space, "pixels": pixel_space})
+
+
+def check_obs_type(obs_type):
+    """
+    Raise a ValueError for an unknown observation type.
+    """
+    if obs_type not in OBS_TYPES:
+        raise ValueError(f"obs_type must be one of {OBS_TYPES}, got '{obs_type}'")
+
+
+def check_frame_skip(frame_skip):
+    """
+    Raise a ValueError unless every action lasts at least one physics tick.
+    """
+    if frame_skip < 1:
+        raise ValueError(f"frame_skip must be at least 1, got {frame_skip}")
+
+
+class SoccerFieldEnv(gym.Env):
+    """
+    A custom Gym environment simulating a 2v2 soccer game using Pygame.
+
+    The environment features multi-agent control, ball dynamics, goal scoring,
+    and support for both human and RGB rendering.
+    """
+
+    metadata = {"render_modes": ["human", "rgb_array"], "render_fps": 60}
+
+    # Methods timed by the opt-in profiler, by phase name
+    PROFILED_PHASES = {
+        "step": "step",
+        "take_actions": "_take_actions",
+        "update_game_state": "_update_game_state",
+        "calculate_reward": "_calculate_reward",
+        "is_done": "_is_done",
+        "is_truncated": "_is_truncated",
+        "get_observation": "_get_observation",
+        "render": "_render_frame",
+    }
+
+    def __init__(
+        self,
+        game_duration=30,
+        render_mode=None,
+        reward_config=None,
+        profile=False,
+        frame_size=None,
+        grayscale=False,
+        reuse_frame=False,
+        obs_type="vector",
+        pixel_size=raster.PIXEL_SIZE,
+        frame_stack=raster.FRAME_STACK,
+        frame_skip=1,
+        fast_skip=False,
+    ):
+        """
+        Initialize the soccer environment.
+
+        Args:
+            game_duration (int): Length of a game in seconds.
+            render_mode (str): Either 'human' for display or 'rgb_array' for image frames.
+                With None the environment is pure physics and never touches the
+                pygame display or font modules.
+            reward_config (dict or str): Weights of the reward components, or
+                the path of a JSON file holding them (default: the heuristic).
+            profile (bool): Time every phase of the step, see get_profile.
+            frame_size (tuple): (width, height) the rgb_array frames are
+                downscaled to; None keeps the field size.
+            grayscale (bool): Return (H, W, 1) luma frames instead of RGB.
+            reuse_frame (bool): Write every rgb_array frame into the same
+                buffer instead of a new array. The returned frame is then
+                overwritten by the next render; copy it to keep it.
+            obs_type (str): 'vector', 'pixels' or 'both', see
+                make_observation_space. Pixel observations come from the
+                simulation.raster software rasterizer, independently of the
+                render mode.
+            pixel_size (tuple): (width, height) of the pixel observations.
+            frame_stack (int): Number of frames in a pixel observation.
+            frame_skip (int): Physics ticks each action is repeated for; the
+                step reward is the sum over the ticks and the step ends early
+                on a goal or at the time limit.
+            fast_skip (bool): With frame_skip, compute the reward on the last
+                tick of the step only instead of summing every tick.
+        """
+        check_obs_type(obs_type)
+        check_frame_skip(frame_skip)
+        self.frame_skip = frame_skip
+        self.fast_skip = fast_skip
+        super(SoccerFieldEnv, self).__init__()
+
+        self.goal_event = [False, ""]
+        self.soccer_field = SoccerField(
+            game_duration=game_duration,
+            fps=self.metadata["render_fps"],
+            celebrate_goals=render_mode == "human",
+            headless=True,
+        )
+        self.width = self.soccer_field.width
+        self.height = self.soccer_field.height
+        self.game_duration = game_duration
+        self.players = self.soccer_field.players
+        self.ball = self.soccer_field.ball
+        self.reward_engine = RewardEngine(
+            1, self.width, self.height, reward_config
+        )
+
+        self.action_space = spaces.MultiDiscrete([5, 5, 5, 5])
+
+        self.obs_type = obs_type
+        self.observation_space = make_observation_space(
+            self.width,
+            self.height,
+            self.game_duration,
+            obs_type,
+            pixel_size,
+            frame_stack,
+        )
+        self.pixels = None
+        if obs_type != "vector":
+            self.pixels = raster.PixelObserver(
+                1, self.width, self.height, pixel_size, frame_stack
+            )
+
+        # Rendering resources are created lazily on the first rendered frame
+        self.render_mode = render_mode
+        self.frame_size = tuple(frame_size) if frame_size else None
+        self.grayscale = grayscale
+        self.reuse_frame = reuse_frame
+        self.screen = None
+        self.clock = None
+        self._rgb = None
+        self._scaled = None
+        self._frame = None
+        self._luma = None
+
+        # The profiler shadows the phase methods with timed wrappers on this
+        # instance only, so an environment without profiling pays nothing
+        self.profiler = None
+        if profile:
+            self.profiler = StepProfiler(self.PROFILED_PHASES)
+            for phase, method in self.PROFILED_PHASES.items():
+                setattr(self, method, self.profiler.wrap(phase, getattr(self, method)))
+
+        self.reset()
+
+    def get_profile(self, reset=False):
+        """
+        Timings of the step phases since the start or the last reset.
+
+        Observation and rendering are also timed when called from reset.
+
+        Args:
+            reset (bool): Clear the counters after reading them.
+
+        Returns:
+            dict: Phase name to count, mean/max/p50/p99 microseconds and
+                histogram (see utils.StepProfiler.summary); empty when the
+                environment was created without profile=True.
+        """
+        if self.profiler is None:
+            return {}
+        summary = self.profiler.summary()
+        if reset:
+            self.profiler.reset()
+        return summary
+
+    def reset(self, seed=None, options=None):
+        """
+        Reset the game environment for a new episode.
+
+        Args:
+            seed (int): Optional seed for randomization.
+            options (dict): Optional reset parameters.
+
+        Returns:
+            tuple: (observation, info)
+        """
+        super().reset(seed=seed)
+
+        # Seeding replaces np_random, which the physics draws from as well
+        self.soccer_field.set_rng(self.np_random)
+
+        # Reset positions, randomize players in their own half, clear scores
+        # and the game clock
+        physics.reset_matches(
+            self.soccer_field.states, self.np_random, self.width, self.height
+        )
+        self.goal_event = [False, ""]
+        observation = self._get_observation(new_episode=True)
+        info = {}
+        if self.render_mode == "human":
+            self._render_frame()
+        return observation, info
+
+    def _get_observation(self, new_episode=False):
+        """
+        Collect environment observations.
+
+        Pixel observations draw the current frame into the frame stack, so
+        this is called exactly once per step or reset.
+
+        Args:
+            new_episode (bool): Start a new frame stack instead of pushing.
+
+        Returns:
+            np.ndarray or dict: The current state observation.
+        """
+        states = self.soccer_field.states
+        if self.pixels is not None:
+            if new_episode:
+                self.pixels.reset(states)
+            else:
+                self.pixels.push(states)
+            if self.obs_type == "pixels":
+                return self.pixels.observe()[0]
+
+        observation = physics.observe(
+            states, self.game_duration, self.soccer_field.fps
+        )[0]
+        if self.obs_type == "both":
+            return {"vector": observation, "pixels": self.pixels.observe()[0]}
+        return observation
+
+    def step(self, action):
+        """
+        Perform a step in the environment.
+
+        The action is applied for ``frame_skip`` physics ticks. The
+        observation is only built after the last one. The info of the last
+        step of an episode holds its physics state row as
+        ``terminal_state``.
+
+        Args:
+            action (list[int]): Actions for the 4 players.
+
+        Returns:
+            tuple: (observation, reward, terminated, truncated, info)
+        """
+        reward = 0.0
+        terms = None
+        for tick in range(self.frame_skip):
+            self._take_actions(action)
+
+            self._update_game_state()
+
+            terminated = self._is_done()
+            truncated = self._is_truncated()
+            last = terminated or truncated or tick == self.frame_skip - 1
+
+            if last or not self.fast_skip:
+                reward += self._calculate_reward()
+                if terms is None:
+                    terms = self.reward_engine.terms
+                else:
+                    terms = terms + self.reward_engine.terms
+            if last:
+                break
+            if self.render_mode == "human":
+                self._render_frame()
+
+        observation = self._get_observation()
+
+        info = {"reward_terms": self.reward_engine.term_infos(terms)[0]}
+        if terminated or truncated:
+            # Kept for vectorized wrappers, which reset before returning
+            info["terminal_state"] = self.soccer_field.state.copy()
+        if self.render_mode == "human":
+            self._render_frame()
+
+        return observation, reward, terminated, truncated, info
+
+    def _take_actions(self, action):
+        """
+        Apply the actions of all 4 players, in player order.
+
+        Args:
+            action (list[int]): Actions for the 4 players.
+        """
+        physics.take_actions(
+            self.soccer_field.states, np.asarray(action)[None], self.width, self.height
+        )
+
+    def _update_game_state(self):
+        """
+        Update the game state, like detect ball collisions, and advance the
+        simulated clock by one frame.
+
+        Goals are checked exactly once per step; the result is stored in
+        ``goal_event`` and shared by the reward and termination logic.
+        """
+        self.soccer_field.check_player_ball_overlaps()
+        self.soccer_field.tick()
+
+        self.goal_event = self.soccer_field.check_goal()
+
+    def _calculate_reward(self):
+        """
+        Compute the reward based on current environment state.
+
+        The reward engine sums the configured components of
+        rewards.registry; with the default config it returns the same values
+        as rewards.heuristic.reward_function(self).
+
+        Returns:
+            float: Computed reward.
+        """
+        goals = np.array([physics.GOAL_CODES[self.goal_event[1]]])
+        return float(self.reward_engine(self.soccer_field.states, goals)[0])
+
+    def get_reward_costs(self):
+        """
+        Average compute time of each reward component.
+
+        Returns:
+            dict: Component name to microseconds per step.
+        """
+        return self.reward_engine.get_costs()
+
+    def get_state(self):
+        """
+        Snapshot of the game, to branch rollouts from or come back to with
+        set_state.
+
+        Returns:
+            np.ndarray: (SNAPSHOT_SIZE,) float64 array holding the physics
+                state (positions, velocities, scores, kickoff and clock), the
+                reward history and the goal code of the last step.
+        """
+        snapshot = np.empty(SNAPSHOT_SIZE)
+        snapshot[: physics.STATE_SIZE] = self.soccer_field.state
+        snapshot[SNAPSHOT_HISTORY] = self.reward_engine.get_state()[0]
+        snapshot[-1] = physics.GOAL_CODES[self.goal_event[1]]
+        return snapshot
+
+    def set_state(self, snapshot):
+        """
+        Restore a snapshot of get_state (also one taken from another
+        environment). Given the same actions and random draws, the game then
+        continues exactly as it did after the snapshot. Pixel observations
+        restart their frame stack from the restored frame, like a reset.
+
+        Args:
+            snapshot (np.ndarray): (SNAPSHOT_SIZE,) snapshot.
+
+        Returns:
+            np.ndarray or dict: Observation of the restored state.
+        """
+        self.soccer_field.state[:] = snapshot[: physics.STATE_SIZE]
+        self.reward_engine.set_state(snapshot[None, SNAPSHOT_HISTORY])
+        code = int(snapshot[-1])
+        self.goal_event = [code != physics.NO_GOAL, physics.GOAL_MESSAGES[code]]
+        return self._get_observation(new_episode=True)
+
+    def _is_done(self):
+        """
+        Check whether the episode should terminate due to a goal.
+
+        Returns:
+            bool: Whether a terminal condition is met.
+        """
+        return self.goal_event[0]
+
+    def _is_truncated(self):
+        """
+        Check whether the episode exceeded the time limit, measured in
+        simulated time so that episode length is a fixed number of steps.
+
+        Returns:
+            bool: Whether the episode is truncated.
+        """
+        return self.soccer_field.elapsed_time() > self.game_duration
+
+    def _render_frame(self):
+        """
+        Render the game frame based on the render mode.
+
+        Returns:
+            np.ndarray or None: Image frame if 'rgb_array', else None.
+        """
+        if self.screen is None:
+            self._init_render()
+
+        self.soccer_field.draw_field()
+        if self.render_mode == "human":
+            pygame.display.flip()
+            self.clock.tick(self.metadata["render_fps"])
+
+            # Replay the goal celebration frame by frame, only when watching
+            while self.soccer_field.celebration_frames > 0:
+                self.soccer_field.celebration_frames -= 1
+                pygame.event.pump()
+                self.soccer_field.draw_field()
+                pygame.display.flip()
+                self.clock.tick(self.metadata["render_fps"])
+        elif self.render_mode == "rgb_array":
+            return self._read_frame()
+
+    def _read_frame(self):
+        """
+        Read the drawn screen into an (H, W, 3) or (H, W, 1) uint8 frame.
+
+        The screen is first blitted into a surface storing bytes in R, G, B
+        order, whose transposed pixels3d view is then a C-contiguous (H, W, 3)
+        image that reads with a single memcpy. Drawing straight onto such a
+        surface would round the antialiased edges differently. The view locks
+        its surface, so it is released before returning and only the copy
+        leaves this method.
+
+        Returns:
+            np.ndarray: The frame; the shared buffer when reuse_frame is set.
+        """
+        surface = self._rgb
+        surface.blit(self.screen, (0, 0))
+        if self.frame_size is not None:
+            surface = pygame.transform.smoothscale(
+                surface, self.frame_size, self._scaled
+            )
+        pixels = pygame.surfarray.pixels3d(surface).transpose(1, 0, 2)
+
+        if self.grayscale:
+            # Integer ITU-R 601 luma, (77 R + 150 G + 29 B) / 256, computed in
+            # preallocated uint16 buffers
+            luma, term = self._luma
+            np.multiply(pixels[..., 0], 77, out=luma, dtype=np.uint16)
+            np.multiply(pixels[..., 1], 150, out=term, dtype=np.uint16)
+            np.add(luma, term, out=luma)
+            np.multiply(pixels[..., 2], 29, out=term, dtype=np.uint16)
+            np.add(luma, term, out=luma)
+            np.right_shift(luma, 8, out=self._frame[..., 0], casting="unsafe")
+        else:
+            np.copyto(self._frame, pixels)
+        del pixels
+
+        if self.reuse_frame:
+            return self._frame
+        return self._frame.copy()
+
+    def _init_render(self):
+        """
+        Create the display window (human) or offscreen surface (rgb_array) and
+        hand it to the soccer field for drawing.
+        """
+        pygame.font.init()
+        if self.render_mode == "human":
+            pygame.display.init()
+            pygame.display.set_caption("SoccerFieldEnv")
+            self.screen = pygame.display.set_mode((self.width, self.height))
+        else:
+            self.screen = pygame.Surface((self.width, self.height))
+            self._rgb = self._rgb_surface((self.width, self.height))
+            width, height = self.frame_size or (self.width, self.height)
+            if self.frame_size is not None:
+                self._scaled = self._rgb_surface(self.frame_size)
+            self._frame = np.empty(
+                (height, width, 1 if self.grayscale else 3), dtype=np.uint8
+            )
+            if self.grayscale:
+                self._luma = (
+                    np.empty((height, width), dtype=np.uint16),
+                    np.empty((height, width), dtype=np.uint16),
+                )
+        self.clock = pygame.time.Clock()
+        self.soccer_field.screen = self.screen
+        self.soccer_field.clock = self.clock
+
+    @staticmethod
+    def _rgb_surface(size):
+        """
+        24-bit surface whose bytes are laid out R, G, B, so that its pixel
+        array reads as a contiguous (H, W, 3) image.
+        """
+        return pygame.Surface(size, 0, 24, (0xFF, 0xFF00, 0xFF0000, 0))
+
+    def render(self):
+        """
+        Render the environment externally.
+
+        Returns:
+            np.ndarray or None: Rendered frame if applicable.
+        """
+        if self.render_mode == "rgb_array":
+            return self._render_frame()
+
+    def close(self):
+        """
+        Close the environment and Pygame resources.
+        """
+        if self.screen is not None:
+            pygame.display.quit()
+            pygame.quit()
+            self.screen = None
+            self.soccer_field.screen = None
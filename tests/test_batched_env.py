@@ -0,0 +1,54 @@
+import numpy as np
+
+from main import make_vec_env
+from simulation import physics
+
+STEPS = 3000
+
+
+def _comparable(info):
+    """
+    The parts of a step info both backends must agree on; the episode's
+    wall-clock time is left out.
+    """
+    info = dict(info)
+    for key in ("terminal_observation", "terminal_state"):
+        if key in info:
+            info[key] = info[key].tobytes()
+    if "episode" in info:
+        info["episode"] = {key: info["episode"][key] for key in ("r", "l")}
+    return info
+
+
+def test_batched_backend_equals_dummy_backend():
+    # With one match the batched generator is seeded like the dummy's env,
+    # so both backends must play the very same game
+    dummy = make_vec_env("dummy", num_envs=1, seed=3)
+    batched = make_vec_env("batched", num_envs=1, seed=3)
+    dummy_state = dummy.envs[0].unwrapped.soccer_field.state
+    batched_state = batched.states[0]
+    assert dummy.reset().tobytes() == batched.reset().tobytes()
+
+    rng = np.random.default_rng(0)
+    episodes = 0
+    for _ in range(STEPS):
+        if rng.random() < 0.03:
+            shot = rng.uniform(-25, 25), rng.uniform(-8, 8)
+            dummy_state[physics.BALL_VX : physics.BALL_VY + 1] = shot
+            batched_state[physics.BALL_VX : physics.BALL_VY + 1] = shot
+        actions = rng.integers(0, 5, (1, 4))
+        observations, rewards, dones, infos = dummy.step(actions)
+        expected = (observations.tobytes(), rewards.tobytes(), dones.tolist())
+        batched_observations, batched_rewards, batched_dones, batched_infos = (
+            batched.step(actions)
+        )
+        assert (
+            batched_observations.tobytes(),
+            batched_rewards.tobytes(),
+            batched_dones.tolist(),
+        ) == expected
+        assert [_comparable(info) for info in batched_infos] == [
+            _comparable(info) for info in infos
+        ]
+        episodes += int(dones[0])
+    assert episodes > 1
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from main import BatchedSoccerVecEnv
+from simulation import physics
+from soccer_env import SoccerFieldEnv
+
+STAY = np.full(4, 4)  # Every player keeps still
+
+
+def _snapshots():
+    """
+    A match whose ball crosses the red goal line on the first tick, and a
+    fresh match where nothing happens.
+    """
+    env = SoccerFieldEnv()
+    env.reset(seed=0)
+    fresh = env.get_state()
+    goal = fresh.copy()
+    goal[physics.BALL_X] = env.width - physics.GOAL_LINE - physics.BALL_RADIUS - 2
+    goal[physics.BALL_Y] = env.height / 2
+    goal[physics.BALL_VX] = 5
+    return goal, fresh
+
+
+@pytest.mark.parametrize("fast_skip", [False, True])
+def test_batched_frame_skip_matches_single_env(fast_skip):
+    snapshots = _snapshots()
+    expected = []
+    for snapshot in snapshots:
+        env = SoccerFieldEnv(frame_skip=4, fast_skip=fast_skip)
+        env.reset(seed=0)
+        env.set_state(snapshot)
+        _, reward, terminated, _, _ = env.step(STAY)
+        expected.append((reward, terminated))
+
+    venv = BatchedSoccerVecEnv(2, frame_skip=4, fast_skip=fast_skip)
+    venv.seed(0)
+    venv.reset()
+    venv.set_state(np.stack(snapshots))
+    _, rewards, dones, _ = venv.step(np.stack([STAY, STAY]))
+
+    assert expected[0][1] and not expected[1][1]
+    assert expected[0][0] != 0
+    np.testing.assert_allclose(rewards, [reward for reward, _ in expected])
+    np.testing.assert_array_equal(dones, [True, False])
+
+
+@pytest.mark.parametrize("frame_skip", [0, -1])
+def test_frame_skip_below_one_is_rejected(frame_skip):
+    with pytest.raises(ValueError):
+        SoccerFieldEnv(frame_skip=frame_skip)
+    with pytest.raises(ValueError):
+        BatchedSoccerVecEnv(2, frame_skip=frame_skip)
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from utils import MetricsLog
+
+
+def test_rows_are_flushed_in_batches(tmp_path):
+    path = tmp_path / "stats.csv"
+    log = MetricsLog(str(path), flush_every=10)
+    for step in range(25):
+        log.write({"step": step, "reward": step / 4})
+        # Never more than flush_every rows wait in memory
+        assert len(log.buffer) < 10
+    assert pd.read_csv(path)["step"].tolist() == list(range(20))
+
+    log.flush()
+    frame = pd.read_csv(path)
+    assert frame["step"].tolist() == list(range(25))
+    assert frame["reward"].tolist() == [step / 4 for step in range(25)]
+
+
+def test_new_columns_keep_earlier_rows_readable(tmp_path):
+    path = tmp_path / "stats.csv"
+    log = MetricsLog(str(path), flush_every=4)
+    rows = [{"step": step, "reward": step * 0.5} for step in range(6)]
+    # An evaluation brings a new column halfway, then rows leave it out again
+    rows += [{"step": 6, "eval_reward": 1.25, "reward": 3.0}]
+    rows += [{"step": step, "reward": step * 0.5} for step in range(7, 10)]
+    rows += [{"step": 10, "loss": 0.125}]
+    for row in rows:
+        log.write(row)
+    log.flush()
+
+    frame = pd.read_csv(path)
+    assert list(frame.columns) == ["step", "reward", "eval_reward", "loss"]
+    assert frame["step"].tolist() == list(range(11))
+    assert frame["reward"].tolist()[:10] == [row["reward"] for row in rows[:10]]
+    assert np.isnan(frame["reward"].iloc[10])
+    assert frame["eval_reward"].isna().tolist() == [step != 6 for step in range(11)]
+    assert frame["eval_reward"].iloc[6] == 1.25
+    assert frame["loss"].isna().tolist() == [step != 10 for step in range(11)]
+    assert not (tmp_path / "stats.csv.tmp").exists()
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from utils import EpisodeStats, RingBuffer, RunningStats, StreamingQuantile
+
+DISTRIBUTIONS = {
+    "normal": lambda rng, n: rng.normal(3.0, 2.0, n),
+    "exponential": lambda rng, n: rng.exponential(5.0, n),
+    "uniform": lambda rng, n: rng.uniform(-10.0, 10.0, n),
+}
+
+
+@pytest.mark.parametrize("name", DISTRIBUTIONS)
+def test_running_stats_match_numpy(name):
+    values = DISTRIBUTIONS[name](np.random.default_rng(0), 10000)
+    stats = RunningStats()
+    for value in values.tolist():
+        stats.add(value)
+    assert stats.count == len(values)
+    assert stats.mean == pytest.approx(np.mean(values), rel=1e-9)
+    assert stats.std**2 == pytest.approx(np.var(values), rel=1e-9)
+    assert stats.std == pytest.approx(np.std(values), rel=1e-9)
+    assert (stats.min, stats.max) == (values.min(), values.max())
+
+
+@pytest.mark.parametrize("name", DISTRIBUTIONS)
+@pytest.mark.parametrize("q", [0.5, 0.95])
+def test_streaming_quantile_is_close_to_numpy(name, q):
+    values = DISTRIBUTIONS[name](np.random.default_rng(1), 20000)
+    quantile = StreamingQuantile(q)
+    for value in values.tolist():
+        quantile.add(value)
+    # P-square is an estimate; allow 1% of the spread of the values
+    assert quantile.value == pytest.approx(
+        np.quantile(values, q), abs=0.01 * np.std(values)
+    )
+
+
+def test_streaming_quantile_is_exact_for_few_values():
+    quantile = StreamingQuantile(0.5)
+    assert quantile.value == 0.0
+    for count, value in enumerate([4.0, -1.0, 7.5, 2.0, 3.0], start=1):
+        quantile.add(value)
+        added = [4.0, -1.0, 7.5, 2.0, 3.0][:count]
+        assert quantile.value == np.quantile(added, 0.5)
+
+
+def test_ring_buffer_keeps_the_last_values():
+    buffer = RingBuffer(100)
+    values = np.random.default_rng(2).normal(size=250)
+    for count, value in enumerate(values.tolist(), start=1):
+        buffer.add(value)
+        expected = values[max(count - 100, 0) : count]
+        assert np.array_equal(np.sort(buffer.window()), np.sort(expected))
+
+
+def test_episode_stats_summary():
+    rng = np.random.default_rng(3)
+    rewards = rng.normal(size=150)
+    lengths = rng.integers(100, 1000, 150)
+    stats = EpisodeStats()
+    assert stats.summary(0)["episode_count"] == 0
+    for count, (reward, length) in enumerate(zip(rewards, lengths), start=1):
+        stats.add(float(reward), int(length))
+        summary = stats.summary(int(lengths[:count].sum()))
+        assert ("last_100_mean_reward" in summary) == (count >= 100)
+
+    assert summary["episode_count"] == 150
+    assert summary["total_steps"] == lengths.sum()
+    assert summary["mean_reward"] == pytest.approx(rewards.mean())
+    assert summary["std_reward"] == pytest.approx(rewards.std())
+    assert summary["mean_episode_length"] == pytest.approx(lengths.mean())
+    assert summary["last_100_mean_reward"] == pytest.approx(rewards[-100:].mean())
+    assert summary["last_100_median_reward"] == np.median(rewards[-100:])
@@ -0,0 +1,59 @@
+import glob
+import subprocess
+import sys
+import zipfile
+
+import numpy as np
+import pytest
+
+from inference import ObservationNormalizer
+from opponents import OpponentPool, OpponentWorker
+
+WIDTH = 800
+MODEL = sorted(glob.glob("prior_models/*.zip"))[0]
+STATS = "vec_normalize.pkl"
+
+
+def test_archived_checkpoint_loads_its_statistics(tmp_path):
+    # An archive of checkpoints as CheckpointCallback saves them, the
+    # statistics of each next to it
+    archive = tmp_path / "checkpoints.zip"
+    with zipfile.ZipFile(archive, "w") as f:
+        f.write(MODEL, "run/soccer_model_100000_steps.zip")
+        f.write(STATS, "run/soccer_model_vecnormalize_100000_steps.pkl")
+
+    pool = OpponentPool([str(archive)], WIDTH)
+    assert len(pool) == 1
+    normalize = pool.opponents[0].normalize
+    expected = ObservationNormalizer.load(STATS)
+    assert normalize is not None
+    assert np.array_equal(normalize.mean, expected.mean)
+    assert np.array_equal(normalize.std, expected.std)
+
+
+def test_checkpoint_without_statistics_is_an_error(tmp_path):
+    archive = tmp_path / "checkpoints.zip"
+    with zipfile.ZipFile(archive, "w") as f:
+        f.write(MODEL, "soccer_model_100000_steps.zip")
+    model = tmp_path / "soccer_model_1000000_steps_lr_0.00003.zip"
+    model.write_bytes(open(MODEL, "rb").read())
+
+    for path in (archive, model):
+        with pytest.raises(ValueError, match="--opponent-vecnormalize"):
+            OpponentPool([str(path)], WIDTH)
+        # The worker process reports the error instead of hanging
+        with pytest.raises(ValueError, match="--opponent-vecnormalize"):
+            OpponentWorker([str(path)], WIDTH)
+
+        pool = OpponentPool([str(path)], WIDTH, vecnormalize=STATS)
+        assert pool.opponents[0].normalize is not None
+
+
+def test_opponents_of_exports_need_no_torch():
+    # Importing torch in this process would say nothing: check a fresh one
+    code = (
+        "import sys, evaluation, inference, opponents\n"
+        "assert 'torch' not in sys.modules\n"
+        "assert 'stable_baselines3' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from simulation import physics
+
+WIDTH, HEIGHT = 600, 400
+STEPS = 10000
+
+
+class _Shared:
+    """
+    Random source for a state array holding every match twice: each draw is
+    made once and given to both copies, so the stream is consumed like for
+    the single match.
+    """
+
+    def __init__(self, rng):
+        self.rng = rng
+
+    def uniform(self, low, high, size):
+        rows, columns = size
+        draws = self.rng.uniform(low, high, size=(rows // 2, columns))
+        return np.repeat(draws, 2, axis=0)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_single_match_equals_array_code(seed):
+    # A single match takes the Python float paths, the same match twice in
+    # one array the NumPy code; both must agree bit for bit
+    single = physics.new_states(1, WIDTH, HEIGHT)
+    pair = physics.new_states(2, WIDTH, HEIGHT)
+    single_rng = np.random.default_rng(seed)
+    pair_rng = _Shared(np.random.default_rng(seed))
+    rng = np.random.default_rng(seed + 100)
+    goals = 0
+    for _ in range(STEPS):
+        if rng.random() < 0.3:
+            # Everybody runs the same way, so players bunch up at the edges
+            actions = np.full((1, physics.NUM_PLAYERS), rng.integers(0, 4))
+        else:
+            actions = rng.integers(0, 5, (1, physics.NUM_PLAYERS))
+        if rng.random() < 0.02:
+            single[:, physics.BALL_VX] = rng.uniform(-25, 25)
+            single[:, physics.BALL_VY] = rng.uniform(-6, 6)
+            pair[:, physics.BALL_VX : physics.BALL_VY + 1] = single[
+                0, physics.BALL_VX : physics.BALL_VY + 1
+            ]
+
+        physics.take_actions(single, actions, WIDTH, HEIGHT)
+        physics.take_actions(pair, np.repeat(actions, 2, axis=0), WIDTH, HEIGHT)
+        assert pair.tobytes() == np.repeat(single, 2, axis=0).tobytes()
+
+        physics.update(single, WIDTH, HEIGHT, single_rng)
+        physics.update(pair, WIDTH, HEIGHT, pair_rng)
+        assert pair.tobytes() == np.repeat(single, 2, axis=0).tobytes()
+
+        codes = physics.check_goals(single, WIDTH, HEIGHT)
+        assert physics.check_goals(pair, WIDTH, HEIGHT).tolist() == [codes[0]] * 2
+        observations = physics.observe(pair, 120, 30)
+        assert physics.observe(single, 120, 30).tobytes() == observations[0].tobytes()
+
+        goals += codes[0] != physics.NO_GOAL
+    assert goals > 0
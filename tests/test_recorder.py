@@ -0,0 +1,100 @@
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from stable_baselines3.common.vec_env import DummyVecEnv, VecNormalize
+
+from main import BatchedSoccerVecEnv
+from recorder import TrajectoryRecorder, VecTrajectoryRecorder
+from simulation import physics
+from simulation.trajectory import TrajectoryStore
+from soccer_env import SoccerFieldEnv
+
+GAME_DURATION = 2
+FPS = SoccerFieldEnv.metadata["render_fps"]
+NUM_ENVS = 2
+
+
+def _make_venv(backend, num_envs=NUM_ENVS):
+    if backend == "batched":
+        return BatchedSoccerVecEnv(num_envs, game_duration=GAME_DURATION)
+    return DummyVecEnv(
+        [lambda: SoccerFieldEnv(game_duration=GAME_DURATION)] * num_envs
+    )
+
+
+@pytest.mark.parametrize("backend", ["dummy", "batched"])
+def test_vec_recorder_stores_the_final_step(tmp_path, backend):
+    venv = VecTrajectoryRecorder(_make_venv(backend), str(tmp_path))
+    venv.seed(0)
+    venv.reset()
+    rng = np.random.default_rng(0)
+    episodes = 0
+    while episodes < 6:
+        _, _, dones, _ = venv.step(rng.integers(0, 5, (NUM_ENVS, 4)))
+        episodes += int(dones.sum())
+    venv.close()
+
+    store = TrajectoryStore(str(tmp_path))
+    assert store.final_step and len(store) == episodes
+    for i in range(len(store)):
+        length = store.index["length"][i]
+        assert len(store.episode(i)["states"]) == length
+        episode = store.episode(i, final=True)
+        states = episode["states"]
+        assert len(states) == length + 1
+        assert episode["dones"][length - 1] and not episode["dones"][: length - 1].any()
+        # The state the last action led to, before the reset, and what the
+        # policy would have observed of it
+        assert states[length, physics.FRAME] == states[length - 1, physics.FRAME] + 1
+        scores = [physics.RED_SCORE, physics.BLUE_SCORE]
+        scored = not np.array_equal(states[length, scores], states[0, scores])
+        assert scored == store.index["terminated"][i]
+        expected = physics.observe(states[length:], GAME_DURATION, FPS)[0]
+        assert np.array_equal(episode["observations"][length], expected)
+
+
+def test_vec_recorder_below_vec_normalize_stores_raw_observations(tmp_path):
+    recorder = VecTrajectoryRecorder(_make_venv("batched", 1), str(tmp_path))
+    venv = VecNormalize(recorder)
+    venv.seed(0)
+    venv.reset()
+    raw = [venv.get_original_obs()]
+    rng = np.random.default_rng(0)
+    dones = [False]
+    while not dones[0]:
+        _, _, dones, _ = venv.step(rng.integers(0, 5, (1, 4)))
+        raw.append(venv.get_original_obs())
+    venv.close()
+
+    episode = TrajectoryStore(str(tmp_path)).episode(0)
+    assert np.array_equal(episode["observations"], np.stack(raw[:-1])[:, 0])
+
+
+def test_recorder_stores_the_final_step(tmp_path):
+    env = TrajectoryRecorder(SoccerFieldEnv(game_duration=GAME_DURATION), str(tmp_path))
+    env.reset(seed=0)
+    rng = np.random.default_rng(0)
+    finals = []
+    while len(finals) < 2:
+        observation, _, terminated, truncated, info = env.step(rng.integers(0, 5, 4))
+        if terminated or truncated:
+            finals.append((observation, info["terminal_state"]))
+            env.reset()
+    env.close()
+
+    store = TrajectoryStore(str(tmp_path))
+    for i, (observation, state) in enumerate(finals):
+        episode = store.episode(i, final=True)
+        assert np.array_equal(episode["observations"][-1], observation)
+        assert np.array_equal(episode["states"][-1], state)
+
+
+def test_recorder_needs_no_torch():
+    code = (
+        "import sys, recorder\n"
+        "assert 'torch' not in sys.modules\n"
+        "assert 'stable_baselines3' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+import rewards.heuristic
+from rewards.vectorized import RewardEngine
+from simulation import physics
+from soccer_env import SoccerFieldEnv
+
+STEPS = 3000
+
+
+def _play(envs, rng, steps):
+    """
+    Step envs with random actions and random shots at the ball. Finished
+    episodes are reset after the yield, so the envs hold the state the step
+    ended in.
+
+    Yields:
+        list[float]: Reward of every env at each step, from its
+            RewardEngine(1, ...).
+    """
+    for _ in range(steps):
+        rewards = []
+        for env in envs:
+            if rng.random() < 0.03:
+                # A shot, so that goals and the ball direction terms show up
+                env.soccer_field.state[physics.BALL_VX] = rng.uniform(-25, 25)
+                env.soccer_field.state[physics.BALL_VY] = rng.uniform(-8, 8)
+            _, reward, _, _, _ = env.step(rng.integers(0, 5, 4))
+            rewards.append(reward)
+        yield rewards
+        for env in envs:
+            if env._is_done() or env._is_truncated():
+                env.reset()
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_engine_equals_heuristic(seed):
+    env = SoccerFieldEnv()
+    env.reset(seed=seed)
+    goals = 0
+    for (reward,) in _play([env], np.random.default_rng(seed), STEPS):
+        assert reward == rewards.heuristic.reward_function(env)
+        goals += env.goal_event[0]
+    assert goals > 0
+
+
+def test_batched_engine_equals_heuristic():
+    envs = [SoccerFieldEnv() for _ in range(4)]
+    for seed, env in enumerate(envs):
+        env.reset(seed=seed)
+    engine = RewardEngine(len(envs), envs[0].width, envs[0].height)
+    goals = 0
+    for _ in _play(envs, np.random.default_rng(0), STEPS):
+        states = np.concatenate([env.soccer_field.states for env in envs])
+        codes = np.array([physics.GOAL_CODES[env.goal_event[1]] for env in envs])
+        expected = [rewards.heuristic.reward_function(env) for env in envs]
+        assert engine(states, codes).tolist() == expected
+        goals += np.count_nonzero(codes != physics.NO_GOAL)
+    assert goals > 0
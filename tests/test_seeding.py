@@ -0,0 +1,71 @@
+import random
+
+import numpy as np
+import pytest
+
+from main import make_vec_env
+from simulation import physics
+from soccer_env import SoccerFieldEnv
+
+STEPS = 2000
+
+
+def _rollout(env, seed, steps):
+    """
+    Step env with random actions and random shots at the ball, drawing from
+    the global generators in between, which must not affect the game.
+
+    Returns:
+        list[tuple]: Observation, reward and flags of every step.
+    """
+    rng = np.random.default_rng(seed)
+    trajectory = []
+    for _ in range(steps):
+        random.random()
+        np.random.random()
+        if rng.random() < 0.05:
+            env.soccer_field.state[physics.BALL_VX] = rng.uniform(-25, 25)
+            env.soccer_field.state[physics.BALL_VY] = rng.uniform(-8, 8)
+        observation, reward, terminated, truncated, _ = env.step(
+            rng.integers(0, 5, 4)
+        )
+        trajectory.append((observation.tobytes(), reward, terminated, truncated))
+        if terminated or truncated:
+            env.reset()
+    return trajectory
+
+
+def test_same_seed_gives_the_same_trajectory():
+    trajectories = []
+    for global_seed in (1, 2):
+        random.seed(global_seed)
+        np.random.seed(global_seed)
+        env = SoccerFieldEnv()
+        env.reset(seed=7)
+        trajectories.append(_rollout(env, 0, STEPS))
+    assert trajectories[0] == trajectories[1]
+    assert any(terminated for _, _, terminated, _ in trajectories[0])
+
+    env = SoccerFieldEnv()
+    env.reset(seed=8)
+    assert _rollout(env, 0, STEPS) != trajectories[0]
+
+
+@pytest.mark.parametrize("backend", ["dummy", "batched"])
+def test_vec_env_same_seed_gives_the_same_trajectory(backend):
+    trajectories = []
+    for global_seed in (1, 2):
+        np.random.seed(global_seed)
+        venv = make_vec_env(backend, num_envs=3, seed=5)
+        rng = np.random.default_rng(0)
+        trajectory = [venv.reset().tobytes()]
+        for _ in range(STEPS):
+            np.random.random()
+            observations, rewards, dones, _ = venv.step(rng.integers(0, 5, (3, 4)))
+            trajectory.append(
+                (observations.tobytes(), rewards.tobytes(), dones.tolist())
+            )
+        venv.close()
+        trajectories.append(trajectory)
+    assert trajectories[0] == trajectories[1]
+    assert any(any(dones) for _, _, dones in trajectories[0][1:])
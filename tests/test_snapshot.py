@@ -0,0 +1,72 @@
+import numpy as np
+
+from simulation import physics
+from soccer_env import SoccerFieldEnv
+
+STEPS = 1000
+
+
+def _rollout(env, rng, steps):
+    """
+    Step env with random actions and random shots at the ball, resetting
+    finished episodes.
+
+    Returns:
+        list[tuple]: Observation, reward, flags, reward terms and snapshot of
+            every step.
+    """
+    trajectory = []
+    for _ in range(steps):
+        if rng.random() < 0.05:
+            env.soccer_field.state[physics.BALL_VX] = rng.uniform(-25, 25)
+            env.soccer_field.state[physics.BALL_VY] = rng.uniform(-8, 8)
+        observation, reward, terminated, truncated, info = env.step(
+            rng.integers(0, 5, 4)
+        )
+        trajectory.append(
+            (
+                observation.tobytes(),
+                reward,
+                terminated,
+                truncated,
+                info["reward_terms"],
+                env.get_state().tobytes(),
+            )
+        )
+        if terminated or truncated:
+            env.reset()
+    return trajectory
+
+
+def _branch_point():
+    """
+    An env in the middle of a game, its snapshot and the state of the
+    generator its physics draws from.
+    """
+    env = SoccerFieldEnv()
+    env.reset(seed=0)
+    _rollout(env, np.random.default_rng(0), 500)
+    return env, env.get_state(), env.np_random.bit_generator.state
+
+
+def test_set_state_replays_the_trajectory():
+    env, snapshot, random_state = _branch_point()
+    expected = _rollout(env, np.random.default_rng(1), STEPS)
+    assert any(terminated for _, _, terminated, _, _, _ in expected)
+
+    env.set_state(snapshot)
+    env.np_random.bit_generator.state = random_state
+    assert _rollout(env, np.random.default_rng(1), STEPS) == expected
+
+
+def test_set_state_moves_a_game_to_another_env():
+    env, snapshot, random_state = _branch_point()
+    expected = _rollout(env, np.random.default_rng(1), STEPS)
+
+    other = SoccerFieldEnv()
+    other.reset(seed=1)
+    observation = other.set_state(snapshot)
+    assert observation.tobytes() == other._get_observation().tobytes()
+    assert other.get_state().tobytes() == snapshot.tobytes()
+    other.np_random.bit_generator.state = random_state
+    assert _rollout(other, np.random.default_rng(1), STEPS) == expected
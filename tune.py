@@ -0,0 +1,325 @@
+"""
+tune.py
+
+Parallel Optuna search over the PPO hyperparameters and the reward weights of
+main.py. Trials are stored in a local SQLite database, so several worker
+processes (and several runs of this script) share one study:
+
+    python tune.py --trials 64 --workers 16
+    python main.py --config best_config.json
+
+Every trial trains on its own vectorized environments with the sampled
+weights, but is scored with the default (heuristic) reward so that trials
+with different weights stay comparable. Evaluations logged by
+RewardLoggingCallback are reported to Optuna, and trials doing worse than the
+median of the earlier ones at the same step are pruned.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+
+import optuna
+import torch as th
+from optuna.study import MaxTrialsCallback
+from optuna.trial import TrialState
+from stable_baselines3 import PPO
+from stable_baselines3.common.vec_env import VecNormalize
+
+from main import (
+    POLICY_KWARGS,
+    SEED,
+    RewardLoggingCallback,
+    VecRewardTracker,
+    make_vec_env,
+)
+from rewards.registry import DEFAULT_REWARD_CONFIG
+
+
+def sample_params(trial, tune_rewards=True):
+    """
+    Sample the parameters of one trial.
+
+    Args:
+        trial (optuna.Trial): The trial.
+        tune_rewards (bool): Also sample a weight per reward component.
+
+    Returns:
+        dict: Parameter name to sampled value.
+    """
+    params = {
+        "learning_rate": trial.suggest_float(
+            "learning_rate", 1e-5, 1e-3, log=True
+        ),
+        "n_steps": trial.suggest_categorical("n_steps", [256, 512, 1024, 2048]),
+        "minibatches": trial.suggest_categorical("minibatches", [1, 2, 4, 8]),
+        "gamma": trial.suggest_float("gamma", 0.95, 0.999),
+        "gae_lambda": trial.suggest_float("gae_lambda", 0.9, 0.99),
+        "ent_coef": trial.suggest_float("ent_coef", 1e-4, 5e-2, log=True),
+        "clip_range": trial.suggest_float("clip_range", 0.1, 0.4),
+        "vf_coef": trial.suggest_float("vf_coef", 0.2, 1.0),
+    }
+    if tune_rewards:
+        for name in DEFAULT_REWARD_CONFIG:
+            key = f"reward/{name}"
+            params[key] = trial.suggest_float(key, 0.0, 2.0)
+    return params
+
+
+def params_to_config(params, num_envs):
+    """
+    Turn trial parameters into a training config as loaded by main.py.
+
+    Args:
+        params (dict): Parameters from sample_params or study.best_params.
+        num_envs (int): Parallel environments of the training run; the batch
+            size is a fraction of the n_steps * num_envs rollout.
+
+    Returns:
+        dict: {"ppo": PPO keyword arguments, "reward": component weights};
+            "reward" is left out when the weights were not tuned.
+    """
+    ppo = {
+        name: value
+        for name, value in params.items()
+        if name != "minibatches" and not name.startswith("reward/")
+    }
+    ppo["batch_size"] = params["n_steps"] * num_envs // params["minibatches"]
+    config = {"ppo": ppo}
+
+    rewards = {
+        name[len("reward/") :]: value
+        for name, value in params.items()
+        if name.startswith("reward/")
+    }
+    if rewards:
+        config["reward"] = rewards
+    return config
+
+
+class PruningCallback(RewardLoggingCallback):
+    """
+    RewardLoggingCallback reporting its evaluations to an Optuna trial and
+    stopping training once the trial should be pruned.
+    """
+
+    def __init__(self, trial, *args, **kwargs):
+        """
+        Args:
+            trial (optuna.Trial): Trial the evaluations are reported to.
+            *args, **kwargs: RewardLoggingCallback arguments.
+        """
+        super().__init__(*args, **kwargs)
+        self.trial = trial
+        self.last_mean_reward = None
+        self.pruned = False
+
+    def _on_evaluation(self, timesteps, mean_reward):
+        self.last_mean_reward = mean_reward
+        self.trial.report(mean_reward, timesteps)
+        if self.trial.should_prune():
+            self.pruned = True
+
+    def _on_step(self):
+        return not self.pruned
+
+
+def objective(trial, args):
+    """
+    Train PPO with the sampled parameters and score it.
+
+    Returns:
+        float: Mean heuristic-reward evaluation return of the final policy.
+    """
+    config = params_to_config(
+        sample_params(trial, not args.fixed_rewards), args.num_envs
+    )
+    seed = SEED + trial.number * (args.num_envs + args.eval_envs)
+    reward_tracker = VecRewardTracker(
+        make_vec_env(
+            args.vec_backend,
+            args.num_envs,
+            seed,
+            reward_config=config.get("reward"),
+        )
+    )
+    env = VecNormalize(
+        reward_tracker, norm_obs=True, norm_reward=True, clip_reward=10.0
+    )
+
+    # Scored with the default reward, whatever the weights being trained on
+    eval_env = VecNormalize(
+        make_vec_env(args.vec_backend, args.eval_envs, seed + args.num_envs),
+        training=False,
+        norm_reward=False,
+    )
+    eval_env.obs_rms = env.obs_rms
+
+    callback = PruningCallback(
+        trial,
+        reward_tracker=reward_tracker,
+        eval_env=eval_env,
+        log_dir=os.path.join(args.log_dir, f"trial_{trial.number}"),
+        eval_freq=args.eval_freq,
+        n_eval_episodes=args.eval_episodes,
+    )
+    model = PPO(
+        "MlpPolicy",
+        env,
+        seed=seed,
+        verbose=0,
+        policy_kwargs=POLICY_KWARGS,
+        **config["ppo"],
+    )
+    try:
+        model.learn(total_timesteps=args.timesteps, callback=callback)
+        if callback.pruned:
+            raise optuna.TrialPruned()
+        # Score the final policy, unless the last rollout was just evaluated
+        if callback._last_eval_step != callback.num_timesteps:
+            mean_reward, _ = callback._evaluate_model()
+            callback._on_evaluation(callback.num_timesteps, mean_reward)
+    finally:
+        env.close()
+        eval_env.close()
+    return callback.last_mean_reward
+
+
+def open_storage(url):
+    """
+    Optuna storage for a database URL. SQLite waits for locks held by the
+    other workers instead of failing.
+    """
+    engine_kwargs = {}
+    if url.startswith("sqlite"):
+        engine_kwargs["connect_args"] = {"timeout": 60}
+    return optuna.storages.RDBStorage(url, engine_kwargs=engine_kwargs)
+
+
+def study_kwargs(args, rank=0):
+    """
+    Arguments to create or load the shared study. Optuna does not store the
+    sampler and the pruner with the study, so every process loading it
+    builds them here.
+
+    Args:
+        args (argparse.Namespace): Tuning arguments.
+        rank (int): Index of the worker; each one seeds its sampler
+            differently, so parallel workers do not propose the same trials.
+
+    Returns:
+        dict: Keyword arguments of optuna.create_study and load_study.
+    """
+    return dict(
+        study_name=args.study_name,
+        storage=open_storage(args.storage),
+        sampler=optuna.samplers.TPESampler(seed=SEED + rank),
+        # Prune against the median of the earlier trials at the same step,
+        # once a few trials and the first evaluation are in
+        pruner=optuna.pruners.MedianPruner(
+            n_startup_trials=5, n_warmup_steps=args.eval_freq
+        ),
+    )
+
+
+def run_worker(args, rank):
+    """
+    Worker process: run trials of the shared study until it holds
+    ``args.trials`` finished trials.
+    """
+    # One core per worker; the workers together fill the box
+    th.set_num_threads(1)
+    study = optuna.load_study(**study_kwargs(args, rank))
+    study.optimize(
+        lambda trial: objective(trial, args),
+        callbacks=[
+            MaxTrialsCallback(
+                args.trials, states=(TrialState.COMPLETE, TrialState.PRUNED)
+            )
+        ],
+        gc_after_trial=True,
+    )
+
+
+def parse_args():
+    """
+    Parse the tuning command line.
+
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description="Parallel Optuna search of PPO and reward parameters."
+    )
+    parser.add_argument("--trials", type=int, default=50, help="Trials to finish.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Trials run in parallel, one process each (default: one per core).",
+    )
+    parser.add_argument(
+        "--storage",
+        default="sqlite:///tune.db",
+        help="Optuna storage URL shared by the workers.",
+    )
+    parser.add_argument("--study-name", default="soccer_ppo")
+    parser.add_argument(
+        "--timesteps", type=int, default=300_000, help="Training steps per trial."
+    )
+    parser.add_argument(
+        "--num-envs", type=int, default=8, help="Training environments per trial."
+    )
+    parser.add_argument(
+        "--vec-backend",
+        choices=["dummy", "batched"],
+        default="batched",
+        help="Vectorized backend of every trial (in the worker process).",
+    )
+    parser.add_argument(
+        "--eval-freq", type=int, default=50_000, help="Timesteps between evaluations."
+    )
+    parser.add_argument("--eval-envs", type=int, default=4)
+    parser.add_argument("--eval-episodes", type=int, default=8)
+    parser.add_argument(
+        "--fixed-rewards",
+        action="store_true",
+        help="Tune the PPO hyperparameters only, with the default reward.",
+    )
+    parser.add_argument("--log-dir", default="./tune_logs/")
+    parser.add_argument(
+        "--output",
+        default="best_config.json",
+        help="Best config, for main.py --config.",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    optuna.create_study(
+        direction="maximize", load_if_exists=True, **study_kwargs(args)
+    )
+
+    workers = [
+        mp.get_context("spawn").Process(target=run_worker, args=(args, rank))
+        for rank in range(max(1, min(args.workers, args.trials)))
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    study = optuna.load_study(**study_kwargs(args))
+    best = study.best_trial
+    config = params_to_config(best.params, args.num_envs)
+    config["trial"] = best.number
+    config["value"] = best.value
+    with open(args.output, "w") as f:
+        json.dump(config, f, indent=2)
+    print(f"Best trial {best.number}: {best.value:.2f}, written to {args.output}")
+    print(
+        f"Train with: python main.py --config {args.output} "
+        f"--num-envs {args.num_envs}"
+    )
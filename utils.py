@@ -1,5 +1,8 @@
+import csv
+import functools
 import os
 import random
+import time
 
 import numpy as np
 
@@ -8,3 +11,428 @@ def set_seed(seed: int):
     os.environ["PYTHONHASHSEED"] = str(seed)
     random.seed(seed)
     np.random.seed(seed)
+
+
+class StepProfiler:
+    """
+    Low-overhead timer for the phases of an environment step.
+
+    For every phase it keeps the call count, the total and the maximum time
+    and a histogram of power-of-two microsecond buckets: bucket b counts the
+    calls that took less than 2**b us (and at least 2**(b-1) us).
+    """
+
+    NUM_BUCKETS = 24
+
+    def __init__(self, phases):
+        """
+        Initialize the profiler.
+
+        Args:
+            phases (list[str]): Names of the timed phases, in report order.
+        """
+        self.phases = list(phases)
+        self.reset()
+
+    def reset(self):
+        """
+        Clear every counter.
+        """
+        self.counts = dict.fromkeys(self.phases, 0)
+        self.totals = dict.fromkeys(self.phases, 0.0)
+        self.maxima = dict.fromkeys(self.phases, 0.0)
+        self.histograms = {phase: [0] * self.NUM_BUCKETS for phase in self.phases}
+
+    def record(self, phase, elapsed):
+        """
+        Add one timed call of a phase.
+
+        Args:
+            phase (str): Phase name.
+            elapsed (float): Duration in seconds.
+        """
+        self.counts[phase] += 1
+        self.totals[phase] += elapsed
+        if elapsed > self.maxima[phase]:
+            self.maxima[phase] = elapsed
+        bucket = min(int(elapsed * 1e6).bit_length(), self.NUM_BUCKETS - 1)
+        self.histograms[phase][bucket] += 1
+
+    def wrap(self, phase, function):
+        """
+        Wrap a function so that every call is recorded under a phase.
+
+        Args:
+            phase (str): Phase name.
+            function (callable): Function to time.
+
+        Returns:
+            callable: The timed function.
+        """
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            result = function(*args, **kwargs)
+            self.record(phase, time.perf_counter() - start)
+            return result
+
+        return timed
+
+    def _percentile(self, phase, q):
+        """
+        Upper bound of the q-th quantile of a phase, from its histogram.
+        """
+        target = q * self.counts[phase]
+        seen = 0
+        for bucket, count in enumerate(self.histograms[phase]):
+            seen += count
+            if count and seen >= target:
+                return float(2**bucket)
+        return 0.0
+
+    def summary(self):
+        """
+        Summarize the recorded calls.
+
+        Returns:
+            dict: For every phase, its count, mean_us, max_us, p50_us and
+                p99_us (histogram bucket upper bounds) and the histogram.
+        """
+        summary = {}
+        for phase in self.phases:
+            count = self.counts[phase]
+            summary[phase] = {
+                "count": count,
+                "mean_us": 1e6 * self.totals[phase] / count if count else 0.0,
+                "max_us": 1e6 * self.maxima[phase],
+                "p50_us": self._percentile(phase, 0.5),
+                "p99_us": self._percentile(phase, 0.99),
+                "histogram": list(self.histograms[phase]),
+            }
+        return summary
+
+
+class MetricsLog:
+    """
+    Append-only CSV log of training metrics.
+
+    Rows are buffered and appended to the file every ``flush_every`` rows, so
+    logging costs the same at any point of a run and at most ``flush_every``
+    rows are held in memory. Every flush is fsynced, so a crash loses at most
+    the rows still in the buffer.
+
+    The columns are the keys seen so far, in order of first appearance, and
+    a row may leave any of them out. A row bringing new keys widens the
+    header: the file is copied once with the new header into a temporary
+    file that atomically replaces it. That happens once per new column, not
+    per row.
+    """
+
+    def __init__(self, path, flush_every=10):
+        """
+        Start a new, empty log.
+
+        Args:
+            path (str): CSV file; an existing file is truncated.
+            flush_every (int): Rows buffered before they are written.
+        """
+        self.path = path
+        self.flush_every = flush_every
+        self.columns = []
+        self.buffer = []
+        open(path, "w").close()
+
+    def write(self, row):
+        """
+        Add a row.
+
+        Args:
+            row (dict): Column name to value.
+        """
+        self.buffer.append(row)
+        if len(self.buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """
+        Append the buffered rows to the file.
+        """
+        if not self.buffer:
+            return
+        known = set(self.columns)
+        new_columns = []
+        for row in self.buffer:
+            for key in row:
+                if key not in known:
+                    known.add(key)
+                    new_columns.append(key)
+        if new_columns:
+            self._widen(self.columns + new_columns)
+
+        with open(self.path, "a", newline="") as f:
+            writer = csv.DictWriter(f, self.columns)
+            writer.writerows(self.buffer)
+            f.flush()
+            os.fsync(f.fileno())
+        self.buffer = []
+
+    def _widen(self, columns):
+        """
+        Rewrite the file with a header of more columns, padding the rows
+        already written with empty values.
+        """
+        padding = [""] * (len(columns) - len(self.columns))
+        temporary = self.path + ".tmp"
+        with open(self.path, newline="") as src, open(
+            temporary, "w", newline=""
+        ) as dst:
+            reader = csv.reader(src)
+            next(reader, None)
+            writer = csv.writer(dst)
+            writer.writerow(columns)
+            for line in reader:
+                writer.writerow(line + padding)
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(temporary, self.path)
+        self.columns = columns
+
+
+class RunningStats:
+    """
+    Count, mean, variance, minimum and maximum of a stream of values in
+    constant memory (Welford's algorithm).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = float("inf")
+        self.max = float("-inf")
+
+    def add(self, value):
+        """
+        Add one value.
+
+        Args:
+            value (float): New value.
+        """
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def std(self):
+        """
+        Population standard deviation, like np.std.
+        """
+        return (self.m2 / self.count) ** 0.5 if self.count else 0.0
+
+
+class StreamingQuantile:
+    """
+    Estimate of one quantile of a stream of values in constant memory, with
+    the P-square algorithm (Jain and Chlamtac, 1985).
+
+    Five markers track the minimum, the q/2, q and (1+q)/2 quantiles and the
+    maximum; their heights are adjusted with a piecewise-parabolic fit as
+    values arrive. The first five values are kept exactly.
+    """
+
+    def __init__(self, q):
+        """
+        Args:
+            q (float): Quantile to estimate, e.g. 0.5 for the median.
+        """
+        self.q = q
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * q, 1 + 4 * q, 3 + 2 * q, 5]
+        self.increments = [0, q / 2, q, (1 + q) / 2, 1]
+
+    def add(self, value):
+        """
+        Add one value.
+
+        Args:
+            value (float): New value.
+        """
+        heights = self.heights
+        if len(heights) < 5:
+            heights.append(value)
+            heights.sort()
+            return
+
+        # Cell of the new value, stretching the extreme markers if needed
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = 0
+            while value >= heights[cell + 1]:
+                cell += 1
+
+        positions = self.positions
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Move the three middle markers towards their desired positions
+        for i in range(1, 4):
+            offset = self.desired[i] - positions[i]
+            if (offset >= 1 and positions[i + 1] - positions[i] > 1) or (
+                offset <= -1 and positions[i - 1] - positions[i] < -1
+            ):
+                step = 1 if offset > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = self._linear(i, step)
+                heights[i] = height
+                positions[i] += step
+
+    def _parabolic(self, i, step):
+        h, n = self.heights, self.positions
+        return h[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (h[i] - h[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def _linear(self, i, step):
+        h, n = self.heights, self.positions
+        return h[i] + step * (h[i + step] - h[i]) / (n[i + step] - n[i])
+
+    @property
+    def value(self):
+        """
+        Current estimate; exact while fewer than six values were added.
+        """
+        heights = self.heights
+        if len(heights) == 5 and self.positions[4] > 5:
+            return heights[2]
+        if not heights:
+            return 0.0
+        return float(np.quantile(heights, self.q))
+
+
+class RingBuffer:
+    """
+    The last ``size`` values of a stream, in a preallocated array.
+    """
+
+    def __init__(self, size):
+        """
+        Args:
+            size (int): Number of values kept.
+        """
+        self.values = np.zeros(size)
+        self.count = 0
+
+    def add(self, value):
+        """
+        Add one value, overwriting the oldest once the buffer is full.
+
+        Args:
+            value (float): New value.
+        """
+        self.values[self.count % len(self.values)] = value
+        self.count += 1
+
+    def window(self):
+        """
+        The values kept, in no particular order.
+
+        Returns:
+            np.ndarray: View of at most ``size`` values.
+        """
+        return self.values[: min(self.count, len(self.values))]
+
+
+class EpisodeStats:
+    """
+    Constant time and memory statistics of completed episodes: running
+    mean/std/min/max of the rewards and lengths, streaming median and p95 of
+    the rewards, and exact statistics of the last 100 episodes.
+    """
+
+    WINDOW = 100
+
+    def __init__(self):
+        self.rewards = RunningStats()
+        self.lengths = RunningStats()
+        self.median = StreamingQuantile(0.5)
+        self.p95 = StreamingQuantile(0.95)
+        self.recent = RingBuffer(self.WINDOW)
+
+    @property
+    def count(self):
+        """
+        Number of completed episodes.
+        """
+        return self.rewards.count
+
+    def add(self, reward, length):
+        """
+        Record a completed episode.
+
+        Args:
+            reward (float): Total reward of the episode.
+            length (int): Steps in the episode.
+        """
+        self.rewards.add(reward)
+        self.lengths.add(length)
+        self.median.add(reward)
+        self.p95.add(reward)
+        self.recent.add(reward)
+
+    def summary(self, step_count):
+        """
+        Aggregated reward statistics.
+
+        Args:
+            step_count (int): Total steps taken.
+
+        Returns:
+            dict: Episode count, total steps, mean/median/min/max/std/p95
+                reward, mean episode length and, after 100 episodes, the
+                mean and median of the last 100 rewards.
+        """
+        if not self.count:
+            return {
+                "episode_count": 0,
+                "total_steps": step_count,
+                "mean_reward": 0,
+                "median_reward": 0,
+                "min_reward": 0,
+                "max_reward": 0,
+                "std_reward": 0,
+                "p95_reward": 0,
+                "mean_episode_length": 0,
+            }
+
+        stats = {
+            "episode_count": self.count,
+            "total_steps": step_count,
+            "mean_reward": self.rewards.mean,
+            "median_reward": self.median.value,
+            "min_reward": self.rewards.min,
+            "max_reward": self.rewards.max,
+            "std_reward": self.rewards.std,
+            "p95_reward": self.p95.value,
+            "mean_episode_length": self.lengths.mean,
+        }
+        if self.count >= self.WINDOW:
+            recent = self.recent.window()
+            stats["last_100_mean_reward"] = float(np.mean(recent))
+            stats["last_100_median_reward"] = float(np.median(recent))
+        return stats